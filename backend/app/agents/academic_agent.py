@@ -1,5 +1,7 @@
 """Academic tutoring agent — multi-subject Q&A with CoT reasoning."""
 
+from collections.abc import AsyncGenerator
+
 import structlog
 
 from app.agents.base_agent import AgentContext, AgentResponse, BaseAgent
@@ -9,6 +11,8 @@ from app.services.prompt_templates.academic import build_cot_messages
 
 logger = structlog.get_logger()
 
+_UNAVAILABLE_MESSAGE = "抱歉，学业辅导服务暂时不可用，请稍后重试。"
+
 # Subject detection keywords
 _SUBJECT_KEYWORDS: dict[str, list[str]] = {
     "math": ["方程", "函数", "几何", "概率", "数列", "不等式", "向量", "矩阵", "最值", "导数", "积分"],
@@ -42,7 +46,7 @@ class AcademicAgent(BaseAgent):
     def __init__(self) -> None:
         self._llm = LLMClient()
 
-    async def process(self, context: AgentContext) -> AgentResponse:
+    def _build_messages(self, context: AgentContext) -> tuple[str, list[dict[str, str]]]:
         # Detect subject from user input
         subject = _detect_subject(context.user_input)
 
@@ -53,13 +57,17 @@ class AcademicAgent(BaseAgent):
             history=context.history,
             rag_context=context.rag_context,
         )
+        return subject, messages
+
+    async def process(self, context: AgentContext) -> AgentResponse:
+        subject, messages = self._build_messages(context)
 
         try:
-            result = await self._llm.generate(messages)
+            result = await self._llm.generate(messages, cache=self._cache_scope(context))
             content = result["content"]
         except Exception:
             await logger.aexception("academic_agent.llm_failed")
-            content = "抱歉，学业辅导服务暂时不可用，请稍后重试。"
+            content = _UNAVAILABLE_MESSAGE
 
         return AgentResponse(
             content=content,
@@ -67,6 +75,15 @@ class AcademicAgent(BaseAgent):
             metadata={"subject": subject},
         )
 
+    async def process_stream(self, context: AgentContext) -> AsyncGenerator[str, None]:
+        _subject, messages = self._build_messages(context)
+        async for chunk in self._stream_with_fallback(
+            self._llm.generate_stream(messages, cache=self._cache_scope(context)),
+            fallback=_UNAVAILABLE_MESSAGE,
+            event="academic_agent.llm_stream_failed",
+        ):
+            yield chunk
+
     def get_capabilities(self) -> list[str]:
         return [
             "academic_math_question",
@@ -1,9 +1,19 @@
 """Base agent interface — all intelligent agents inherit from this."""
 
 import abc
+from collections.abc import AsyncGenerator, AsyncIterator
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import structlog
 
 from app.models.conversation import AgentType
+from app.services.response_cache import CacheScope, persona_fingerprint
+
+if TYPE_CHECKING:
+    from app.hub.turn_scope import TurnScope
+
+logger = structlog.get_logger()
 
 
 @dataclass
@@ -18,6 +28,8 @@ class AgentContext:
     context_snapshot: dict | None = None
     persona: dict | None = None
     rag_context: str | None = None
+    # Request-scoped memo (intent, safety, embedding, persona) for this turn
+    turn: "TurnScope | None" = None
 
 
 @dataclass
@@ -40,12 +52,45 @@ class BaseAgent(abc.ABC):
     - process(): Handle a user request and return a response.
     - health_check(): Verify the agent is operational.
     - get_capabilities(): Declare what this agent can do.
+
+    LLM-backed agents should also override process_stream() so chunks reach
+    the client as they are generated.
     """
 
     @abc.abstractmethod
     async def process(self, context: AgentContext) -> AgentResponse:
         """Process user input and return a response."""
 
+    async def process_stream(self, context: AgentContext) -> AsyncGenerator[str, None]:
+        """Process user input and yield the response text in chunks.
+
+        Default: run process() and yield the full content as one chunk.
+        """
+        response = await self.process(context)
+        yield response.content
+
+    def _cache_scope(self, context: AgentContext) -> CacheScope:
+        """Response-cache opt-in for this turn (the cache itself refuses emotional/crisis)."""
+        return CacheScope(
+            namespace=context.agent_type.value,
+            persona_version=persona_fingerprint(context.persona),
+            query=context.user_input,
+        )
+
+    async def _stream_with_fallback(
+        self, chunks: AsyncIterator[str], *, fallback: str, event: str,
+    ) -> AsyncGenerator[str, None]:
+        """Relay LLM chunks; on failure before the first chunk, yield the fallback text."""
+        emitted = False
+        try:
+            async for chunk in chunks:
+                emitted = True
+                yield chunk
+        except Exception:
+            await logger.aexception(event)
+            if not emitted:
+                yield fallback
+
     async def health_check(self) -> bool:
         """Check if the agent is healthy. Default: True."""
         return True
@@ -1,5 +1,7 @@
 """Classroom review agent — structured summaries, study plans, doubt resolution."""
 
+from collections.abc import AsyncGenerator
+
 import structlog
 
 from app.agents.base_agent import AgentContext, AgentResponse, BaseAgent
@@ -9,6 +11,8 @@ from app.services.prompt_manager import PromptManager
 
 logger = structlog.get_logger()
 
+_UNAVAILABLE_MESSAGE = "抱歉，课堂复盘服务暂时不可用，请稍后重试。"
+
 
 class ClassroomAgent(BaseAgent):
     """Classroom review agent for note-taking, summarization, and study planning."""
@@ -17,7 +21,7 @@ class ClassroomAgent(BaseAgent):
         self._llm = LLMClient()
         self._prompt_manager = PromptManager()
 
-    async def process(self, context: AgentContext) -> AgentResponse:
+    def _build_messages(self, context: AgentContext) -> list[dict[str, str]]:
         user_input = context.user_input
         if context.rag_context:
             user_input = f"{context.rag_context}\n\n用户问题: {user_input}"
@@ -28,19 +32,32 @@ class ClassroomAgent(BaseAgent):
             user_input,
             persona=context.persona,
         )
+        return messages
+
+    async def process(self, context: AgentContext) -> AgentResponse:
+        messages = self._build_messages(context)
 
         try:
-            result = await self._llm.generate(messages)
+            result = await self._llm.generate(messages, cache=self._cache_scope(context))
             content = result["content"]
         except Exception:
             await logger.aexception("classroom_agent.llm_failed")
-            content = "抱歉，课堂复盘服务暂时不可用，请稍后重试。"
+            content = _UNAVAILABLE_MESSAGE
 
         return AgentResponse(
             content=content,
             agent_type=AgentType.CLASSROOM,
         )
 
+    async def process_stream(self, context: AgentContext) -> AsyncGenerator[str, None]:
+        messages = self._build_messages(context)
+        async for chunk in self._stream_with_fallback(
+            self._llm.generate_stream(messages, cache=self._cache_scope(context)),
+            fallback=_UNAVAILABLE_MESSAGE,
+            event="classroom_agent.llm_stream_failed",
+        ):
+            yield chunk
+
     def get_capabilities(self) -> list[str]:
         return [
             "classroom_review",
@@ -1,5 +1,7 @@
 """Creative writing agent — AIGC text generation, writing assistance, work evaluation."""
 
+from collections.abc import AsyncGenerator
+
 import structlog
 
 from app.agents.base_agent import AgentContext, AgentResponse, BaseAgent
@@ -9,6 +11,8 @@ from app.services.prompt_manager import PromptManager
 
 logger = structlog.get_logger()
 
+_UNAVAILABLE_MESSAGE = "抱歉，创意创作服务暂时不可用，请稍后重试。"
+
 CREATIVE_SYSTEM_PROMPT = (
     "\n\n--- 创意创作专项指引 ---\n"
     "1. 激发学生的创作灵感，鼓励原创思维。\n"
@@ -28,7 +32,7 @@ class CreativeAgent(BaseAgent):
         self._llm = LLMClient()
         self._prompt_manager = PromptManager()
 
-    async def process(self, context: AgentContext) -> AgentResponse:
+    def _build_messages(self, context: AgentContext) -> list[dict[str, str]]:
         user_input = context.user_input
         if context.rag_context:
             user_input = f"{context.rag_context}\n\n用户消息: {user_input}"
@@ -40,19 +44,32 @@ class CreativeAgent(BaseAgent):
             persona=context.persona,
         )
         messages[0]["content"] += CREATIVE_SYSTEM_PROMPT
+        return messages
+
+    async def process(self, context: AgentContext) -> AgentResponse:
+        messages = self._build_messages(context)
 
         try:
-            result = await self._llm.generate(messages)
+            result = await self._llm.generate(messages, cache=self._cache_scope(context))
             content = result["content"]
         except Exception:
             await logger.aexception("creative_agent.llm_failed")
-            content = "抱歉，创意创作服务暂时不可用，请稍后重试。"
+            content = _UNAVAILABLE_MESSAGE
 
         return AgentResponse(
             content=content,
             agent_type=AgentType.CREATIVE,
         )
 
+    async def process_stream(self, context: AgentContext) -> AsyncGenerator[str, None]:
+        messages = self._build_messages(context)
+        async for chunk in self._stream_with_fallback(
+            self._llm.generate_stream(messages, cache=self._cache_scope(context)),
+            fallback=_UNAVAILABLE_MESSAGE,
+            event="creative_agent.llm_stream_failed",
+        ):
+            yield chunk
+
     def get_capabilities(self) -> list[str]:
         return [
             "creative_writing",
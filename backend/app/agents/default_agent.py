@@ -1,10 +1,14 @@
 """Default agent — fallback LLM agent used when no specialized agent is registered."""
 
+from collections.abc import AsyncGenerator
+
 from app.agents.base_agent import AgentContext, AgentResponse, BaseAgent
 from app.models.conversation import AgentType
 from app.services.llm_client import LLMClient
 from app.services.prompt_manager import PromptManager
 
+_UNAVAILABLE_MESSAGE = "抱歉，AI 服务暂时不可用，请稍后重试。"
+
 
 class DefaultAgent(BaseAgent):
     """Generic LLM-powered agent that handles any agent type.
@@ -18,30 +22,42 @@ class DefaultAgent(BaseAgent):
         self._llm = LLMClient()
         self._prompt_manager = PromptManager()
 
-    async def process(self, context: AgentContext) -> AgentResponse:
+    def _build_messages(self, context: AgentContext) -> list[dict[str, str]]:
         # Build messages with RAG context if available
         user_input = context.user_input
         if context.rag_context:
             user_input = f"{context.rag_context}\n\n用户问题: {user_input}"
 
-        messages = self._prompt_manager.build_messages(
+        return self._prompt_manager.build_messages(
             context.agent_type,
             context.history,
             user_input,
             persona=context.persona,
         )
 
+    async def process(self, context: AgentContext) -> AgentResponse:
+        messages = self._build_messages(context)
+
         try:
-            result = await self._llm.generate(messages)
+            result = await self._llm.generate(messages, cache=self._cache_scope(context))
             content = result["content"]
         except Exception:
-            content = "抱歉，AI 服务暂时不可用，请稍后重试。"
+            content = _UNAVAILABLE_MESSAGE
 
         return AgentResponse(
             content=content,
             agent_type=context.agent_type,
         )
 
+    async def process_stream(self, context: AgentContext) -> AsyncGenerator[str, None]:
+        messages = self._build_messages(context)
+        async for chunk in self._stream_with_fallback(
+            self._llm.generate_stream(messages, cache=self._cache_scope(context)),
+            fallback=_UNAVAILABLE_MESSAGE,
+            event="default_agent.llm_stream_failed",
+        ):
+            yield chunk
+
     def get_capabilities(self) -> list[str]:
         return ["general_conversation", f"{self._agent_type.value}_support"]
 
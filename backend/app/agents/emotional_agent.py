@@ -1,17 +1,24 @@
 """Emotional companion agent — empathetic dialogue with crisis-aware safety."""
 
+from collections.abc import AsyncGenerator
+
 import structlog
 
 from app.agents.base_agent import AgentContext, AgentResponse, BaseAgent
 from app.models.conversation import AgentType
 from app.services.crisis_alert import CRISIS_RESPONSES, check_crisis_keywords
-from app.services.emotion_detector import EmotionDetector
+from app.services.emotion_detector import EmotionDetector, EmotionResult
 from app.services.intervention_strategies import get_strategies_for_emotion
 from app.services.llm_client import LLMClient
 from app.services.prompt_manager import PromptManager
 
 logger = structlog.get_logger()
 
+_UNAVAILABLE_MESSAGE = (
+    "我感受到你现在可能不太舒服。虽然我暂时无法完整回应，"
+    "但请记住你的感受是重要的。如果需要帮助，可以找学校心理咨询师聊聊。"
+)
+
 # Empathetic system prompt extension
 EMPATHY_SYSTEM_PROMPT = (
     "\n\n--- 情感陪伴专项指引 ---\n"
@@ -33,32 +40,36 @@ class EmotionalAgent(BaseAgent):
         self._prompt_manager = PromptManager()
         self._detector = EmotionDetector()
 
-    async def process(self, context: AgentContext) -> AgentResponse:
-        user_input = context.user_input
+    def _crisis_response(self, context: AgentContext) -> AgentResponse | None:
+        """Step 1: Crisis keyword pre-check (synchronous, <100ms)."""
+        crisis_result = check_crisis_keywords(context.user_input)
+        if not crisis_result.is_crisis:
+            return None
+
+        logger.warning(
+            "emotional_agent.crisis_detected",
+            user_id=context.user_id,
+            level=crisis_result.alert_level,
+            keywords=crisis_result.matched_keywords,
+        )
+        safe_response = CRISIS_RESPONSES.get(
+            crisis_result.alert_level,
+            CRISIS_RESPONSES[list(CRISIS_RESPONSES.keys())[0]],
+        )
+        return AgentResponse(
+            content=safe_response,
+            agent_type=AgentType.EMOTIONAL,
+            emotion_label="crisis",
+            metadata={
+                "crisis": True,
+                "alert_level": crisis_result.alert_level,
+                "matched_keywords": crisis_result.matched_keywords,
+            },
+        )
 
-        # Step 1: Crisis keyword pre-check (synchronous, <100ms)
-        crisis_result = check_crisis_keywords(user_input)
-        if crisis_result.is_crisis:
-            logger.warning(
-                "emotional_agent.crisis_detected",
-                user_id=context.user_id,
-                level=crisis_result.alert_level,
-                keywords=crisis_result.matched_keywords,
-            )
-            safe_response = CRISIS_RESPONSES.get(
-                crisis_result.alert_level,
-                CRISIS_RESPONSES[list(CRISIS_RESPONSES.keys())[0]],
-            )
-            return AgentResponse(
-                content=safe_response,
-                agent_type=AgentType.EMOTIONAL,
-                emotion_label="crisis",
-                metadata={
-                    "crisis": True,
-                    "alert_level": crisis_result.alert_level,
-                    "matched_keywords": crisis_result.matched_keywords,
-                },
-            )
+    def _prepare(self, context: AgentContext) -> tuple[EmotionResult, list[dict[str, str]], str]:
+        """Steps 2–4: detect emotion, build the prompt, pick intervention suggestions."""
+        user_input = context.user_input
 
         # Step 2: Detect emotion from text
         emotion_result = self._detector.detect_from_text(user_input)
@@ -95,6 +106,15 @@ class EmotionalAgent(BaseAgent):
                     "需要我详细介绍其中一个吗？"
                 )
 
+        return emotion_result, messages, intervention_note
+
+    async def process(self, context: AgentContext) -> AgentResponse:
+        crisis_response = self._crisis_response(context)
+        if crisis_response:
+            return crisis_response
+
+        emotion_result, messages, intervention_note = self._prepare(context)
+
         # Step 5: Generate empathetic response via LLM
         try:
             result = await self._llm.generate(messages)
@@ -103,10 +123,7 @@ class EmotionalAgent(BaseAgent):
                 content += intervention_note
         except Exception:
             await logger.aexception("emotional_agent.llm_failed")
-            content = (
-                "我感受到你现在可能不太舒服。虽然我暂时无法完整回应，"
-                "但请记住你的感受是重要的。如果需要帮助，可以找学校心理咨询师聊聊。"
-            )
+            content = _UNAVAILABLE_MESSAGE
 
         return AgentResponse(
             content=content,
@@ -120,6 +137,29 @@ class EmotionalAgent(BaseAgent):
             },
         )
 
+    async def process_stream(self, context: AgentContext) -> AsyncGenerator[str, None]:
+        crisis_response = self._crisis_response(context)
+        if crisis_response:
+            yield crisis_response.content
+            return
+
+        _emotion_result, messages, intervention_note = self._prepare(context)
+
+        # Step 5: Stream the empathetic response, then append the intervention note
+        emitted = False
+        try:
+            async for chunk in self._llm.generate_stream(messages):
+                emitted = True
+                yield chunk
+        except Exception:
+            await logger.aexception("emotional_agent.llm_stream_failed")
+            if not emitted:
+                yield _UNAVAILABLE_MESSAGE
+            return
+
+        if intervention_note:
+            yield intervention_note
+
     def get_capabilities(self) -> list[str]:
         return [
             "empathetic_dialogue",
@@ -1,5 +1,7 @@
 """Health guardian agent — screen time monitoring, exercise plans, break reminders."""
 
+from collections.abc import AsyncGenerator
+
 import structlog
 
 from app.agents.base_agent import AgentContext, AgentResponse, BaseAgent
@@ -9,6 +11,11 @@ from app.services.prompt_manager import PromptManager
 
 logger = structlog.get_logger()
 
+_UNAVAILABLE_MESSAGE = (
+    "我暂时无法完整回应，但温馨提醒你：如果已经学习超过40分钟，"
+    "请站起来活动一下，做几次深呼吸，让眼睛远眺窗外。"
+)
+
 # Health-specific prompt enhancement
 HEALTH_SYSTEM_PROMPT = (
     "\n\n--- 健康守护专项指引 ---\n"
@@ -28,7 +35,7 @@ class HealthAgent(BaseAgent):
         self._llm = LLMClient()
         self._prompt_manager = PromptManager()
 
-    async def process(self, context: AgentContext) -> AgentResponse:
+    def _build_messages(self, context: AgentContext) -> list[dict[str, str]]:
         user_input = context.user_input
         if context.rag_context:
             user_input = f"{context.rag_context}\n\n用户消息: {user_input}"
@@ -40,22 +47,32 @@ class HealthAgent(BaseAgent):
             persona=context.persona,
         )
         messages[0]["content"] += HEALTH_SYSTEM_PROMPT
+        return messages
+
+    async def process(self, context: AgentContext) -> AgentResponse:
+        messages = self._build_messages(context)
 
         try:
-            result = await self._llm.generate(messages)
+            result = await self._llm.generate(messages, cache=self._cache_scope(context))
             content = result["content"]
         except Exception:
             await logger.aexception("health_agent.llm_failed")
-            content = (
-                "我暂时无法完整回应，但温馨提醒你：如果已经学习超过40分钟，"
-                "请站起来活动一下，做几次深呼吸，让眼睛远眺窗外。"
-            )
+            content = _UNAVAILABLE_MESSAGE
 
         return AgentResponse(
             content=content,
             agent_type=AgentType.HEALTH,
         )
 
+    async def process_stream(self, context: AgentContext) -> AsyncGenerator[str, None]:
+        messages = self._build_messages(context)
+        async for chunk in self._stream_with_fallback(
+            self._llm.generate_stream(messages, cache=self._cache_scope(context)),
+            fallback=_UNAVAILABLE_MESSAGE,
+            event="health_agent.llm_stream_failed",
+        ):
+            yield chunk
+
     def get_capabilities(self) -> list[str]:
         return [
             "screen_time_monitoring",
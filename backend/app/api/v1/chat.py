@@ -1,12 +1,14 @@
 """Chat API — REST endpoints for conversation management + WebSocket for real-time chat."""
 
 import uuid
+from contextlib import aclosing
 
 import orjson
 import structlog
 from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import commit_session
 from app.core.dependencies import get_current_user_id, get_db_session
 from app.core.exceptions import NotFoundError
 from app.core.security import decode_token
@@ -148,10 +150,14 @@ async def websocket_chat(ws: WebSocket, token: str = Query(...), db: AsyncSessio
                 continue
 
             service = ChatService(db)
-            async for event_type, data in service.process_message_stream(
-                conv_id, uuid.UUID(user_id), content, content_type
-            ):
-                await _ws_send(ws, event_type, data)
+            # Close the turn's stream deterministically (even on disconnect) so it can save the user message
+            async with aclosing(
+                service.process_message_stream(conv_id, uuid.UUID(user_id), content, content_type)
+            ) as events:
+                async for event_type, data in events:
+                    await _ws_send(ws, event_type, data)
+            # Each turn is durable (and visible to other workers) once its reply is sent
+            await commit_session(db)
 
     except WebSocketDisconnect:
         await logger.ainfo("ws.disconnected", user_id=user_id)
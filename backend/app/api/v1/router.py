@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.api.v1.academic import router as academic_router
 from app.api.v1.admin import router as admin_router
@@ -13,6 +13,15 @@ from app.api.v1.persona import router as persona_router
 from app.api.v1.sso import router as sso_router
 from app.api.v1.users import router as users_router
 from app.api.v1.voice import router as voice_router
+from app.core.dependencies import require_role
+from app.core.http_pool import get_upstream_pools
+from app.services.embedding_cache import get_embedding_cache
+from app.services.embedding_service import embedding_batch_stats
+from app.services.graph_snapshot import graph_snapshot_stats
+from app.services.message_writer import get_message_writer
+from app.services.rerank_service import rerank_stats
+from app.services.response_cache import get_response_cache
+from app.services.single_flight import single_flight_stats
 
 router = APIRouter()
 
@@ -22,6 +31,21 @@ async def health_check() -> dict:
     return {"status": "healthy", "service": "jy-companion-api", "version": "0.1.0"}
 
 
+@router.get("/stats", tags=["system"])
+async def runtime_stats(_admin: str = Depends(require_role("admin"))) -> dict:
+    """Process-level runtime counters (upstream pool saturation, ...); admins only."""
+    return {
+        "upstreams": get_upstream_pools().stats(),
+        "llm_cache": get_response_cache().snapshot(),
+        "single_flight": single_flight_stats(),
+        "embedding_batcher": embedding_batch_stats(),
+        "embedding_cache": cache.snapshot() if (cache := get_embedding_cache()) is not None else None,
+        "graph_snapshot": graph_snapshot_stats(),
+        "rerank": rerank_stats(),
+        "message_writer": writer.stats() if (writer := get_message_writer()) is not None else None,
+    }
+
+
 router.include_router(auth_router)
 router.include_router(users_router)
 router.include_router(chat_router)
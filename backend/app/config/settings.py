@@ -38,6 +38,52 @@ class Settings(BaseSettings):
     # AI Services
     llm_service_url: str = "http://localhost:8080"
     rag_service_url: str = "http://localhost:8081"
+    asr_service_url: str = "http://localhost:8867"
+    tts_service_url: str = "http://localhost:8090"
+    ocr_service_url: str = "http://localhost:8866"
+
+    # Upstream HTTP pools (shared keep-alive connections to AI services)
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 20
+    upstream_keepalive_expiry: float = 30.0
+    upstream_http2: bool = False  # needs the optional h2 package (httpx[http2])
+    llm_max_connections: int = 200
+
+    # LLM response cache (opt-in; emotional/crisis paths are never cached)
+    llm_cache_enabled: bool = False
+    llm_cache_agents: list[str] = ["academic", "classroom", "health", "creative", "career"]
+    llm_cache_max_entries: int = 2048
+    llm_cache_ttl_seconds: int = 600
+    llm_cache_semantic_threshold: float | None = 0.97
+
+    # Embedding micro-batching of concurrent embed_single calls
+    embedding_batch_enabled: bool = True
+    embedding_batch_max_size: int = 32
+    embedding_batch_max_wait_ms: float = 5.0
+
+    # Embedding cache: in-process LRU, plus an opt-in shared tier ("redis" | "disk" | "none")
+    embedding_cache_enabled: bool = True
+    embedding_cache_backend: str = "none"
+    embedding_cache_dtype: str = "float16"
+    embedding_cache_max_bytes: int = 64 * 1024 * 1024
+    embedding_cache_ttl_seconds: int = 7 * 24 * 3600
+    embedding_cache_dir: str = ".cache/embeddings"
+
+    # Single-flight coalescing of identical upstream calls (cross-worker via Redis)
+    single_flight_distributed: bool = False
+
+    # Redis write-through cache of recent conversation turns
+    context_cache_enabled: bool = True
+    context_cache_ttl_seconds: int = 300
+
+    # Write-behind message buffer (group commit across concurrent turns)
+    message_write_behind: bool = False
+    message_write_behind_max_batch: int = 256
+    message_write_behind_max_delay_ms: int = 20
+
+    # Startup warm-up (agents, pools, Milvus, synthetic turn) before serving traffic
+    startup_warmup: bool = True
+    startup_warmup_timeout_seconds: float = 30.0
 
     # Content Safety
     content_safety_enabled: bool = True
@@ -45,6 +91,34 @@ class Settings(BaseSettings):
     # Milvus
     milvus_host: str = "localhost"
     milvus_port: int = 19530
+    milvus_search_workers: int = 8  # bounded thread pool for blocking pymilvus calls
+
+    # Embedded vector index over a knowledge_base snapshot ("milvus" | "local" primary engine)
+    vector_engine: str = "milvus"
+    local_index_dir: str = ""
+    local_index_failover: bool = True
+    local_index_ef: int = 128
+
+    # BM25 character-bigram index fused with vector hits by RRF (empty dir disables)
+    lexical_index_dir: str = ""
+    rag_rrf_k: int = 60
+
+    # RAG result cache (structured hits keyed by params + corpus version)
+    rag_cache_enabled: bool = True
+    rag_cache_ttl_seconds: int = 3600
+
+    # RAG context packing: candidates retrieved per chat turn, packed into this many tokens
+    rag_pack_candidates: int = 10
+    rag_context_token_budget: int = 1200
+    # Chat turns link knowledge points in the query and add their graph neighbours (snapshot-backed)
+    rag_include_graph: bool = True
+
+    # Rerank stage ("none" | "remote" cross-encoder | "local" bigram stand-in)
+    rerank_backend: str = "none"
+    rerank_service_url: str = ""  # defaults to rag_service_url
+    rerank_model: str = "bge-reranker-base"
+    rerank_candidates: int = 20
+    rerank_budget_ms: float = 150.0
 
     # Neo4j
     neo4j_uri: str = "bolt://localhost:7687"
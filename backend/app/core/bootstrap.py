@@ -0,0 +1,110 @@
+"""Startup bootstrap — agent registration and warm-up before serving traffic.
+
+Runs from the FastAPI lifespan, so uvicorn only starts accepting requests
+(and the pod only passes its probes) once the first real turn will find
+registered agents, open upstream connections, a loaded Milvus collection and
+the in-memory knowledge-graph snapshot.
+Every warm-up step is best-effort: a missing upstream is logged, not fatal.
+"""
+
+import time
+from collections.abc import Awaitable, Callable
+
+import structlog
+
+from app.agents.academic_agent import AcademicAgent
+from app.agents.base_agent import AgentContext
+from app.agents.career_agent import CareerAgent
+from app.agents.classroom_agent import ClassroomAgent
+from app.agents.creative_agent import CreativeAgent
+from app.agents.emotional_agent import EmotionalAgent
+from app.agents.health_agent import HealthAgent
+from app.config.settings import get_settings
+from app.core.container import ServiceContainer
+from app.core.http_pool import UpstreamPoolRegistry
+from app.hub.agent_registry import AgentRegistry
+from app.models.conversation import AgentType
+
+logger = structlog.get_logger()
+
+WARMUP_QUERY = "勾股定理是什么？"
+
+_AGENT_CLASSES = (AcademicAgent, ClassroomAgent, EmotionalAgent, HealthAgent, CreativeAgent, CareerAgent)
+
+
+def register_agents(registry: AgentRegistry) -> None:
+    """Register the six specialized agents (idempotent)."""
+    available = set(registry.get_available_types())
+    for agent_cls in _AGENT_CLASSES:
+        agent = agent_cls()
+        if agent.get_agent_type() not in available:
+            registry.register(agent)
+
+
+async def _preload_milvus() -> None:
+    """Load the Milvus collection, and map the local snapshot index when one is configured."""
+    from app.services.local_vector_index import get_local_index
+
+    local = get_local_index()
+    if local is not None:
+        await local.load()
+        if get_settings().vector_engine == "local":
+            return
+
+    from app.services.milvus_client import get_knowledge_store
+
+    await get_knowledge_store().load()
+
+
+async def _preload_graph() -> None:
+    from app.services.graph_snapshot import get_graph_snapshots
+
+    if await get_graph_snapshots().get() is None:
+        raise RuntimeError("knowledge graph snapshot unavailable")
+
+
+async def _warm_turn(services: ServiceContainer) -> None:
+    """Synthetic turn through the orchestrator, stopped at the first chunk."""
+    turn = services.turn_scope(WARMUP_QUERY)
+    context = AgentContext(
+        user_id="warmup",
+        conversation_id="warmup",
+        agent_type=AgentType.ACADEMIC,
+        user_input=WARMUP_QUERY,
+        turn=turn,
+    )
+    chunks = services.orchestrator.process_stream(context).chunks
+    try:
+        await anext(chunks, None)
+    finally:
+        await chunks.aclose()
+
+
+async def warm_up(services: ServiceContainer, pools: UpstreamPoolRegistry) -> dict[str, dict]:
+    """Run the warm-up steps in order; returns per-step ``{"ok", "ms"}``."""
+
+    async def _automata() -> None:
+        # First pass through the safety and intent pattern tables
+        services.safety_filter.check(WARMUP_QUERY)
+        services.intent_classifier.classify(WARMUP_QUERY)
+
+    steps: list[tuple[str, Callable[[], Awaitable[object]]]] = [
+        ("automata", _automata),
+        ("pools", pools.preconnect),
+        ("milvus", _preload_milvus),
+        ("graph", _preload_graph),
+        ("rag", lambda: services.rag.retrieve(WARMUP_QUERY)),
+        ("turn", lambda: _warm_turn(services)),
+    ]
+
+    report: dict[str, dict] = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            await step()
+            ok = True
+        except Exception:
+            logger.warning("warmup.step_failed", step=name, exc_info=True)
+            ok = False
+        report[name] = {"ok": ok, "ms": round((time.perf_counter() - started) * 1000, 2)}
+    return report
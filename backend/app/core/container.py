@@ -0,0 +1,67 @@
+"""App-level service container — long-lived collaborators shared across requests.
+
+Clients, classifiers and pipelines are stateless per request (or hold only
+process-wide pools), so they are built once per process instead of once per
+``ChatService(db)``. Request-bound state (the DB session, ``TurnScope``) stays
+out of the container.
+"""
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from app.hub.agent_registry import AgentRegistry, get_agent_registry
+from app.hub.intent_classifier import IntentClassifier
+from app.hub.orchestrator import Orchestrator
+from app.hub.turn_scope import TurnScope
+from app.services.content_safety import ContentSafetyFilter
+from app.services.context_builder import ContextBuilder
+from app.services.embedding_service import EmbeddingService
+from app.services.llm_client import LLMClient
+from app.services.prompt_manager import PromptManager
+from app.services.rag_pipeline import RAGPipeline
+
+
+@dataclass
+class ServiceContainer:
+    """Shared collaborators for the chat path."""
+
+    llm: LLMClient = field(default_factory=LLMClient)
+    embedding: EmbeddingService = field(default_factory=EmbeddingService)
+    prompt_manager: PromptManager = field(default_factory=PromptManager)
+    safety_filter: ContentSafetyFilter = field(default_factory=ContentSafetyFilter)
+    intent_classifier: IntentClassifier = field(default_factory=IntentClassifier)
+    registry: AgentRegistry = field(default_factory=get_agent_registry)
+    rag: RAGPipeline = field(init=False)
+    context_builder: ContextBuilder = field(init=False)
+    orchestrator: Orchestrator = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.rag = RAGPipeline(self.embedding)
+        self.context_builder = ContextBuilder(self.llm)
+        self.orchestrator = Orchestrator(self.registry, self.intent_classifier)
+
+    def turn_scope(
+        self,
+        text: str,
+        *,
+        persona_loader: Callable[[], Awaitable[dict | None]] | None = None,
+    ) -> TurnScope:
+        """New request-scoped memo for one turn, wired to the shared collaborators."""
+        return TurnScope(
+            text,
+            intent_classifier=self.intent_classifier,
+            safety_filter=self.safety_filter,
+            embedding_service=self.embedding,
+            persona_loader=persona_loader,
+        )
+
+
+# Global singleton
+_services: ServiceContainer | None = None
+
+
+def get_services() -> ServiceContainer:
+    global _services
+    if _services is None:
+        _services = ServiceContainer()
+    return _services
@@ -1,4 +1,4 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable, Callable
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
@@ -22,15 +22,32 @@ async_session_factory = async_sessionmaker(
 )
 
 
+# ``session.info`` key holding callbacks deferred until the transaction commits
+_AFTER_COMMIT = "after_commit"
+
+
 class Base(DeclarativeBase):
     pass
 
 
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Run ``callback`` once ``session``'s current transaction commits; dropped on rollback."""
+    session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+async def commit_session(session: AsyncSession) -> None:
+    """Commit ``session``, then run the callbacks registered through ``after_commit``."""
+    await session.commit()
+    for callback in session.info.pop(_AFTER_COMMIT, []):
+        await callback()
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_factory() as session:
         try:
             yield session
-            await session.commit()
+            await commit_session(session)
         except Exception:
+            session.info.pop(_AFTER_COMMIT, None)
             await session.rollback()
             raise
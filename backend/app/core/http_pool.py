@@ -0,0 +1,230 @@
+"""Process-wide pooled HTTP transport for upstream AI microservices.
+
+One keep-alive ``httpx.AsyncClient`` per upstream base URL (vLLM, embedding,
+ASR, TTS, OCR). Pools are opened in the FastAPI lifespan and borrowed by the
+service clients, so a chat turn reuses warm TCP/TLS connections instead of
+paying a handshake per call.
+"""
+
+import asyncio
+
+import httpx
+import structlog
+
+from app.config.settings import get_settings
+
+logger = structlog.get_logger()
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional ``h2`` package (``httpx[http2]``)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PoolStats:
+    """Request counters and saturation for one upstream pool."""
+
+    def __init__(self, max_connections: int) -> None:
+        self.max_connections = max_connections
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated_total = 0
+
+    def acquire(self) -> None:
+        if self.in_flight >= self.max_connections:
+            # Every connection is busy — this request queues for a slot
+            self.saturated_total += 1
+        self.requests_total += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self) -> None:
+        self.in_flight = max(self.in_flight - 1, 0)
+
+    def as_dict(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "saturated_total": self.saturated_total,
+            "saturation": round(self.in_flight / self.max_connections, 3) if self.max_connections else 0.0,
+        }
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the in-flight slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, stats: PoolStats) -> None:
+        self._stream = stream
+        self._stats = stats
+        self._released = False
+
+    async def __aiter__(self):  # type: ignore[override]
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._stats.release()
+
+
+class _InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Delegating transport that records pool usage for every request."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, stats: PoolStats) -> None:
+        self._transport = transport
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            self._stats.errors_total += 1
+            self._stats.release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self._stats),  # type: ignore[arg-type]
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class UpstreamPoolRegistry:
+    """Owns one keep-alive connection pool per upstream base URL.
+
+    Clients call ``client(base_url)``; unknown upstreams get a pool with the
+    registry defaults on first use, so code paths outside the lifespan
+    (scripts, tests) still work.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, PoolStats] = {}
+
+    @staticmethod
+    def _normalize(base_url: str) -> str:
+        return base_url.rstrip("/")
+
+    def register(
+        self,
+        base_url: str,
+        *,
+        max_connections: int | None = None,
+        http2: bool | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> httpx.AsyncClient:
+        """Open the pool for an upstream.
+
+        An upstream that already has an open pool keeps it (two settings may
+        point at the same base URL); the first registration's limits win.
+        """
+        key = self._normalize(base_url)
+        existing = self._clients.get(key)
+        if existing is not None and not existing.is_closed:
+            logger.debug("http_pool.already_registered", upstream=key)
+            return existing
+        limit = max_connections or self.max_connections
+        use_http2 = self.http2 if http2 is None else http2
+        if use_http2 and not _http2_available():
+            logger.warning("http_pool.http2_unavailable", upstream=key)
+            use_http2 = False
+
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                http2=use_http2,
+                limits=httpx.Limits(
+                    max_connections=limit,
+                    max_keepalive_connections=min(self.max_keepalive_connections, limit),
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+
+        stats = PoolStats(limit)
+        self._stats[key] = stats
+        self._clients[key] = httpx.AsyncClient(
+            base_url=key,
+            transport=_InstrumentedTransport(transport, stats),
+            timeout=60.0,
+        )
+        logger.info("http_pool.registered", upstream=key, max_connections=limit, http2=use_http2)
+        return self._clients[key]
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """Borrow the shared client for an upstream (lazily opened)."""
+        key = self._normalize(base_url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self.register(key)
+        return client
+
+    async def preconnect(self, path: str = "/health", timeout: float = 2.0) -> dict[str, bool]:
+        """Open one keep-alive connection per registered upstream (startup warm-up).
+
+        Any HTTP response counts as connected — only transport errors fail.
+        """
+
+        async def _probe(key: str, client: httpx.AsyncClient) -> tuple[str, bool]:
+            try:
+                await client.get(path, timeout=timeout)
+            except httpx.HTTPError:
+                logger.warning("http_pool.preconnect_failed", upstream=key)
+                return key, False
+            return key, True
+
+        results = await asyncio.gather(*[_probe(key, client) for key, client in self._clients.items()])
+        return dict(results)
+
+    def stats(self) -> dict[str, dict]:
+        """Per-upstream pool counters, keyed by base URL."""
+        return {key: s.as_dict() for key, s in self._stats.items()}
+
+    async def aclose(self) -> None:
+        """Close every pool (called on application shutdown)."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Global singleton
+_pools: UpstreamPoolRegistry | None = None
+
+
+def get_upstream_pools() -> UpstreamPoolRegistry:
+    global _pools
+    if _pools is None:
+        settings = get_settings()
+        _pools = UpstreamPoolRegistry(
+            max_connections=settings.upstream_max_connections,
+            max_keepalive_connections=settings.upstream_max_keepalive_connections,
+            keepalive_expiry=settings.upstream_keepalive_expiry,
+            http2=settings.upstream_http2,
+        )
+    return _pools
@@ -5,11 +5,12 @@ Future: multi-agent DAG with parallel/serial execution, ≤5 depth.
 """
 
 import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator
 from dataclasses import dataclass, field
 
 import structlog
 
-from app.agents.base_agent import AgentContext, AgentResponse
+from app.agents.base_agent import AgentContext, AgentResponse, BaseAgent
 from app.hub.agent_registry import AgentRegistry
 from app.hub.intent_classifier import IntentClassifier, IntentResult
 from app.models.conversation import AgentType
@@ -18,6 +19,9 @@ logger = structlog.get_logger()
 
 TASK_TIMEOUT_SECONDS = 10
 
+NO_AGENT_MESSAGE = "抱歉，当前没有可用的智能体来处理你的请求。"
+TIMEOUT_MESSAGE = "处理超时，请稍后再试或简化你的问题。"
+
 
 @dataclass
 class SubTask:
@@ -38,6 +42,19 @@ class OrchestrationResult:
     aggregated_content: str
 
 
+@dataclass
+class OrchestrationStream:
+    """Routing decision plus the agent's response as an async stream of text chunks."""
+
+    intent: IntentResult
+    agent_type: AgentType | None
+    chunks: AsyncIterator[str]
+
+
+async def _single_chunk(text: str) -> AsyncGenerator[str, None]:
+    yield text
+
+
 class Orchestrator:
     """Route user input through intent classification → agent execution.
 
@@ -45,33 +62,30 @@ class Orchestrator:
     Future: DAG decomposition for complex multi-agent tasks.
     """
 
-    def __init__(self, registry: AgentRegistry) -> None:
+    def __init__(self, registry: AgentRegistry, intent_classifier: IntentClassifier | None = None) -> None:
         self.registry = registry
-        self.intent_classifier = IntentClassifier()
-
-    async def process(self, context: AgentContext) -> OrchestrationResult:
-        """Main entry point: classify intent → route → execute → return."""
+        self.intent_classifier = intent_classifier or IntentClassifier()
 
-        # 1. Classify intent
-        intent = self.intent_classifier.classify(context.user_input)
+    def _route(self, context: AgentContext) -> tuple[IntentResult, AgentType, BaseAgent | None]:
+        """Classify intent and pick the target agent (falls back to the conversation's type).
 
-        # 2. Determine target agent
+        Reuses the turn's memoized intent when the caller already classified it.
+        """
+        if context.turn is not None:
+            intent = context.turn.intent()
+        else:
+            intent = self.intent_classifier.classify(context.user_input)
         target_type = intent.agent_type or context.agent_type
 
         agent = self.registry.get_agent(target_type)
         if not agent:
             # Fallback: use conversation's default agent type
             agent = self.registry.get_agent(context.agent_type)
+        return intent, target_type, agent
 
-        if not agent:
-            return OrchestrationResult(
-                responses=[],
-                intent=intent,
-                aggregated_content="抱歉，当前没有可用的智能体来处理你的请求。",
-            )
-
-        # 3. Execute agent (with timeout)
-        enriched_context = AgentContext(
+    @staticmethod
+    def _enrich(context: AgentContext, target_type: AgentType) -> AgentContext:
+        return AgentContext(
             user_id=context.user_id,
             conversation_id=context.conversation_id,
             agent_type=target_type,
@@ -80,8 +94,25 @@ class Orchestrator:
             context_snapshot=context.context_snapshot,
             persona=context.persona,
             rag_context=context.rag_context,
+            turn=context.turn,
         )
 
+    async def process(self, context: AgentContext) -> OrchestrationResult:
+        """Main entry point: classify intent → route → execute → return."""
+
+        # 1–2. Classify intent and determine target agent
+        intent, target_type, agent = self._route(context)
+
+        if not agent:
+            return OrchestrationResult(
+                responses=[],
+                intent=intent,
+                aggregated_content=NO_AGENT_MESSAGE,
+            )
+
+        # 3. Execute agent (with timeout)
+        enriched_context = self._enrich(context, target_type)
+
         try:
             response = await asyncio.wait_for(
                 agent.process(enriched_context),
@@ -92,7 +123,7 @@ class Orchestrator:
             return OrchestrationResult(
                 responses=[],
                 intent=intent,
-                aggregated_content="处理超时，请稍后再试或简化你的问题。",
+                aggregated_content=TIMEOUT_MESSAGE,
             )
 
         return OrchestrationResult(
@@ -101,6 +132,41 @@ class Orchestrator:
             aggregated_content=response.content,
         )
 
+    def process_stream(self, context: AgentContext) -> OrchestrationStream:
+        """Streaming entry point: route synchronously, then stream the agent's chunks.
+
+        The timeout applies to the wait for each chunk (first token and
+        inter-token gaps) rather than to the whole completion.
+        """
+        intent, target_type, agent = self._route(context)
+
+        if not agent:
+            return OrchestrationStream(intent=intent, agent_type=None, chunks=_single_chunk(NO_AGENT_MESSAGE))
+
+        chunks = self._stream_with_timeout(agent.process_stream(self._enrich(context, target_type)), target_type)
+        return OrchestrationStream(intent=intent, agent_type=target_type, chunks=chunks)
+
+    @staticmethod
+    async def _stream_with_timeout(
+        chunks: AsyncGenerator[str, None], agent_type: AgentType,
+    ) -> AsyncGenerator[str, None]:
+        emitted = False
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), timeout=TASK_TIMEOUT_SECONDS)
+                except StopAsyncIteration:
+                    return
+                except TimeoutError:
+                    logger.warning("orchestrator.stream_timeout", agent=agent_type.value, emitted=emitted)
+                    if not emitted:
+                        yield TIMEOUT_MESSAGE
+                    return
+                emitted = True
+                yield chunk
+        finally:
+            await chunks.aclose()
+
     async def process_multi(self, tasks: list[SubTask], base_context: AgentContext) -> OrchestrationResult:
         """Execute multiple sub-tasks respecting DAG dependencies.
 
@@ -0,0 +1,94 @@
+"""Request-scoped memoization for one chat turn.
+
+A ``TurnScope`` is created per turn by ChatService and carried on
+``AgentContext`` through the Orchestrator into agents, so intent, safety
+verdict, query embedding and persona are computed at most once per turn no
+matter how many layers ask for them.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from app.hub.intent_classifier import IntentClassifier, IntentResult
+from app.services.content_safety import ContentSafetyFilter, ContentSafetyResult
+from app.services.embedding_service import EmbeddingService
+
+
+class TurnScope:
+    """Memoized per-turn lookups over the user's input.
+
+    Args:
+        text: The user's input for this turn.
+        intent_classifier: Shared classifier (from the service container).
+        safety_filter: Shared content safety filter.
+        embedding_service: Shared embedding client.
+        persona_loader: Async callable resolving the conversation's persona.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        *,
+        intent_classifier: IntentClassifier,
+        safety_filter: ContentSafetyFilter,
+        embedding_service: EmbeddingService,
+        persona_loader: Callable[[], Awaitable[dict | None]] | None = None,
+    ) -> None:
+        self.text = text
+        self._intent_classifier = intent_classifier
+        self._safety_filter = safety_filter
+        self._embedding_service = embedding_service
+        self._persona_loader = persona_loader
+        self._intent: IntentResult | None = None
+        self._safety: ContentSafetyResult | None = None
+        self._embeddings: dict[str, asyncio.Future[list[float]]] = {}
+        self._persona: asyncio.Future[dict | None] | None = None
+        self.hits = 0
+
+    def intent(self) -> IntentResult:
+        if self._intent is None:
+            self._intent = self._intent_classifier.classify(self.text)
+        else:
+            self.hits += 1
+        return self._intent
+
+    def safety(self) -> ContentSafetyResult:
+        if self._safety is None:
+            self._safety = self._safety_filter.check(self.text)
+        else:
+            self.hits += 1
+        return self._safety
+
+    async def embedding(self, text: str | None = None) -> list[float]:
+        """Embedding of ``text`` (default: the turn's input); concurrent callers share one request."""
+        text = self.text if text is None else text
+        future = self._embeddings.get(text)
+        if future is None:
+            future = asyncio.ensure_future(self._embedding_service.embed_single(text))
+            self._embeddings[text] = future
+        else:
+            self.hits += 1
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Don't memoize failures — a later stage may retry
+            if self._embeddings.get(text) is future:
+                del self._embeddings[text]
+            raise
+
+    async def persona(self) -> dict | None:
+        if self._persona_loader is None:
+            return None
+        future = self._persona
+        if future is None:
+            future = asyncio.ensure_future(self._persona_loader())
+            self._persona = future
+        else:
+            self.hits += 1
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Same rule as embeddings: a failed load is retried by the next caller
+            if self._persona is future:
+                self._persona = None
+            raise
@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
@@ -9,8 +10,12 @@ from slowapi.errors import RateLimitExceeded
 from app.api.v1.router import router as v1_router
 from app.config.logging_config import setup_logging
 from app.config.settings import get_settings
+from app.core.bootstrap import register_agents, warm_up
+from app.core.container import get_services
+from app.core.http_pool import get_upstream_pools
 from app.core.middleware import setup_middleware
 from app.core.rate_limiter import limiter
+from app.services.message_writer import get_message_writer
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -20,7 +25,45 @@ logger = structlog.get_logger()
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     setup_logging(debug=settings.debug)
     await logger.ainfo("startup", app=settings.app_name, version=settings.app_version)
+
+    # Shared keep-alive pools for upstream AI services
+    pools = get_upstream_pools()
+    pools.register(settings.llm_service_url, max_connections=settings.llm_max_connections)
+    for upstream_url in (
+        settings.rag_service_url,
+        settings.asr_service_url,
+        settings.tts_service_url,
+        settings.ocr_service_url,
+    ):
+        pools.register(upstream_url)
+    if settings.rerank_service_url:
+        pools.register(settings.rerank_service_url)
+
+    # Long-lived chat collaborators (clients, classifier, orchestrator) + agents
+    services = get_services()
+    register_agents(services.registry)
+
+    # Pay cold-start costs before uvicorn starts accepting traffic
+    if settings.startup_warmup:
+        try:
+            report = await asyncio.wait_for(
+                warm_up(services, pools), timeout=settings.startup_warmup_timeout_seconds,
+            )
+            await logger.ainfo("warmup.done", steps=report)
+        except TimeoutError:
+            await logger.awarning("warmup.timeout", timeout=settings.startup_warmup_timeout_seconds)
+
     yield
+
+    if (writer := get_message_writer()) is not None:
+        await writer.aclose()
+    await pools.aclose()
+
+    from app.services.milvus_client import close_knowledge_store
+    from app.services.neo4j_client import close_knowledge_graph_client
+
+    close_knowledge_store()
+    await close_knowledge_graph_client()
     await logger.ainfo("shutdown", app=settings.app_name)
 
 
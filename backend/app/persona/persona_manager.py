@@ -9,7 +9,9 @@ import structlog
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import after_commit
 from app.models.persona import Persona
+from app.services.cache import get_cache_service
 
 logger = structlog.get_logger()
 
@@ -172,6 +174,8 @@ class PersonaManager:
 
         persona.version += 1
         await self._db.flush()
+        # Chat turns read the prompt-ready persona from Redis; drop it once the edit is committed
+        after_commit(self._db, lambda: _invalidate_cached_persona(persona_id))
         return persona
 
     async def export_persona(self, persona_id: uuid.UUID) -> dict | None:
@@ -194,3 +198,10 @@ class PersonaManager:
             "speaking_style": persona.tone or "自然亲切",
             "catchphrase": persona.catchphrase or "",
         }
+
+
+async def _invalidate_cached_persona(persona_id: uuid.UUID) -> None:
+    try:
+        await get_cache_service().invalidate_persona(str(persona_id))
+    except Exception:
+        logger.warning("persona.cache_invalidate_failed", persona_id=str(persona_id))
@@ -4,6 +4,7 @@ import httpx
 import structlog
 
 from app.config.settings import get_settings
+from app.core.http_pool import get_upstream_pools
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -25,34 +26,38 @@ class ASRClient:
     """
 
     def __init__(self, base_url: str | None = None):
-        self.base_url = (base_url or "http://localhost:8867").rstrip("/")
+        self.base_url = (base_url or settings.asr_service_url).rstrip("/")
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for this upstream."""
+        return get_upstream_pools().client(self.base_url)
 
     async def recognize_url(self, audio_url: str) -> ASRResult:
         """Recognize speech from an audio URL (e.g., MinIO presigned URL)."""
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            resp = await client.post(
-                f"{self.base_url}/asr/recognize",
-                json={"audio_url": audio_url},
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await self._client.post(
+            f"{self.base_url}/asr/recognize",
+            json={"audio_url": audio_url},
+            timeout=300.0,
+        )
+        resp.raise_for_status()
+        data = resp.json()
         return ASRResult(text=data.get("text", ""), segments=data.get("segments", []))
 
     async def recognize_base64(self, audio_base64: str) -> ASRResult:
         """Recognize speech from base64-encoded audio."""
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            resp = await client.post(
-                f"{self.base_url}/asr/recognize",
-                json={"audio_base64": audio_base64},
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await self._client.post(
+            f"{self.base_url}/asr/recognize",
+            json={"audio_base64": audio_base64},
+            timeout=300.0,
+        )
+        resp.raise_for_status()
+        data = resp.json()
         return ASRResult(text=data.get("text", ""), segments=data.get("segments", []))
 
     async def health_check(self) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"{self.base_url}/health")
-                return resp.status_code == 200
+            resp = await self._client.get(f"{self.base_url}/health", timeout=5.0)
+            return resp.status_code == 200
         except httpx.HTTPError:
             return False
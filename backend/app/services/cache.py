@@ -7,7 +7,6 @@ Provides:
   - Rate limiting counters
 """
 
-import hashlib
 import json
 
 import structlog
@@ -22,6 +21,14 @@ TTL_MEDIUM = 300  # 5 minutes — conversation context, user sessions
 TTL_LONG = 3600  # 1 hour — RAG results, persona data
 TTL_VERY_LONG = 86400  # 24 hours — static resources, knowledge base
 
+# Compare-and-delete, atomic on the server: a lock is only released by its holder
+_DELETE_IF_EQUAL = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
 
 class CacheService:
     """Redis cache abstraction for the companion platform.
@@ -32,6 +39,7 @@ class CacheService:
 
     def __init__(self) -> None:
         self._redis = None
+        self._raw_redis = None
         self._prefix = "jy:"
 
     async def _get_redis(self):
@@ -46,6 +54,18 @@ class CacheService:
             )
         return self._redis
 
+    async def _get_raw_redis(self):
+        """Lazy-init a second client without response decoding (binary payloads)."""
+        if self._raw_redis is None:
+            import redis.asyncio as aioredis
+            settings = get_settings()
+            self._raw_redis = aioredis.from_url(
+                settings.redis_url,
+                decode_responses=False,
+                max_connections=20,
+            )
+        return self._raw_redis
+
     def _key(self, namespace: str, key: str) -> str:
         """Build namespaced cache key."""
         return f"{self._prefix}{namespace}:{key}"
@@ -73,38 +93,106 @@ class CacheService:
         serialized = json.dumps(value, ensure_ascii=False) if not isinstance(value, str) else value
         await r.set(self._key(namespace, key), serialized, ex=ttl)
 
+    async def set_nx(self, namespace: str, key: str, value: str, ttl: int = TTL_SHORT) -> bool:
+        """Set a key only if it does not exist (lock primitive). Returns True if set."""
+        r = await self._get_redis()
+        return bool(await r.set(self._key(namespace, key), value, ex=ttl, nx=True))
+
     async def delete(self, namespace: str, key: str) -> None:
         """Delete a cached key."""
         r = await self._get_redis()
         await r.delete(self._key(namespace, key))
 
+    async def delete_if_equal(self, namespace: str, key: str, value: str) -> bool:
+        """Delete a key only while it still holds ``value`` (lock release). Returns True if deleted."""
+        r = await self._get_redis()
+        return bool(await r.eval(_DELETE_IF_EQUAL, 1, self._key(namespace, key), value))
+
     async def exists(self, namespace: str, key: str) -> bool:
         """Check if key exists in cache."""
         r = await self._get_redis()
         return bool(await r.exists(self._key(namespace, key)))
 
+    async def get_many_bytes(self, namespace: str, keys: list[str]) -> list[bytes | None]:
+        """Get raw binary values (no JSON decoding) for several keys in one round-trip."""
+        if not keys:
+            return []
+        r = await self._get_raw_redis()
+        return await r.mget([self._key(namespace, k) for k in keys])
+
+    async def set_many_bytes(self, namespace: str, items: dict[str, bytes], ttl: int = TTL_MEDIUM) -> None:
+        """Set raw binary values with TTL in one pipelined round-trip."""
+        if not items:
+            return
+        r = await self._get_raw_redis()
+        pipe = r.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self._key(namespace, key), value, ex=ttl)
+        await pipe.execute()
+
     # ── Convenience methods for common patterns ──
 
     async def get_conversation_context(self, conv_id: str) -> list[dict] | None:
-        """Get cached conversation context messages."""
-        return await self.get("conv_ctx", conv_id)
+        """Get cached conversation context messages (oldest first), None on a miss."""
+        r = await self._get_redis()
+        raw = await r.lrange(self._key("conv_ctx", conv_id), 0, -1)
+        return [json.loads(item) for item in raw] if raw else None
 
     async def set_conversation_context(
-        self, conv_id: str, messages: list[dict], ttl: int = TTL_MEDIUM,
+        self, conv_id: str, messages: list[dict], ttl: int = TTL_MEDIUM, max_len: int = 20,
     ) -> None:
-        """Cache conversation context messages."""
-        await self.set("conv_ctx", conv_id, messages, ttl)
+        """Replace cached conversation context with the newest ``max_len`` messages."""
+        r = await self._get_redis()
+        key = self._key("conv_ctx", conv_id)
+        pipe = r.pipeline(transaction=True)
+        pipe.delete(key)
+        if messages:
+            pipe.rpush(key, *[json.dumps(m, ensure_ascii=False) for m in messages[-max_len:]])
+            pipe.expire(key, ttl)
+        await pipe.execute()
+
+    async def append_conversation_context(
+        self, conv_id: str, messages: list[dict], ttl: int = TTL_MEDIUM, max_len: int = 20,
+    ) -> bool:
+        """Write-through append to a cached context list.
+
+        Only appends when the list is already cached (a cold key stays cold
+        and is rebuilt from the database on the next read). Returns True if
+        the messages were appended.
+        """
+        if not messages:
+            return False
+        r = await self._get_redis()
+        key = self._key("conv_ctx", conv_id)
+        pipe = r.pipeline(transaction=True)
+        pipe.rpushx(key, *[json.dumps(m, ensure_ascii=False) for m in messages])
+        pipe.ltrim(key, -max_len, -1)
+        pipe.expire(key, ttl)
+        results = await pipe.execute()
+        return bool(results[0])
 
-    async def get_rag_result(self, query: str) -> str | None:
-        """Get cached RAG retrieval result."""
-        key = hashlib.md5(query.encode()).hexdigest()  # noqa: S324
+    async def invalidate_conversation_context(self, conv_id: str) -> None:
+        """Drop cached conversation context."""
+        await self.delete("conv_ctx", conv_id)
+
+    async def get_rag_result(self, key: str) -> dict | None:
+        """Get cached structured RAG hits for a retrieval key (see ``RAGPipeline``)."""
         return await self.get("rag", key)
 
-    async def set_rag_result(self, query: str, result: str, ttl: int = TTL_LONG) -> None:
-        """Cache RAG retrieval result."""
-        key = hashlib.md5(query.encode()).hexdigest()  # noqa: S324
+    async def set_rag_result(self, key: str, result: dict, ttl: int = TTL_LONG) -> None:
+        """Cache structured RAG hits under a retrieval key."""
         await self.set("rag", key, result, ttl)
 
+    async def get_corpus_version(self) -> str:
+        """Current knowledge-corpus version stamp ("0" before the first import)."""
+        r = await self._get_redis()
+        return await r.get(self._key("corpus", "version")) or "0"
+
+    async def bump_corpus_version(self) -> int:
+        """Advance the corpus version so cached retrievals from older imports stop matching."""
+        r = await self._get_redis()
+        return await r.incr(self._key("corpus", "version"))
+
     async def get_persona(self, persona_id: str) -> dict | None:
         """Get cached persona data."""
         return await self.get("persona", persona_id)
@@ -113,6 +201,10 @@ class CacheService:
         """Cache persona data."""
         await self.set("persona", persona_id, data, ttl)
 
+    async def invalidate_persona(self, persona_id: str) -> None:
+        """Drop cached persona data (after the persona is edited)."""
+        await self.delete("persona", persona_id)
+
     async def increment_counter(self, namespace: str, key: str, ttl: int = TTL_SHORT) -> int:
         """Increment and return a counter (for rate limiting)."""
         r = await self._get_redis()
@@ -130,3 +222,14 @@ class CacheService:
             return await r.ping()
         except Exception:
             return False
+
+
+# Global singleton (one Redis connection pool per process)
+_cache_service: CacheService | None = None
+
+
+def get_cache_service() -> CacheService:
+    global _cache_service
+    if _cache_service is None:
+        _cache_service = CacheService()
+    return _cache_service
@@ -3,39 +3,68 @@
 Integrates the intelligent hub: intent classification → agent routing → RAG → response.
 """
 
+import asyncio
+import time
 import uuid
 from collections.abc import AsyncGenerator
 from datetime import UTC, datetime
 
 import structlog
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.agents.base_agent import AgentContext
-from app.hub.agent_registry import get_agent_registry
-from app.hub.intent_classifier import IntentClassifier
-from app.hub.orchestrator import Orchestrator
+from app.config.settings import get_settings
+from app.core.container import ServiceContainer, get_services
+from app.core.database import after_commit, async_session_factory
+from app.hub.turn_scope import TurnScope
 from app.models.conversation import AgentType, ContentType, Conversation, Message, MessageRole
-from app.services.content_safety import ContentSafetyFilter, ContentSafetyLevel
-from app.services.llm_client import LLMClient
-from app.services.prompt_manager import PromptManager
-from app.services.rag_pipeline import RAGPipeline
+from app.models.persona import Persona
+from app.services.cache import CacheService, get_cache_service
+from app.services.content_safety import ContentSafetyLevel
+from app.services.context_builder import (
+    ContextTurn,
+    ContextWindow,
+    estimate_tokens,
+    summarized_until,
+)
+from app.services.message_writer import MessageWriteBuffer, get_message_writer
+from app.services.rag_pipeline import RetrievalResult
+from app.services.staged_executor import Stage, StagedExecutor
 
 logger = structlog.get_logger()
 
-# Max history messages sent to LLM as context
+# Max recent messages considered for the LLM context (then trimmed to the token budget)
 MAX_CONTEXT_MESSAGES = 20
 
+# Deadline for the best-effort pre-LLM stages (RAG) of one turn
+PRE_LLM_DEADLINE_SECONDS = 2.5
+# Cap on the required persona + history stage; past it the turn fails rather than hangs
+HISTORY_TIMEOUT_SECONDS = 10.0
+
+# Background rolling-summary folds, at most one in flight per conversation
+_context_folds: dict[uuid.UUID, asyncio.Task[None]] = {}
+
 
 class ChatService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, services: ServiceContainer | None = None):
         self.db = db
-        self.llm = LLMClient()
-        self.prompt_manager = PromptManager()
-        self.safety_filter = ContentSafetyFilter()
-        self.intent_classifier = IntentClassifier()
-        self.rag = RAGPipeline()
-        self.orchestrator = Orchestrator(get_agent_registry())
+        # Long-lived collaborators come from the app-level container
+        self.services = services or get_services()
+        self.llm = self.services.llm
+        self.prompt_manager = self.services.prompt_manager
+        self.safety_filter = self.services.safety_filter
+        self.intent_classifier = self.services.intent_classifier
+        self.rag = self.services.rag
+        self.context_builder = self.services.context_builder
+        self.registry = self.services.registry
+        self.orchestrator = self.services.orchestrator
+        self._settings = get_settings()
+        self.context_cache: CacheService | None = (
+            get_cache_service() if self._settings.context_cache_enabled else None
+        )
+        self.message_writer: MessageWriteBuffer | None = get_message_writer()
 
     # ---- Conversation CRUD ----
 
@@ -87,6 +116,37 @@ class ChatService:
         await self.db.flush()
         return True
 
+    # ---- Persona ----
+
+    async def _load_persona(self, conv: Conversation) -> dict | None:
+        """Prompt-ready persona for the conversation (Redis, then Postgres)."""
+        if conv.persona_id is None:
+            return None
+        persona_id = str(conv.persona_id)
+        try:
+            cached = await get_cache_service().get_persona(persona_id)
+        except Exception:
+            cached = None
+        if isinstance(cached, dict):
+            return cached
+
+        row = await self.db.get(Persona, conv.persona_id)
+        if row is None:
+            return None
+        persona = {
+            "id": persona_id,
+            "version": row.version,
+            "name": row.display_name,
+            "personality": row.tone or row.description or "友善、耐心",
+            "speaking_style": row.speaking_style or "自然亲切",
+            "catchphrase": row.catchphrase or "",
+        }
+        try:
+            await get_cache_service().set_persona(persona_id, persona)
+        except Exception:
+            await logger.awarning("chat.persona_cache_unavailable", persona_id=persona_id)
+        return persona
+
     # ---- Message history ----
 
     async def get_messages(
@@ -105,8 +165,22 @@ class ChatService:
         rows = (await self.db.execute(q)).scalars().all()
         return list(rows), total
 
-    async def _load_context_messages(self, conv_id: uuid.UUID) -> list[dict[str, str]]:
-        """Load recent messages as LLM context."""
+    async def _load_context_messages(self, conv: Conversation) -> ContextWindow:
+        """Load recent messages as a token-budgeted LLM context (rolling summary + recent turns)."""
+        turns = await self._load_context_turns(conv.id)
+        cursor = summarized_until(conv.context_snapshot)
+        if cursor is not None:
+            turns = [t for t in turns if t.created_at > cursor]
+        return self.context_builder.build(
+            turns, conv.context_snapshot, self.context_builder.budget_for(conv.agent_type),
+        )
+
+    async def _load_context_turns(self, conv_id: uuid.UUID) -> list[ContextTurn]:
+        """Last ``MAX_CONTEXT_MESSAGES`` turns, oldest first — Redis first, Postgres on a miss."""
+        cached = await self._get_cached_turns(conv_id)
+        if cached is not None:
+            return cached
+
         q = (
             select(Message)
             .where(Message.conversation_id == conv_id)
@@ -114,43 +188,202 @@ class ChatService:
             .limit(MAX_CONTEXT_MESSAGES)
         )
         rows = (await self.db.execute(q)).scalars().all()
-        rows = list(reversed(rows))
-        return [{"role": msg.role.value, "content": msg.content} for msg in rows]
+        turns = [
+            ContextTurn(
+                role=msg.role.value,
+                content=msg.content,
+                created_at=msg.created_at,
+                tokens=msg.token_count or estimate_tokens(msg.content),
+            )
+            for msg in reversed(rows)
+        ]
+        if turns and self.context_cache is not None:
+            try:
+                await self.context_cache.set_conversation_context(
+                    str(conv_id), [t.to_cache() for t in turns],
+                    ttl=self._settings.context_cache_ttl_seconds, max_len=MAX_CONTEXT_MESSAGES,
+                )
+            except Exception:
+                await logger.awarning("chat.context_cache_unavailable", op="set", conv_id=str(conv_id))
+        return turns
 
-    # ---- Save message helpers ----
+    async def _get_cached_turns(self, conv_id: uuid.UUID) -> list[ContextTurn] | None:
+        if self.context_cache is None:
+            return None
+        try:
+            raw = await self.context_cache.get_conversation_context(str(conv_id))
+        except Exception:
+            await logger.awarning("chat.context_cache_unavailable", op="get", conv_id=str(conv_id))
+            return None
+        return [ContextTurn.from_cache(t) for t in raw] if raw is not None else None
+
+    async def _append_cached_turns(self, conv_id: uuid.UUID, messages: tuple[Message, ...]) -> None:
+        """Write-through of just-committed messages into the cached context list."""
+        if self.context_cache is None:
+            return
+        turns = [
+            ContextTurn(role=m.role.value, content=m.content, created_at=m.created_at, tokens=m.token_count or 0)
+            for m in messages
+        ]
+        try:
+            await self.context_cache.append_conversation_context(
+                str(conv_id), [t.to_cache() for t in turns],
+                ttl=self._settings.context_cache_ttl_seconds, max_len=MAX_CONTEXT_MESSAGES,
+            )
+        except Exception:
+            # Drop the list rather than leave it missing a turn
+            await logger.awarning("chat.context_cache_unavailable", op="append", conv_id=str(conv_id))
+            try:
+                await self.context_cache.invalidate_conversation_context(str(conv_id))
+            except Exception:
+                pass
+
+    def _schedule_context_fold(self, conv: Conversation, window: ContextWindow) -> None:
+        """Fold turns that fell out of the token window into the rolling summary, off the reply path.
 
-    async def _save_message(
+        Summarizing is an LLM round-trip, so it runs as a background task once
+        the reply is out and writes through its own session (or the
+        write-behind buffer) rather than the request's.
+        """
+        if not window.overflow or conv.id in _context_folds:
+            return
+        conv_id = conv.id
+        task = asyncio.create_task(self._fold_context_overflow(conv, window.overflow))
+        _context_folds[conv_id] = task
+        task.add_done_callback(lambda _: _context_folds.pop(conv_id, None))
+
+    async def _fold_context_overflow(self, conv: Conversation, overflow: list[ContextTurn]) -> None:
+        try:
+            snapshot = await self.context_builder.fold_overflow(conv.context_snapshot, overflow)
+            if snapshot is None:
+                return
+            if self.message_writer is not None:
+                await self.message_writer.submit(conv.id, (), context_snapshot=snapshot)
+            else:
+                async with async_session_factory() as session, session.begin():
+                    await session.execute(
+                        update(Conversation).where(Conversation.id == conv.id).values(context_snapshot=snapshot)
+                    )
+            set_committed_value(conv, "context_snapshot", snapshot)
+        except Exception:
+            await logger.aexception("chat.context_fold_failed", conv_id=str(conv.id))
+
+    # ---- Turn persistence ----
+
+    def _new_message(
         self,
         conv_id: uuid.UUID,
         role: MessageRole,
         content: str,
         content_type: ContentType = ContentType.TEXT,
-        token_count: int | None = None,
+        *,
         is_flagged: bool = False,
         intent_label: str | None = None,
         intent_confidence: float | None = None,
     ) -> Message:
-        msg = Message(
+        """Build (but do not persist) a message; timestamps reflect when it was produced."""
+        now = datetime.now(UTC)
+        return Message(
+            id=uuid.uuid4(),
             conversation_id=conv_id,
             role=role,
             content_type=content_type,
             content=content,
-            token_count=token_count,
+            token_count=estimate_tokens(content),
             is_flagged=is_flagged,
             intent_label=intent_label,
             intent_confidence=intent_confidence,
+            created_at=now,
+            updated_at=now,
         )
-        self.db.add(msg)
 
-        # Update conversation stats
-        result = await self.db.execute(select(Conversation).where(Conversation.id == conv_id))
-        conv = result.scalar_one_or_none()
-        if conv:
-            conv.message_count += 1
-            conv.last_message_at = datetime.now(UTC)
+    async def _persist_turn(self, conv_id: uuid.UUID, *messages: Message) -> None:
+        """Persist one turn's messages in a single batch with an atomic counter update.
+
+        Uses the write-behind buffer when enabled (group commit across
+        concurrent turns); otherwise one multi-row INSERT plus one
+        ``UPDATE ... SET message_count = message_count + n`` on this session.
+        The Redis context list is only appended once the rows are committed,
+        so a rollback never leaves other workers reading turns Postgres lacks.
+        """
+        if self.message_writer is not None:
+            # The buffer has committed the batch by the time submit returns
+            await self.message_writer.submit(conv_id, messages)
+            await self._append_cached_turns(conv_id, messages)
+            return
+        await self._write_turn(self.db, conv_id, messages)
+        after_commit(self.db, lambda: self._append_cached_turns(conv_id, messages))
+
+    @staticmethod
+    async def _write_turn(session: AsyncSession, conv_id: uuid.UUID, messages: tuple[Message, ...]) -> None:
+        session.add_all(messages)
+        await session.flush()
+        await session.execute(
+            update(Conversation)
+            .where(Conversation.id == conv_id)
+            .values(
+                message_count=Conversation.message_count + len(messages),
+                last_message_at=messages[-1].created_at,
+            )
+        )
 
-        await self.db.flush()
-        return msg
+    async def _persist_unanswered(self, conv_id: uuid.UUID, user_message: Message) -> None:
+        """Save the user message alone when a turn ends without a reply.
+
+        The request session is about to be rolled back (an error) or never
+        committed (a disconnect), so without the write-behind buffer the
+        message is committed in a short session of its own.
+        """
+        try:
+            if self.message_writer is not None:
+                await self._persist_turn(conv_id, user_message)
+                return
+            if user_message in self.db:
+                self.db.expunge(user_message)
+            async with async_session_factory() as session, session.begin():
+                await self._write_turn(session, conv_id, (user_message,))
+            await self._append_cached_turns(conv_id, (user_message,))
+        except Exception:
+            await logger.aexception("chat.user_message_persist_failed", conv_id=str(conv_id))
+
+    async def _gather_turn_context(
+        self,
+        conv: Conversation,
+        content: str,
+        turn: TurnScope,
+        executor: StagedExecutor,
+    ) -> tuple[ContextWindow, str]:
+        """Fan out the independent pre-LLM stages of a turn.
+
+        The DB chain (persona → load history) shares one session and stays
+        sequential, capped by ``HISTORY_TIMEOUT_SECONDS``; RAG retrieval runs alongside it as a best-effort stage
+        bounded by the request deadline, and its hits are packed into the
+        RAG token budget once the history is known. The user message itself is persisted
+        together with the reply at the end of the turn (alone if the turn ends early).
+        """
+
+        async def _load_persona_and_history() -> ContextWindow:
+            await turn.persona()
+            return await self._load_context_messages(conv)
+
+        results = await executor.run(
+            Stage("history", _load_persona_and_history(), timeout=HISTORY_TIMEOUT_SECONDS),
+            Stage(
+                "rag",
+                self.rag.retrieve_hits(
+                    content,
+                    top_k=self._settings.rag_pack_candidates,
+                    include_graph=self._settings.rag_include_graph,
+                    turn=turn,
+                ),
+                optional=True,
+                default=RetrievalResult(),
+            ),
+        )
+        window: ContextWindow = results["history"]
+        # Pack after both stages: chunks the history already quotes are skipped
+        rag_context = self.rag.pack(results["rag"], history=[m["content"] for m in window.messages])
+        return window, rag_context
 
     # ---- Core chat flow (with intelligent hub) ----
 
@@ -166,10 +399,16 @@ class ChatService:
         if not conv:
             return {"error": "Conversation not found"}
 
+        executor = StagedExecutor(PRE_LLM_DEADLINE_SECONDS)
+        turn = self.services.turn_scope(content, persona_loader=lambda: self._load_persona(conv))
+
         # 1. Content safety pre-check (fast path, <100ms)
-        safety_result = self.safety_filter.check(content)
+        with executor.timed("safety"):
+            safety_result = turn.safety()
         if safety_result.is_crisis:
-            await self._save_message(conv_id, MessageRole.USER, content, content_type, is_flagged=True)
+            await self._persist_turn(
+                conv_id, self._new_message(conv_id, MessageRole.USER, content, content_type, is_flagged=True),
+            )
             return {
                 "type": "crisis_alert",
                 "message": "我注意到你可能正在经历困难。请记住，你并不孤单。如果你需要帮助，请联系学校心理咨询师或拨打心理援助热线。",
@@ -178,60 +417,76 @@ class ChatService:
             return {"type": "blocked", "message": "抱歉，你的消息包含不适当的内容，请修改后重试。"}
 
         # 2. Intent classification
-        intent = self.intent_classifier.classify(content)
+        with executor.timed("intent"):
+            intent = turn.intent()
 
-        # 3. Save user message with intent metadata
-        await self._save_message(
+        user_message = self._new_message(
             conv_id, MessageRole.USER, content, content_type,
             intent_label=intent.intent_label, intent_confidence=intent.confidence,
         )
 
-        # 4. RAG retrieval (best-effort, non-blocking on failure)
-        rag_context = ""
+        # The student's message is saved on every exit path (errors, cancellation, disconnect)
+        answered = False
         try:
-            rag_context = await self.rag.retrieve(content)
-        except Exception:
-            await logger.awarning("chat.rag_retrieval_failed", conv_id=str(conv_id))
-
-        # 5. Build agent context and route through orchestrator
-        history = await self._load_context_messages(conv_id)
-        agent_context = AgentContext(
-            user_id=str(user_id),
-            conversation_id=str(conv_id),
-            agent_type=conv.agent_type,
-            user_input=content,
-            history=history,
-            rag_context=rag_context or None,
+            # 3–4. Load history ∥ RAG retrieval
+            window, rag_context = await self._gather_turn_context(conv, content, turn, executor)
+            history = window.messages
+
+            # 5. Build agent context and route through orchestrator
+            agent_context = AgentContext(
+                user_id=str(user_id),
+                conversation_id=str(conv_id),
+                agent_type=conv.agent_type,
+                user_input=content,
+                history=history,
+                persona=await turn.persona(),
+                rag_context=rag_context or None,
+                turn=turn,
+            )
+
+            agent = self.registry.get_agent(intent.agent_type or conv.agent_type)
+
+            if agent:
+                # Route through orchestrator
+                with executor.timed("generate"):
+                    result = await self.orchestrator.process(agent_context)
+                assistant_content = result.aggregated_content
+            else:
+                # Fallback: direct LLM call
+                user_input_with_rag = content
+                if rag_context:
+                    user_input_with_rag = f"{rag_context}\n\n用户问题: {content}"
+                messages = self.prompt_manager.build_messages(
+                    conv.agent_type, history, user_input_with_rag, persona=agent_context.persona,
+                )
+                try:
+                    with executor.timed("generate"):
+                        llm_response = await self.llm.generate(messages)
+                    assistant_content = llm_response["content"]
+                except Exception:
+                    await logger.aexception("llm.generate_failed", conv_id=str(conv_id))
+                    return {"type": "error", "message": "AI 服务暂时不可用，请稍后重试。"}
+
+            # 6. Output safety check
+            output_safety = self.safety_filter.check_output(assistant_content)
+            if not output_safety.is_safe:
+                assistant_content = "抱歉，我无法生成合适的回答，请换个话题吧。"
+
+            # 7. Persist the turn (user + assistant) in one batch
+            await self._persist_turn(
+                conv_id, user_message, self._new_message(conv_id, MessageRole.ASSISTANT, assistant_content),
+            )
+            answered = True
+        finally:
+            if not answered:
+                await self._persist_unanswered(conv_id, user_message)
+
+        self._schedule_context_fold(conv, window)
+        await logger.ainfo(
+            "chat.turn_timings", conv_id=str(conv_id), stages=executor.timings, total_ms=executor.total_ms,
+            memo_hits=turn.hits,
         )
 
-        registry = get_agent_registry()
-        agent = registry.get_agent(intent.agent_type or conv.agent_type)
-
-        if agent:
-            # Route through orchestrator
-            result = await self.orchestrator.process(agent_context)
-            assistant_content = result.aggregated_content
-        else:
-            # Fallback: direct LLM call
-            user_input_with_rag = content
-            if rag_context:
-                user_input_with_rag = f"{rag_context}\n\n用户问题: {content}"
-            messages = self.prompt_manager.build_messages(conv.agent_type, history, user_input_with_rag)
-            try:
-                llm_response = await self.llm.generate(messages)
-                assistant_content = llm_response["content"]
-            except Exception:
-                await logger.aexception("llm.generate_failed", conv_id=str(conv_id))
-                return {"type": "error", "message": "AI 服务暂时不可用，请稍后重试。"}
-
-        # 6. Output safety check
-        output_safety = self.safety_filter.check_output(assistant_content)
-        if not output_safety.is_safe:
-            assistant_content = "抱歉，我无法生成合适的回答，请换个话题吧。"
-
-        # 7. Save assistant message
-        await self._save_message(conv_id, MessageRole.ASSISTANT, assistant_content)
-
         return {
             "type": "message",
             "content": assistant_content,
@@ -246,16 +501,22 @@ class ChatService:
         content: str,
         content_type: ContentType = ContentType.TEXT,
     ) -> AsyncGenerator[tuple[str, dict], None]:
-        """Streaming message processing with intent → RAG → LLM stream."""
+        """Streaming message processing with intent → route → agent stream → RAG."""
         conv = await self.get_conversation(conv_id, user_id)
         if not conv:
             yield "error", {"message": "Conversation not found"}
             return
 
+        executor = StagedExecutor(PRE_LLM_DEADLINE_SECONDS)
+        turn = self.services.turn_scope(content, persona_loader=lambda: self._load_persona(conv))
+
         # 1. Content safety pre-check
-        safety_result = self.safety_filter.check(content)
+        with executor.timed("safety"):
+            safety_result = turn.safety()
         if safety_result.is_crisis:
-            await self._save_message(conv_id, MessageRole.USER, content, content_type, is_flagged=True)
+            await self._persist_turn(
+                conv_id, self._new_message(conv_id, MessageRole.USER, content, content_type, is_flagged=True),
+            )
             yield "crisis_alert", {
                 "message": "我注意到你可能正在经历困难。请记住，你并不孤单。如果你需要帮助，请联系学校心理咨询师或拨打心理援助热线。"
             }
@@ -265,49 +526,84 @@ class ChatService:
             return
 
         # 2. Intent classification
-        intent = self.intent_classifier.classify(content)
+        with executor.timed("intent"):
+            intent = turn.intent()
 
-        # 3. Save user message
-        await self._save_message(
+        user_message = self._new_message(
             conv_id, MessageRole.USER, content, content_type,
             intent_label=intent.intent_label, intent_confidence=intent.confidence,
         )
 
-        # 4. RAG retrieval (best-effort)
-        rag_context = ""
-        try:
-            rag_context = await self.rag.retrieve(content)
-        except Exception:
-            await logger.awarning("chat.rag_retrieval_failed", conv_id=str(conv_id))
-
-        # 5. Build LLM context with RAG
-        history = await self._load_context_messages(conv_id)
-        user_input_with_rag = content
-        if rag_context:
-            user_input_with_rag = f"{rag_context}\n\n用户问题: {content}"
-        messages = self.prompt_manager.build_messages(conv.agent_type, history, user_input_with_rag)
-
-        # 6. Stream LLM response
-        yield "stream_start", {"intent": intent.intent_label, "confidence": intent.confidence}
-
-        full_response: list[str] = []
+        # The student's message is saved on every exit path (errors, cancellation, disconnect)
+        answered = False
         try:
-            async for chunk in self.llm.generate_stream(messages):
-                full_response.append(chunk)
-                yield "stream_chunk", {"content": chunk}
-        except Exception:
-            await logger.aexception("llm.stream_failed", conv_id=str(conv_id))
-            yield "error", {"message": "AI 服务暂时不可用，请稍后重试。"}
-            return
-
-        assistant_content = "".join(full_response)
-
-        # 7. Output safety check
-        output_safety = self.safety_filter.check_output(assistant_content)
-        if not output_safety.is_safe:
-            assistant_content = "抱歉，我无法生成合适的回答，请换个话题吧。"
-
-        # 8. Save assistant message
-        await self._save_message(conv_id, MessageRole.ASSISTANT, assistant_content)
+            # 3–4. Load history ∥ RAG retrieval
+            window, rag_context = await self._gather_turn_context(conv, content, turn, executor)
+            history = window.messages
+
+            # 5. Build agent context and route through orchestrator
+            agent_context = AgentContext(
+                user_id=str(user_id),
+                conversation_id=str(conv_id),
+                agent_type=conv.agent_type,
+                user_input=content,
+                history=history,
+                persona=await turn.persona(),
+                rag_context=rag_context or None,
+                turn=turn,
+            )
+
+            agent = self.registry.get_agent(intent.agent_type or conv.agent_type)
+
+            if agent:
+                # Stream through the orchestrator so the specialized agent shapes the reply
+                chunks = self.orchestrator.process_stream(agent_context).chunks
+            else:
+                # Fallback: direct LLM stream
+                user_input_with_rag = content
+                if rag_context:
+                    user_input_with_rag = f"{rag_context}\n\n用户问题: {content}"
+                messages = self.prompt_manager.build_messages(
+                    conv.agent_type, history, user_input_with_rag, persona=agent_context.persona,
+                )
+                chunks = self.llm.generate_stream(messages)
+
+            # 6. Stream response
+            yield "stream_start", {"intent": intent.intent_label, "confidence": intent.confidence}
+
+            full_response: list[str] = []
+            stream_started = time.perf_counter()
+            try:
+                async for chunk in chunks:
+                    if not full_response:
+                        executor.timings["first_chunk"] = round((time.perf_counter() - stream_started) * 1000, 2)
+                    full_response.append(chunk)
+                    yield "stream_chunk", {"content": chunk}
+            except Exception:
+                await logger.aexception("llm.stream_failed", conv_id=str(conv_id))
+                yield "error", {"message": "AI 服务暂时不可用，请稍后重试。"}
+                return
+
+            assistant_content = "".join(full_response)
+
+            # 7. Output safety check
+            output_safety = self.safety_filter.check_output(assistant_content)
+            if not output_safety.is_safe:
+                assistant_content = "抱歉，我无法生成合适的回答，请换个话题吧。"
+
+            # 8. Persist the turn (user + assistant) in one batch
+            await self._persist_turn(
+                conv_id, user_message, self._new_message(conv_id, MessageRole.ASSISTANT, assistant_content),
+            )
+            answered = True
+        finally:
+            if not answered:
+                await self._persist_unanswered(conv_id, user_message)
+
+        self._schedule_context_fold(conv, window)
+        await logger.ainfo(
+            "chat.turn_timings", conv_id=str(conv_id), stages=executor.timings, total_ms=executor.total_ms,
+            memo_hits=turn.hits,
+        )
 
         yield "stream_end", {"token_count": len(assistant_content)}
@@ -0,0 +1,187 @@
+"""Token-budgeted conversation context with a rolling summary.
+
+Recent turns are packed newest-first into a per-agent token budget. Turns
+that no longer fit are folded into an incrementally maintained summary kept
+in ``Conversation.context_snapshot``, so the prompt stays bounded no matter
+how long (or how verbose) the conversation gets.
+
+Snapshot layout::
+
+    {"summary": str, "summary_tokens": int, "summarized_until": ISO-8601 timestamp}
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import structlog
+
+from app.models.conversation import AgentType
+from app.services.llm_client import LLMClient
+
+logger = structlog.get_logger()
+
+# Per-agent history budgets (tokens, excluding system prompt and current input)
+CONTEXT_TOKEN_BUDGETS: dict[AgentType, int] = {
+    AgentType.ACADEMIC: 2500,
+    AgentType.CLASSROOM: 3000,
+    AgentType.EMOTIONAL: 2000,
+    AgentType.HEALTH: 1200,
+    AgentType.CREATIVE: 3000,
+    AgentType.CAREER: 2000,
+}
+DEFAULT_CONTEXT_BUDGET = 2000
+
+# After folding, recent turns shrink to this share of the budget so the
+# summary is not regenerated on every subsequent turn
+LOW_WATER_RATIO = 0.6
+
+# Role/format markers added per chat message by the model template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_MAX_TOKENS = 400
+# Per-turn cap when feeding overflowed turns to the summarizer
+SUMMARY_TURN_MAX_CHARS = 800
+
+SUMMARY_PROMPT = (
+    "你是对话摘要助手。请将【已有摘要】与【新增对话】合并为一段简洁的中文摘要，"
+    "保留学生提出的问题、已得出的关键结论、学生的情绪状态和尚未解决的事项。"
+    "只输出摘要正文，不超过300字。"
+)
+
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: ~1 token per CJK character, ~4 chars per token otherwise."""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4) + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass
+class ContextTurn:
+    """One stored message as seen by the context builder (chronological order)."""
+
+    role: str
+    content: str
+    created_at: datetime
+    tokens: int
+
+    def to_cache(self) -> dict:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "created_at": self.created_at.isoformat(),
+            "tokens": self.tokens,
+        }
+
+    @classmethod
+    def from_cache(cls, raw: dict) -> "ContextTurn":
+        return cls(
+            role=raw["role"],
+            content=raw["content"],
+            created_at=datetime.fromisoformat(raw["created_at"]),
+            tokens=raw["tokens"],
+        )
+
+
+@dataclass
+class ContextWindow:
+    """History ready for prompt injection, plus turns awaiting summarization."""
+
+    messages: list[dict[str, str]]
+    tokens: int
+    overflow: list[ContextTurn] = field(default_factory=list)
+
+
+def summarized_until(snapshot: dict | None) -> datetime | None:
+    raw = (snapshot or {}).get("summarized_until")
+    return datetime.fromisoformat(raw) if raw else None
+
+
+class ContextBuilder:
+    """Pack history into a token budget and maintain the rolling summary."""
+
+    def __init__(self, llm: LLMClient | None = None) -> None:
+        self._llm = llm or LLMClient()
+
+    @staticmethod
+    def budget_for(agent_type: AgentType) -> int:
+        return CONTEXT_TOKEN_BUDGETS.get(agent_type, DEFAULT_CONTEXT_BUDGET)
+
+    def build(self, turns: list[ContextTurn], snapshot: dict | None, budget: int) -> ContextWindow:
+        """Select the newest turns that fit in ``budget`` (after the summary).
+
+        ``turns`` must be chronological and newer than the summary cursor.
+        """
+        snapshot = snapshot or {}
+        summary = snapshot.get("summary") or ""
+        summary_tokens = snapshot.get("summary_tokens", estimate_tokens(summary)) if summary else 0
+        remaining = max(budget - summary_tokens, 0)
+
+        window: list[dict[str, str]] = []
+        used = 0
+        fits_low_water = len(turns)
+        low_water = int(remaining * LOW_WATER_RATIO)
+        for i in range(len(turns) - 1, -1, -1):
+            turn = turns[i]
+            if used + turn.tokens > remaining:
+                if not window:
+                    # A single oversized message (pasted essay): keep its head
+                    window.append({"role": turn.role, "content": self._truncate(turn.content, remaining)})
+                    used = remaining
+                break
+            used += turn.tokens
+            window.append({"role": turn.role, "content": turn.content})
+            if used <= low_water:
+                fits_low_water = i
+        window.reverse()
+
+        overflow: list[ContextTurn] = []
+        if turns and (len(window) < len(turns) or used >= remaining):
+            # Budget exhausted: fold everything older than the low-water window
+            # (always keeping the newest turn verbatim)
+            overflow = turns[:min(fits_low_water, len(turns) - 1)]
+
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": f"[此前对话摘要]\n{summary}"})
+        messages.extend(window)
+        return ContextWindow(messages=messages, tokens=used + summary_tokens, overflow=overflow)
+
+    @staticmethod
+    def _truncate(content: str, budget_tokens: int) -> str:
+        # CJK-dominant text is ~1 char per token; leave room for the marker
+        keep = max(budget_tokens - MESSAGE_OVERHEAD_TOKENS - 8, 0)
+        return content[:keep] + "…(内容过长，已截断)"
+
+    async def fold_overflow(self, snapshot: dict | None, overflow: list[ContextTurn]) -> dict | None:
+        """Merge overflowed turns into the summary; returns the new snapshot (None on failure)."""
+        if not overflow:
+            return None
+        snapshot = dict(snapshot or {})
+        transcript = "\n".join(
+            f"{'学生' if t.role == 'user' else '学伴'}: {t.content[:SUMMARY_TURN_MAX_CHARS]}" for t in overflow
+        )
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {
+                "role": "user",
+                "content": f"【已有摘要】\n{snapshot.get('summary') or '（无）'}\n\n【新增对话】\n{transcript}",
+            },
+        ]
+        try:
+            result = await self._llm.generate(messages, temperature=0.3, max_tokens=SUMMARY_MAX_TOKENS)
+        except Exception:
+            await logger.awarning("context.summary_failed", turns=len(overflow))
+            return None
+
+        summary = result["content"].strip()
+        snapshot.update(
+            summary=summary,
+            summary_tokens=estimate_tokens(summary),
+            summarized_until=overflow[-1].created_at.isoformat(),
+        )
+        await logger.ainfo("context.summary_folded", turns=len(overflow), summary_tokens=snapshot["summary_tokens"])
+        return snapshot
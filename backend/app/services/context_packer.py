@@ -0,0 +1,159 @@
+"""Token-aware packing of retrieved chunks into the RAG context block.
+
+Retrieved chunks overlap heavily — ``DocumentChunker`` shares 64 chars
+between neighbours, and vector and lexical stages often return the same
+passage twice — and the old pipeline concatenated them all. The packer:
+
+1. drops chunks whose text is already in the recent conversation history
+   (shingle containment),
+2. suppresses near-duplicates (MinHash-estimated Jaccard over character
+   shingles),
+3. orders the rest by maximal marginal relevance, trading relevance against
+   similarity to what is already packed,
+4. fills a token budget instead of a fixed ``top_k``.
+"""
+
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.services.context_builder import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+SHINGLE_CHARS = 3
+NUM_PERM = 64
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_CHARS) -> set[int]:
+    """Hashed character shingles of ``text`` with whitespace removed (stable across processes)."""
+    compact = "".join(text.split())
+    if len(compact) <= size:
+        return {zlib.crc32(compact.encode())} if compact else set()
+    return {zlib.crc32(compact[i : i + size].encode()) for i in range(len(compact) - size + 1)}
+
+
+def minhash(shingle_set: set[int]) -> np.ndarray:
+    """``NUM_PERM``-wide MinHash signature (all-max for an empty set)."""
+    if not shingle_set:
+        return np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    x = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set)) % _PRIME
+    # (a·x + b) mod p per permutation; a, x < 2³¹ keeps a·x inside uint64
+    hashed = (np.outer(_PERM_A, x) + _PERM_B[:, None]) % _PRIME
+    return hashed.min(axis=1)
+
+
+def line_tokens(text: str) -> int:
+    """Tokens a line adds inside an already-open message."""
+    return estimate_tokens(text) - MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass
+class PackStats:
+    candidates: int = 0
+    packed: int = 0
+    tokens: int = 0
+    skipped_history: int = 0
+    skipped_duplicate: int = 0
+    skipped_budget: int = 0
+
+
+@dataclass
+class PackedContext:
+    hits: list[dict] = field(default_factory=list)
+    stats: PackStats = field(default_factory=PackStats)
+
+
+class ContextPacker:
+    """Select retrieved chunks for a token budget.
+
+    Args:
+        duplicate_threshold: Estimated Jaccard at or above which a chunk is a near-duplicate of a packed one.
+        history_threshold: Share of a chunk's shingles already in history at which it is skipped.
+        mmr_lambda: Relevance weight in MMR (1.0 = pure relevance order).
+    """
+
+    def __init__(
+        self,
+        *,
+        duplicate_threshold: float = 0.7,
+        history_threshold: float = 0.6,
+        mmr_lambda: float = 0.7,
+    ) -> None:
+        self.duplicate_threshold = duplicate_threshold
+        self.history_threshold = history_threshold
+        self.mmr_lambda = mmr_lambda
+
+    @staticmethod
+    def _relevance(hits: list[dict]) -> np.ndarray:
+        # Engines score on different scales; min-max normalize, or fall back to rank order
+        raw = np.asarray([h.get("rerank_score", h.get("score")) or 0.0 for h in hits], dtype=np.float64)
+        span = raw.max() - raw.min() if len(raw) else 0.0
+        if span > 0:
+            return (raw - raw.min()) / span
+        return 1.0 / (1.0 + np.arange(len(hits)))
+
+    def pack(
+        self,
+        hits: list[dict],
+        budget: int,
+        *,
+        history: list[str] | None = None,
+        line_cost: Callable[[dict], int] | None = None,
+    ) -> PackedContext:
+        """Pick chunks from ``hits`` (best first) whose rendered lines fit in ``budget`` tokens.
+
+        Args:
+            hits: Retrieved chunks in relevance order (``content`` required).
+            budget: Token budget for the chunk lines.
+            history: Recent conversation messages; chunks already quoted there are skipped.
+            line_cost: Tokens a hit costs once rendered (defaults to its content).
+        """
+        stats = PackStats(candidates=len(hits))
+        cost_of = line_cost or (lambda hit: line_tokens(hit.get("content") or ""))
+
+        history_shingles: set[int] = set()
+        for message in history or ():
+            history_shingles |= shingles(message)
+
+        candidates: list[int] = []
+        chunk_shingles = [shingles(h.get("content") or "") for h in hits]
+        for i, sh in enumerate(chunk_shingles):
+            if history_shingles and sh and len(sh & history_shingles) / len(sh) >= self.history_threshold:
+                stats.skipped_history += 1
+                continue
+            candidates.append(i)
+        if not candidates:
+            return PackedContext(stats=stats)
+
+        signatures = np.stack([minhash(chunk_shingles[i]) for i in candidates])
+        # Pairwise Jaccard estimates between the remaining candidates
+        similarity = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+        relevance = self._relevance([hits[i] for i in candidates])
+        costs = [cost_of(hits[i]) for i in candidates]
+
+        selected: list[int] = []
+        remaining = set(range(len(candidates)))
+        used = 0
+        max_sim = np.zeros(len(candidates))
+        while remaining:
+            mmr = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * max_sim
+            best = max(sorted(remaining), key=lambda j: mmr[j])
+            remaining.discard(best)
+            if selected and max_sim[best] >= self.duplicate_threshold:
+                stats.skipped_duplicate += 1
+                continue
+            if used + costs[best] > budget:
+                stats.skipped_budget += 1
+                continue
+            selected.append(best)
+            used += costs[best]
+            max_sim = np.maximum(max_sim, similarity[best])
+
+        stats.packed = len(selected)
+        stats.tokens = used
+        return PackedContext(hits=[hits[candidates[j]] for j in selected], stats=stats)
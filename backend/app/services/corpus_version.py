@@ -0,0 +1,40 @@
+"""Knowledge-corpus version stamp shared by the retrieval caches.
+
+Corpus imports bump a Redis counter; the RAG result cache keys on it and
+the in-memory graph snapshot rebuilds when it moves, so every API worker
+picks up a re-import without a restart.
+"""
+
+import time
+
+import structlog
+
+from app.services.cache import CacheService, get_cache_service
+
+logger = structlog.get_logger()
+
+# Corpus version is re-read from Redis at most this often per process
+_VERSION_REFRESH_SECONDS = 5.0
+_corpus_version: tuple[str, float] | None = None
+
+
+async def current_corpus_version(cache: CacheService) -> str:
+    """Corpus version stamp, memoized briefly so retrievals don't each pay a Redis round-trip."""
+    global _corpus_version
+    now = time.monotonic()
+    if _corpus_version is None or now - _corpus_version[1] > _VERSION_REFRESH_SECONDS:
+        _corpus_version = (await cache.get_corpus_version(), now)
+    return _corpus_version[0]
+
+
+async def bump_corpus_version() -> int | None:
+    """Invalidate cached retrievals after a corpus import (best-effort; None if Redis is down)."""
+    global _corpus_version
+    _corpus_version = None
+    try:
+        version = await get_cache_service().bump_corpus_version()
+    except Exception:
+        logger.warning("corpus_version.bump_failed")
+        return None
+    logger.info("corpus_version.bumped", version=version)
+    return version
@@ -3,6 +3,7 @@
 import structlog
 
 from app.services.llm_client import LLMClient
+from app.services.response_cache import CacheScope
 
 logger = structlog.get_logger()
 
@@ -61,7 +62,9 @@ class CreativeService:
         ]
 
         try:
-            result = await self._llm.generate(messages)
+            result = await self._llm.generate(
+                messages, cache=CacheScope("creative.story", query=f"{topic} {style or ''}"),
+            )
             return {"content": result["content"], "topic": topic, "style": style}
         except Exception:
             await logger.aexception("creative.generate_failed")
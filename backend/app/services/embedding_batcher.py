@@ -0,0 +1,114 @@
+"""Async micro-batching front for single-text embedding calls.
+
+Concurrent ``embed_single`` callers are gathered for a short window (or until
+a max batch fills) and sent as one ``/v1/embeddings`` request; each caller
+gets its own vector back. Under load this turns hundreds of batch-size-1
+calls into a few well-filled batches for the embedding server.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class _Item:
+    text: str
+    future: asyncio.Future[list[float]]
+    enqueued_at: float
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent single-text embeddings into batched requests.
+
+    Args:
+        send: Batched embedding call (texts → vectors, same order).
+        max_batch: Dispatch immediately once this many texts are queued.
+        max_wait: Seconds the first queued text waits for others to join.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[str]], Awaitable[list[list[float]]]],
+        *,
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+    ) -> None:
+        self._send = send
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: list[_Item] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task[None]] = set()
+        self.batches = 0
+        self.items = 0
+        self.deduplicated = 0
+        self.max_batch_seen = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    async def submit(self, text: str) -> list[float]:
+        """Queue one text and wait for its vector."""
+        loop = asyncio.get_running_loop()
+        item = _Item(text=text, future=loop.create_future(), enqueued_at=time.perf_counter())
+        self._pending.append(item)
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await item.future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch :]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._dispatch)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: list[_Item]) -> None:
+        now = time.perf_counter()
+        waits = [(now - item.enqueued_at) * 1000 for item in batch]
+        self.batches += 1
+        self.items += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.total_wait_ms += sum(waits)
+        self.max_wait_ms = max(self.max_wait_ms, max(waits))
+
+        # Identical texts in one batch are embedded once
+        unique = list(dict.fromkeys(item.text for item in batch))
+        self.deduplicated += len(batch) - len(unique)
+        try:
+            vectors = await self._send(unique)
+            by_text = dict(zip(unique, vectors, strict=True))
+        except Exception as exc:
+            logger.warning("embedding_batcher.batch_failed", size=len(batch))
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(by_text[item.text])
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "deduplicated": self.deduplicated,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "avg_queue_wait_ms": round(self.total_wait_ms / self.items, 3) if self.items else 0.0,
+            "max_queue_wait_ms": round(self.max_wait_ms, 3),
+            "queued": len(self._pending),
+        }
@@ -0,0 +1,117 @@
+"""Portable bundle of precomputed knowledge-chunk embeddings.
+
+Embedding the corpus is the slowest part of an import, and every environment
+(staging, each school's cluster, CI) would otherwise redo it for identical
+text. A bundle is embedded once and shipped; importers bulk-load it into
+Milvus or a local vector index without calling ``EmbeddingService``.
+
+A bundle directory holds:
+
+- ``embeddings.npy`` — float16 matrix (N × dim), memory-mappable
+- ``meta.json``      — columnar chunk metadata (id, content, subject, chapter, source), row-aligned
+- ``manifest.json``  — format, count, dim, dtype, embedding model tag and a
+  sha256 per file; written last, so a bundle without it is incomplete
+"""
+
+import hashlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+BUNDLE_FORMAT = 1
+BUNDLE_FIELDS = ("id", "content", "subject", "chapter", "source")
+_BUNDLE_FILES = ("embeddings.npy", "meta.json")
+_HASH_BLOCK = 1 << 20
+
+
+class BundleError(ValueError):
+    """A bundle is incomplete, corrupt, or incompatible with the target."""
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_bundle(directory: Path, vectors: np.ndarray, meta: dict[str, list], *, model: str) -> dict:
+    """Write a bundle for ``vectors`` (one row per chunk in ``meta``); returns the manifest."""
+    vectors = np.asarray(vectors)
+    count = len(vectors)
+    if vectors.ndim != 2:
+        raise BundleError("embeddings must be a 2-D matrix")
+    if any(len(meta.get(f, ())) != count for f in BUNDLE_FIELDS):
+        raise BundleError("metadata columns must match the number of embeddings")
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "manifest.json").unlink(missing_ok=True)
+
+    np.save(directory / "embeddings.npy", vectors.astype(np.float16))
+    (directory / "meta.json").write_text(
+        json.dumps({f: list(meta[f]) for f in BUNDLE_FIELDS}, ensure_ascii=False), encoding="utf-8",
+    )
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "count": count,
+        "dim": int(vectors.shape[1]) if count else 0,
+        "dtype": "float16",
+        "model": model,
+        "sha256": {name: file_sha256(directory / name) for name in _BUNDLE_FILES},
+    }
+    (directory / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+class EmbeddingBundle:
+    """Read side of a bundle directory.
+
+    Args:
+        directory: Bundle written by ``write_bundle``.
+        verify: Check file checksums against the manifest on open.
+    """
+
+    def __init__(self, directory: Path, *, verify: bool = True) -> None:
+        self.directory = directory
+        manifest_path = directory / "manifest.json"
+        if not manifest_path.exists():
+            raise BundleError(f"{directory} has no manifest.json (incomplete bundle?)")
+        self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if self.manifest.get("format") != BUNDLE_FORMAT:
+            raise BundleError(f"unsupported bundle format {self.manifest.get('format')!r}")
+        if verify:
+            for name, expected in self.manifest["sha256"].items():
+                if file_sha256(directory / name) != expected:
+                    raise BundleError(f"{name} checksum mismatch")
+        self.meta: dict[str, list] = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        self.vectors: np.ndarray = np.load(directory / "embeddings.npy", mmap_mode="r")
+        if self.vectors.shape != (self.count, self.dim) and self.count:
+            raise BundleError(f"embeddings shape {self.vectors.shape} does not match the manifest")
+
+    @property
+    def count(self) -> int:
+        return self.manifest["count"]
+
+    @property
+    def dim(self) -> int:
+        return self.manifest["dim"]
+
+    @property
+    def model(self) -> str:
+        return self.manifest["model"]
+
+    def check_compatible(self, *, model: str, dim: int | None = None) -> None:
+        """Raise ``BundleError`` unless the bundle was embedded with ``model`` (and ``dim``)."""
+        if self.model != model:
+            raise BundleError(f"bundle embedded with {self.model!r}, target expects {model!r}")
+        if dim is not None and self.count and self.dim != dim:
+            raise BundleError(f"bundle dim {self.dim}, target expects {dim}")
+
+    def batches(self, batch_size: int) -> Iterator[tuple[dict[str, list], np.ndarray]]:
+        """Row-aligned (metadata columns, float32 embeddings) slices of ``batch_size`` rows."""
+        for start in range(0, self.count, batch_size):
+            end = min(start + batch_size, self.count)
+            columns = {f: self.meta[f][start:end] for f in BUNDLE_FIELDS}
+            yield columns, np.asarray(self.vectors[start:end], dtype=np.float32)
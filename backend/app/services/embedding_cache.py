@@ -0,0 +1,231 @@
+"""Two-tier embedding cache keyed by (model, normalized text hash).
+
+Tier 1 is an in-process LRU bounded by bytes held; tier 2 is Redis or a local
+SQLite file holding vectors as raw little-endian float16/float32 blobs (a
+1024-d BGE vector is 2 KiB in float16 versus ~20 KiB as JSON). Repeated
+questions, preset prompts and corpus re-imports then skip the embedding
+server entirely.
+"""
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+import structlog
+
+from app.config.settings import get_settings
+from app.services.cache import TTL_VERY_LONG, CacheService, get_cache_service
+
+logger = structlog.get_logger()
+
+_WHITESPACE = re.compile(r"\s+")
+
+_NAMESPACE = "emb"
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Content hash of the NFKC-normalized, whitespace-collapsed text for ``model``."""
+    normalized = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+    return hashlib.sha256(f"{model}\0{normalized}".encode()).hexdigest()
+
+
+class EmbeddingStore(Protocol):
+    """Second-tier storage of encoded vectors."""
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]: ...
+
+    async def set_many(self, items: dict[str, bytes]) -> None: ...
+
+
+class RedisEmbeddingStore:
+    """Vectors as binary Redis strings (shared across workers and pods)."""
+
+    def __init__(self, cache: CacheService, *, dtype: str, ttl: int = TTL_VERY_LONG) -> None:
+        self._cache = cache
+        self._namespace = f"{_NAMESPACE}:{dtype}"
+        self._ttl = ttl
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return await self._cache.get_many_bytes(self._namespace, keys)
+
+    async def set_many(self, items: dict[str, bytes]) -> None:
+        await self._cache.set_many_bytes(self._namespace, items, ttl=self._ttl)
+
+
+class DiskEmbeddingStore:
+    """Vectors as BLOBs in a local SQLite file (survives restarts; handy for imports)."""
+
+    def __init__(self, path: Path, *, dtype: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._table = f"embeddings_{dtype}"
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self._table} (key TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+        self._lock = threading.Lock()
+
+    def _get_many(self, keys: list[str]) -> list[bytes | None]:
+        found: dict[str, bytes] = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM {self._table} WHERE key IN ({','.join('?' * len(chunk))})", chunk,
+                ).fetchall()
+                found.update(rows)
+        return [found.get(k) for k in keys]
+
+    def _set_many(self, items: dict[str, bytes]) -> None:
+        with self._lock:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?)", list(items.items()))
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set_many(self, items: dict[str, bytes]) -> None:
+        await asyncio.to_thread(self._set_many, items)
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0
+    store_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    store_errors: int = 0
+
+
+class EmbeddingCache:
+    """In-process LRU (bounded by bytes) in front of an optional binary store.
+
+    Args:
+        max_bytes: Memory cap for tier-1 vectors.
+        dtype: Storage precision, "float16" or "float32".
+        store: Optional tier-2 store (Redis or disk).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        dtype: str = "float16",
+        store: EmbeddingStore | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self._store = store
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self.bytes_held = 0
+        self.stats = EmbeddingCacheStats()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self.bytes_held -= old.nbytes
+        self._memory[key] = vector
+        self.bytes_held += vector.nbytes
+        while self.bytes_held > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self.bytes_held -= evicted.nbytes
+            self.stats.evictions += 1
+
+    def _decode(self, raw: bytes) -> np.ndarray:
+        return np.frombuffer(raw, dtype=self.dtype)
+
+    async def get_many(self, model: str, texts: list[str]) -> list[list[float] | None]:
+        """Cached vectors in input order (None for misses)."""
+        keys = [embedding_key(model, t) for t in texts]
+        found: list[np.ndarray | None] = [None] * len(keys)
+        remote: list[int] = []
+        for i, key in enumerate(keys):
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                found[i] = vector
+            else:
+                remote.append(i)
+
+        if remote and self._store is not None:
+            try:
+                blobs = await self._store.get_many([keys[i] for i in remote])
+            except Exception:
+                self.stats.store_errors += 1
+                logger.warning("embedding_cache.store_unavailable", op="get")
+                blobs = [None] * len(remote)
+            for i, blob in zip(remote, blobs, strict=True):
+                if blob is not None:
+                    vector = self._decode(blob)
+                    self._remember(keys[i], vector)
+                    self.stats.store_hits += 1
+                    found[i] = vector
+
+        self.stats.misses += sum(1 for v in found if v is None)
+        return [None if v is None else v.astype(np.float32).tolist() for v in found]
+
+    async def put_many(self, model: str, texts: list[str], vectors: list[list[float]]) -> list[list[float]]:
+        """Cache fresh vectors; returns them at cache precision, exactly as a later hit would."""
+        items: dict[str, bytes] = {}
+        stored: list[list[float]] = []
+        for text, vector in zip(texts, vectors, strict=True):
+            key = embedding_key(model, text)
+            encoded = np.asarray(vector, dtype=self.dtype)
+            self._remember(key, encoded)
+            items[key] = encoded.tobytes()
+            stored.append(encoded.astype(np.float32).tolist())
+        if items and self._store is not None:
+            try:
+                await self._store.set_many(items)
+            except Exception:
+                self.stats.store_errors += 1
+                logger.warning("embedding_cache.store_unavailable", op="set")
+        return stored
+
+    def snapshot(self) -> dict:
+        s = self.stats
+        lookups = s.memory_hits + s.store_hits + s.misses
+        return {
+            "entries": len(self._memory),
+            "bytes_held": self.bytes_held,
+            "max_bytes": self.max_bytes,
+            "dtype": self.dtype.name,
+            "memory_hits": s.memory_hits,
+            "store_hits": s.store_hits,
+            "misses": s.misses,
+            "evictions": s.evictions,
+            "store_errors": s.store_errors,
+            "hit_ratio": round((s.memory_hits + s.store_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Global singleton (None when disabled)
+_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    global _cache
+    settings = get_settings()
+    if not settings.embedding_cache_enabled:
+        return None
+    if _cache is None:
+        store: EmbeddingStore | None = None
+        if settings.embedding_cache_backend == "redis":
+            store = RedisEmbeddingStore(
+                get_cache_service(), dtype=settings.embedding_cache_dtype, ttl=settings.embedding_cache_ttl_seconds,
+            )
+        elif settings.embedding_cache_backend == "disk":
+            store = DiskEmbeddingStore(
+                Path(settings.embedding_cache_dir) / "embeddings.sqlite3", dtype=settings.embedding_cache_dtype,
+            )
+        _cache = EmbeddingCache(
+            max_bytes=settings.embedding_cache_max_bytes, dtype=settings.embedding_cache_dtype, store=store,
+        )
+    return _cache
@@ -4,10 +4,22 @@ import httpx
 import structlog
 
 from app.config.settings import get_settings
+from app.core.http_pool import get_upstream_pools
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import get_embedding_cache
+from app.services.single_flight import get_single_flight, request_key
 
 settings = get_settings()
 logger = structlog.get_logger()
 
+# Model the knowledge base is embedded with (and bundles are tagged with)
+DEFAULT_EMBEDDING_MODEL = "bge-large-zh"
+
+_EMBED_TIMEOUT = 30.0
+
+# Process-wide micro-batchers, one per (upstream, model)
+_batchers: dict[tuple[str, str], EmbeddingBatcher] = {}
+
 
 class EmbeddingService:
     """Client for the embedding microservice.
@@ -21,26 +33,77 @@ class EmbeddingService:
     def __init__(self, base_url: str | None = None):
         self.base_url = (base_url or settings.rag_service_url).rstrip("/")
 
-    async def embed(self, texts: list[str], model: str = "bge-large-zh") -> list[list[float]]:
-        """Get embeddings for a list of texts."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for this upstream."""
+        return get_upstream_pools().client(self.base_url)
+
+    async def embed(self, texts: list[str], model: str = DEFAULT_EMBEDDING_MODEL) -> list[list[float]]:
+        """Get embeddings for a list of texts (cached vectors are not re-embedded)."""
+        cache = get_embedding_cache()
+        if cache is None:
+            return await self._embed_remote(texts, model)
+
+        vectors = await cache.get_many(model, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = await self._embed_remote([texts[i] for i in missing], model)
+            # Misses come back at cache precision too, so a query embeds identically whether cached or not
+            fresh = await cache.put_many(model, [texts[i] for i in missing], fresh)
+            for i, vector in zip(missing, fresh, strict=True):
+                vectors[i] = vector
+        return vectors  # type: ignore[return-value]
+
+    async def _embed_remote(self, texts: list[str], model: str) -> list[list[float]]:
+        async def _post() -> list[list[float]]:
+            resp = await self._client.post(
                 f"{self.base_url}/v1/embeddings",
                 json={"model": model, "input": texts},
+                timeout=_EMBED_TIMEOUT,
             )
             resp.raise_for_status()
             result = resp.json()
-        return [item["embedding"] for item in sorted(result["data"], key=lambda x: x["index"])]
+            return [item["embedding"] for item in sorted(result["data"], key=lambda x: x["index"])]
 
-    async def embed_single(self, text: str, model: str = "bge-large-zh") -> list[float]:
-        """Get embedding for a single text."""
-        embeddings = await self.embed([text], model)
-        return embeddings[0]
+        # Identical concurrent requests share one upstream call
+        flight = get_single_flight("embedding", timeout=_EMBED_TIMEOUT)
+        return await flight.do(request_key(self.base_url, model, texts), _post)
+
+    async def embed_single(self, text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> list[float]:
+        """Get embedding for a single text (micro-batched with concurrent callers)."""
+        if not settings.embedding_batch_enabled:
+            embeddings = await self.embed([text], model)
+            return embeddings[0]
+
+        cache = get_embedding_cache()
+        if cache is not None:
+            (cached,) = await cache.get_many(model, [text])
+            if cached is not None:
+                return cached
+        vector = await self._batcher(model).submit(text)
+        if cache is not None:
+            (vector,) = await cache.put_many(model, [text], [vector])
+        return vector
+
+    def _batcher(self, model: str) -> EmbeddingBatcher:
+        key = (self.base_url, model)
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = EmbeddingBatcher(
+                lambda texts: self._embed_remote(texts, model),
+                max_batch=settings.embedding_batch_max_size,
+                max_wait=settings.embedding_batch_max_wait_ms / 1000,
+            )
+            _batchers[key] = batcher
+        return batcher
 
     async def health_check(self) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"{self.base_url}/health")
-                return resp.status_code == 200
+            resp = await self._client.get(f"{self.base_url}/health", timeout=5.0)
+            return resp.status_code == 200
         except httpx.HTTPError:
             return False
+
+
+def embedding_batch_stats() -> dict[str, dict]:
+    return {f"{base_url}#{model}": b.stats() for (base_url, model), b in _batchers.items()}
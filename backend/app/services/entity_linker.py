@@ -0,0 +1,116 @@
+"""Knowledge-point entity linking with an Aho-Corasick automaton.
+
+Every knowledge-point name and alias is compiled into one multi-pattern
+automaton; a query is scanned once, left to right, and every mention is
+reported regardless of how many patterns exist. Overlapping mentions are
+resolved longest-first ("函数的单调性" wins over "单调性"), and the surviving
+matches map to graph node ids for expansion.
+"""
+
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+
+_MIN_ALIAS_CHARS = 2
+# "X的Y" also yields "Y" when it is specific enough ("单调性", not "应用")
+_MIN_SUFFIX_CHARS = 3
+_ALIAS_SPLIT = re.compile(r"——|—|：|:")
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def derive_aliases(name: str) -> set[str]:
+    """Surface forms students actually type for a curated knowledge-point name.
+
+    "函数的单调性" → {"函数的单调性", "单调性"}; "导数的应用——单调性与极值" →
+    {"导数的应用——单调性与极值", "导数的应用", "单调性与极值"}.
+    """
+    aliases = {name}
+    parts = [p for p in _ALIAS_SPLIT.split(name) if p]
+    aliases.update(parts)
+    for part in parts:
+        suffix = part.rsplit("的", 1)[1] if "的" in part else ""
+        if len(suffix) >= _MIN_SUFFIX_CHARS:
+            aliases.add(suffix)
+    return {a.strip() for a in aliases if len(a.strip()) >= _MIN_ALIAS_CHARS}
+
+
+@dataclass(frozen=True)
+class Mention:
+    start: int
+    end: int  # exclusive
+    node: int
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over characters.
+
+    Args:
+        patterns: Pattern text → node ids it refers to (an alias may name several nodes).
+    """
+
+    def __init__(self, patterns: dict[str, set[int]]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Per state: (pattern length, node ids) for every pattern ending here, via fail links too
+        self._out: list[list[tuple[int, tuple[int, ...]]]] = [[]]
+        for pattern, nodes in patterns.items():
+            text = normalize(pattern)
+            if text:
+                self._add(text, tuple(sorted(nodes)))
+        self._link()
+        self.pattern_count = len(patterns)
+
+    def _add(self, text: str, nodes: tuple[int, ...]) -> None:
+        state = 0
+        for ch in text:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(text), nodes))
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> list[Mention]:
+        """Every (possibly overlapping) mention in one pass."""
+        mentions: list[Mention] = []
+        state = 0
+        for i, ch in enumerate(normalize(text)):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, nodes in self._out[state]:
+                mentions.extend(Mention(i + 1 - length, i + 1, node) for node in nodes)
+        return mentions
+
+    def link(self, text: str) -> list[int]:
+        """Node ids mentioned in ``text``: longest non-overlapping mentions, in reading order."""
+        taken: list[tuple[int, int]] = []
+        linked: list[tuple[int, int]] = []
+        seen: set[int] = set()
+        for m in sorted(self.find_all(text), key=lambda m: (m.start - m.end, m.start)):
+            if any(m.start < end and start < m.end for start, end in taken if (start, end) != (m.start, m.end)):
+                continue
+            taken.append((m.start, m.end))
+            if m.node not in seen:
+                seen.add(m.node)
+                linked.append((m.start, m.node))
+        return [node for _, node in sorted(linked)]
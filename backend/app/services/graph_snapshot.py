@@ -0,0 +1,278 @@
+"""In-memory snapshot of the knowledge graph for hop queries.
+
+The subject → chapter → knowledge-point graph is small and changes only on
+corpus import, so instead of a variable-length Cypher traversal per request
+the API keeps a compact copy: knowledge-point names are interned to dense
+ids and PREREQUISITE / RELATED_TO edges are held as CSR arrays (``indptr``
++ ``indices``). k-hop, prerequisite and chapter queries are then pure
+in-process lookups taking microseconds. The snapshot also compiles every
+knowledge-point name and alias into an Aho-Corasick automaton, so a query's
+mentions are linked to node ids in one pass before expansion.
+
+The snapshot is rebuilt from Neo4j when the corpus version (bumped by the
+import scripts) moves; Neo4j stays the system of record and the write path.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import numpy as np
+import structlog
+
+from app.services.entity_linker import AhoCorasick, derive_aliases
+
+logger = structlog.get_logger()
+
+# Seconds before retrying a snapshot build after Neo4j was unreachable
+SNAPSHOT_RETRY_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class CSR:
+    """Compressed sparse rows: neighbours of node ``i`` are ``indices[indptr[i]:indptr[i + 1]]``."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @classmethod
+    def from_edges(cls, n: int, src: list[int], dst: list[int]) -> "CSR":
+        src_arr = np.asarray(src, dtype=np.int32)
+        dst_arr = np.asarray(dst, dtype=np.int32)
+        order = np.lexsort((dst_arr, src_arr))
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src_arr, minlength=n), out=indptr[1:])
+        return cls(indptr=indptr, indices=dst_arr[order])
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+
+class GraphSnapshot:
+    """Immutable, interned copy of the knowledge-point graph.
+
+    Args:
+        points: Rows with name, description, difficulty, importance and optional aliases.
+        chapters: Rows with subject, chapter, name (CONTAINS membership).
+        edges: Rows with src, rel ("PREREQUISITE" | "RELATED_TO"), dst.
+        version: Corpus version the snapshot was built at.
+    """
+
+    def __init__(
+        self,
+        points: list[dict],
+        chapters: list[dict],
+        edges: list[dict],
+        *,
+        version: str = "0",
+    ) -> None:
+        self.version = version
+        self.built_at = time.time()
+        self._ids: dict[str, int] = {}
+        self._points: list[dict] = []
+        for row in points:
+            self._intern(row["name"], row)
+        for row in chapters:
+            self._intern(row["name"])
+        for row in edges:
+            self._intern(row["src"])
+            self._intern(row["dst"])
+        n = len(self._points)
+
+        prereq_src: list[int] = []
+        prereq_dst: list[int] = []
+        any_src: list[int] = []
+        any_dst: list[int] = []
+        for row in edges:
+            a, b = self._ids[row["src"]], self._ids[row["dst"]]
+            if row["rel"] == "PREREQUISITE":
+                prereq_src.append(a)
+                prereq_dst.append(b)
+            # The hop query ignores direction, so store both
+            any_src += [a, b]
+            any_dst += [b, a]
+        self.prerequisite = CSR.from_edges(n, prereq_src, prereq_dst)
+        self.linked = CSR.from_edges(n, any_src, any_dst)
+        self.edge_count = len(edges)
+
+        patterns: dict[str, set[int]] = {}
+        for node, point in enumerate(self._points):
+            for alias in derive_aliases(point["name"]) | set(point["aliases"]):
+                patterns.setdefault(alias, set()).add(node)
+        self.linker = AhoCorasick(patterns)
+
+        members: dict[tuple[str, str], list[int]] = {}
+        for row in chapters:
+            members.setdefault((row["subject"], row["chapter"]), []).append(self._ids[row["name"]])
+        self._chapters = {
+            key: sorted(set(ids), key=lambda i: -(self._points[i]["importance"] or 0)) for key, ids in members.items()
+        }
+
+    def _intern(self, name: str, row: dict | None = None) -> int:
+        node = self._ids.get(name)
+        if node is None:
+            node = len(self._points)
+            self._ids[name] = node
+            self._points.append(
+                {"name": name, "description": None, "difficulty": None, "importance": None, "aliases": []},
+            )
+        if row is not None:
+            self._points[node].update({k: row.get(k) for k in ("description", "difficulty", "importance")})
+            self._points[node]["aliases"] = list(row.get("aliases") or [])
+        return node
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def _brief(self, node: int) -> dict:
+        point = self._points[node]
+        return {"name": point["name"], "description": point["description"], "difficulty": point["difficulty"]}
+
+    def _bfs(self, seeds: list[int], depth: int, limit: int) -> list[int]:
+        """Nodes within ``depth`` hops of ``seeds`` (either direction), nearest first, seeds excluded."""
+        if limit <= 0:
+            return []
+        seen = set(seeds)
+        frontier = list(seeds)
+        found: list[int] = []
+        for _ in range(depth):
+            next_frontier: list[int] = []
+            for node in frontier:
+                for neighbor in self.linked.neighbors(node).tolist():
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        next_frontier.append(neighbor)
+                        found.append(neighbor)
+                        if len(found) >= limit:
+                            return found
+            frontier = next_frontier
+        return found
+
+    def related(self, name: str, depth: int = 2, limit: int = 10) -> list[dict]:
+        """Knowledge points within ``depth`` RELATED_TO/PREREQUISITE hops (either direction), nearest first."""
+        start = self._ids.get(name)
+        if start is None:
+            return []
+        return [self._brief(i) for i in self._bfs([start], depth, limit)]
+
+    def link(self, text: str) -> list[int]:
+        """Node ids of the knowledge points mentioned in ``text`` (reading order)."""
+        return self.linker.link(text)
+
+    def expand(self, nodes: list[int], depth: int = 1, limit: int = 10) -> list[dict]:
+        """The linked points themselves, then their graph neighbourhood, up to ``limit``."""
+        seeds = nodes[:limit]
+        return [self._brief(i) for i in seeds + self._bfs(seeds, depth, limit - len(seeds))] if seeds else []
+
+    def prerequisites(self, name: str) -> list[dict]:
+        """Direct PREREQUISITE targets of a knowledge point."""
+        node = self._ids.get(name)
+        if node is None:
+            return []
+        return [self._brief(i) for i in self.prerequisite.neighbors(node).tolist()]
+
+    def chapter_points(self, subject: str, chapter: str) -> list[dict]:
+        """Knowledge points a chapter CONTAINS, most important first."""
+        return [
+            {k: self._points[i][k] for k in ("name", "description", "difficulty", "importance")}
+            for i in self._chapters.get((subject, chapter), [])
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "nodes": len(self._points),
+            "edges": self.edge_count,
+            "chapters": len(self._chapters),
+            "patterns": self.linker.pattern_count,
+            "age_s": round(time.time() - self.built_at, 1),
+        }
+
+
+class GraphSnapshotHolder:
+    """Serve the current snapshot, rebuilding it when the corpus version moves.
+
+    Args:
+        fetch: Loads the graph rows (``KnowledgeGraphClient.fetch_graph``).
+        version: Returns the current corpus version.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[dict[str, list[dict]]]],
+        version: Callable[[], Awaitable[str]],
+    ) -> None:
+        self._fetch = fetch
+        self._version = version
+        self._snapshot: GraphSnapshot | None = None
+        self._lock = asyncio.Lock()
+        self._failed_at: float | None = None
+        self.builds = 0
+        self.build_ms = 0.0
+
+    async def _current_version(self) -> str:
+        try:
+            return await self._version()
+        except Exception:
+            # Without Redis keep serving whatever was built last
+            return self._snapshot.version if self._snapshot is not None else "0"
+
+    async def get(self) -> GraphSnapshot | None:
+        """Current snapshot (built or refreshed as needed); None while Neo4j is unavailable."""
+        version = await self._current_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        if self._failed_at is not None and time.monotonic() - self._failed_at < SNAPSHOT_RETRY_SECONDS:
+            return snapshot
+        async with self._lock:
+            if self._snapshot is not None and self._snapshot.version == version:
+                return self._snapshot
+            return await self._build(version)
+
+    async def _build(self, version: str) -> GraphSnapshot | None:
+        started = time.perf_counter()
+        try:
+            rows = await self._fetch()
+        except Exception:
+            self._failed_at = time.monotonic()
+            logger.warning("graph_snapshot.build_failed", version=version)
+            return self._snapshot
+        snapshot = GraphSnapshot(rows["points"], rows["chapters"], rows["edges"], version=version)
+        self._snapshot = snapshot
+        self._failed_at = None
+        self.builds += 1
+        self.build_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("graph_snapshot.built", ms=self.build_ms, **snapshot.stats())
+        return snapshot
+
+    def stats(self) -> dict | None:
+        if self._snapshot is None:
+            return None
+        return {**self._snapshot.stats(), "builds": self.builds, "build_ms": self.build_ms}
+
+
+# Global singleton
+_holder: GraphSnapshotHolder | None = None
+
+
+def get_graph_snapshots() -> GraphSnapshotHolder:
+    global _holder
+    if _holder is None:
+        from app.services.cache import get_cache_service
+        from app.services.corpus_version import current_corpus_version
+        from app.services.neo4j_client import get_knowledge_graph_client
+
+        _holder = GraphSnapshotHolder(
+            lambda: get_knowledge_graph_client().fetch_graph(),
+            lambda: current_corpus_version(get_cache_service()),
+        )
+    return _holder
+
+
+def graph_snapshot_stats() -> dict | None:
+    return _holder.stats() if _holder is not None else None
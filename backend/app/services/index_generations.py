@@ -0,0 +1,90 @@
+"""Atomic publication of memory-mapped index directories.
+
+API workers open the ``.npy`` files of an index with ``mmap_mode="r"``, so
+rewriting them in place during a re-import can SIGBUS a worker or hand it a
+torn read. Writers instead build every generation in a fresh directory and
+publish it by atomically swapping a symlink at the configured path:
+
+    <path>                  → symlink to .<name>.generations/<generation>
+    .<name>.generations/    — the current generation plus the previous one
+
+Workers that already mapped the old generation keep reading it; the next
+``resolve_generation`` sees the new one.
+"""
+
+import os
+import shutil
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Generations kept on disk: the published one plus the one workers may still be opening
+KEEP_GENERATIONS = 2
+# Attempts to open a generation that concurrent publishes keep pruning
+OPEN_ATTEMPTS = 3
+
+
+def _generations_dir(path: Path) -> Path:
+    return path.parent / f".{path.name}.generations"
+
+
+def resolve_generation(path: Path) -> Path:
+    """The generation directory currently published at ``path`` (``path`` itself in the legacy layout)."""
+    return path.resolve()
+
+
+def open_pinned(path: Path, generation: Path, opener: Callable[[Path], None]) -> Path:
+    """Run ``opener`` on ``generation``; returns the generation it succeeded on.
+
+    Publishes may prune the generation between ``resolve_generation`` and
+    the open. Such a ``FileNotFoundError`` re-resolves ``path`` and retries.
+    Files already opened stay readable after their directory is removed.
+    """
+    attempt = 1
+    while True:
+        try:
+            opener(generation)
+            return generation
+        except FileNotFoundError:
+            if attempt == OPEN_ATTEMPTS:
+                raise
+            logger.info("index.generation_pruned", path=str(path), generation=generation.name)
+            generation = resolve_generation(path)
+            attempt += 1
+
+
+def staging_dir(path: Path) -> Path:
+    """New, empty generation directory to build the next version of ``path`` in."""
+    generations = _generations_dir(path)
+    generations.mkdir(parents=True, exist_ok=True)
+    staged = generations / f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    staged.mkdir()
+    return staged
+
+
+def publish(path: Path, staged: Path) -> None:
+    """Atomically point ``path`` at ``staged`` and prune generations nobody can be opening."""
+    if path.is_dir() and not path.is_symlink():
+        # Legacy layout (a plain directory): retire it as the oldest generation, once
+        if any(path.iterdir()):
+            os.rename(path, _generations_dir(path) / f"{0:020d}-legacy")
+        else:
+            path.rmdir()
+    link = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}.link"
+    os.symlink(os.path.relpath(staged, path.parent), link)
+    os.replace(link, path)
+    logger.info("index.published", path=str(path), generation=staged.name)
+
+    older = sorted((g for g in _generations_dir(path).iterdir() if g != staged), reverse=True)
+    for stale in older[KEEP_GENERATIONS - 1 :]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def discard(staged: Path) -> None:
+    """Drop a generation whose build failed."""
+    shutil.rmtree(staged, ignore_errors=True)
@@ -0,0 +1,275 @@
+"""BM25 lexical index over knowledge-chunk content, on character bigrams.
+
+Dense BGE retrieval sometimes misses exact curriculum terms ("氧化还原",
+"等差数列"); a lexical stage catches them and is fused with the vector
+ranking in ``RAGPipeline``. Chinese has no whitespace, so documents are
+indexed as overlapping character bigrams of each word run (a lone character
+is kept as a unigram).
+
+The index is built at import time into a directory of flat arrays:
+
+- ``terms.npy``          — sorted unicode array of every term
+- ``term_offsets.npy``   — int64 start of each term's postings (plus the end)
+- ``postings.npy``       — int32 doc ids, grouped by term
+- ``tf.npy``             — uint16 term frequencies aligned with ``postings.npy``
+- ``doc_len.npy``        — int32 bigram count per doc
+- ``<field>.npy``        — UTF-8 bytes of one metadata column (id, content, subject, chapter, source)
+- ``<field>_offsets.npy`` — int64 start of each doc's value in ``<field>.npy`` (plus the end)
+- ``manifest.json``      — count, avgdl and BM25 parameters; written last
+
+At runtime every array, vocabulary and metadata included, is memory-mapped,
+so workers share one copy in the page cache. A query binary-searches its
+bigrams in ``terms.npy``, touches only their postings and scores them with
+one ``np.bincount``; hits decode just their own metadata. Each write
+builds a new generation and swaps it in atomically (see
+``index_generations``); ``get_lexical_index`` reopens when that happens.
+"""
+
+import asyncio
+import json
+import re
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+from app.config.settings import get_settings
+from app.services.index_generations import discard, open_pinned, publish, resolve_generation, staging_dir
+
+logger = structlog.get_logger()
+
+LEXICAL_FIELDS = ("id", "content", "subject", "chapter", "source")
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def char_bigrams(text: str) -> list[str]:
+    """Overlapping character bigrams of each word run (NFKC, lower-cased)."""
+    terms: list[str] = []
+    for run in _NON_WORD.split(unicodedata.normalize("NFKC", text).lower()):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def _save_strings(directory: Path, name: str, values: list[str]) -> None:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(directory / f"{name}.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(directory / f"{name}_offsets.npy", offsets)
+
+
+class _StringColumn:
+    """Memory-mapped column written by ``_save_strings``; rows are decoded on access."""
+
+    def __init__(self, directory: Path, name: str) -> None:
+        self._data = np.load(directory / f"{name}.npy", mmap_mode="r")
+        self._offsets = np.load(directory / f"{name}_offsets.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self._data[self._offsets[row] : self._offsets[row + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[row] for row in range(len(self)))
+
+
+def _read_meta(root: Path) -> dict[str, list]:
+    """Every metadata column of the generation at ``root``, decoded (for rebuilds)."""
+    if (root / "meta.json").exists():
+        return json.loads((root / "meta.json").read_text(encoding="utf-8"))
+    return {f: list(_StringColumn(root, f)) for f in LEXICAL_FIELDS}
+
+
+def write_lexical_index(
+    directory: Path,
+    meta: dict[str, list],
+    *,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> dict:
+    """Build the index for ``meta`` (one row per chunk) and publish it at ``directory``; returns the manifest."""
+    count = len(meta.get("id", ()))
+    if any(len(meta.get(f, ())) != count for f in LEXICAL_FIELDS):
+        raise ValueError("metadata columns must all have the same length")
+
+    postings: dict[str, list[tuple[int, int]]] = {}
+    doc_len = np.zeros(count, dtype=np.int32)
+    for doc, content in enumerate(meta["content"]):
+        counts = Counter(char_bigrams(content))
+        doc_len[doc] = sum(counts.values())
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc, tf))
+
+    terms = sorted(postings)
+    term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    docs: list[int] = []
+    tfs: list[int] = []
+    for i, term in enumerate(terms):
+        for doc, tf in postings[term]:
+            docs.append(doc)
+            tfs.append(min(tf, np.iinfo(np.uint16).max))
+        term_offsets[i + 1] = len(docs)
+
+    manifest = {
+        "count": count,
+        "terms": len(terms),
+        "avgdl": float(doc_len.mean()) if count else 0.0,
+        "k1": k1,
+        "b": b,
+    }
+    staged = staging_dir(directory)
+    try:
+        np.save(staged / "postings.npy", np.asarray(docs, dtype=np.int32))
+        np.save(staged / "tf.npy", np.asarray(tfs, dtype=np.uint16))
+        np.save(staged / "doc_len.npy", doc_len)
+        np.save(staged / "terms.npy", np.asarray(terms, dtype=str))
+        np.save(staged / "term_offsets.npy", term_offsets)
+        for f in LEXICAL_FIELDS:
+            _save_strings(staged, f, ["" if value is None else str(value) for value in meta[f]])
+        (staged / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    except BaseException:
+        discard(staged)
+        raise
+    publish(directory, staged)
+    return manifest
+
+
+def update_lexical_index(directory: Path, chunks: list[dict], *, removed: Iterable[str] = ()) -> dict:
+    """Upsert ``chunks`` (by id) into the index at ``directory``, drop ``removed`` ids, and rebuild it."""
+    rows: dict[str, dict] = {}
+    if (directory / "manifest.json").exists():
+        existing = _read_meta(resolve_generation(directory))
+        for i, chunk_id in enumerate(existing["id"]):
+            rows[chunk_id] = {f: existing[f][i] for f in LEXICAL_FIELDS}
+    for chunk_id in removed:
+        rows.pop(chunk_id, None)
+    for chunk in chunks:
+        rows[chunk["id"]] = {f: chunk.get(f) or "" for f in LEXICAL_FIELDS}
+    meta = {f: [row[f] for row in rows.values()] for f in LEXICAL_FIELDS}
+    return write_lexical_index(directory, meta)
+
+
+class LexicalIndex:
+    """Memory-mapped BM25 search over an index directory.
+
+    Args:
+        directory: Index written by ``write_lexical_index``.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        # Pin one generation so every file is read from the same build
+        self.generation = resolve_generation(directory)
+        self._opened = False
+        self._meta: dict[str, _StringColumn | list] = {}
+        self._subject_masks: dict[str, np.ndarray] = {}
+
+    def _open(self) -> None:
+        if self._opened:
+            return
+        self.generation = open_pinned(self.directory, self.generation, self._open_generation)
+        self._opened = True
+        logger.info("lexical_index.opened", path=str(self.generation), count=self.count, terms=len(self._terms))
+
+    def _open_generation(self, root: Path) -> None:
+        manifest = json.loads((root / "manifest.json").read_text(encoding="utf-8"))
+        if (root / "vocab.json").exists():
+            # Generations written before the vocabulary and metadata were stored as arrays
+            vocab: dict[str, list[int]] = json.loads((root / "vocab.json").read_text(encoding="utf-8"))
+            terms = sorted(vocab)
+            self._terms = np.asarray(terms, dtype=str)
+            # Postings were laid out in term order, so the offsets already ascend
+            total = sum(df for _, df in vocab.values())
+            self._term_offsets = np.asarray([vocab[t][0] for t in terms] + [total], dtype=np.int64)
+            self._meta = _read_meta(root)
+        else:
+            self._terms = np.load(root / "terms.npy", mmap_mode="r")
+            self._term_offsets = np.load(root / "term_offsets.npy", mmap_mode="r")
+            self._meta = {f: _StringColumn(root, f) for f in LEXICAL_FIELDS}
+        self._postings = np.load(root / "postings.npy", mmap_mode="r")
+        self._tf = np.load(root / "tf.npy", mmap_mode="r")
+        self._doc_len = np.load(root / "doc_len.npy", mmap_mode="r")
+        self.count = manifest["count"]
+        self._k1 = manifest["k1"]
+        # Per-doc length normalization is query-independent; precompute it once
+        avgdl = manifest["avgdl"] or 1.0
+        self._norm = (self._k1 * (1 - manifest["b"] + manifest["b"] * self._doc_len / avgdl)).astype(np.float32)
+
+    def _postings_range(self, term: str) -> tuple[int, int] | None:
+        i = int(np.searchsorted(self._terms, term))
+        if i == len(self._terms) or self._terms[i] != term:
+            return None
+        return int(self._term_offsets[i]), int(self._term_offsets[i + 1])
+
+    async def load(self) -> int:
+        """Open the index (memory-mapped); returns the number of chunks."""
+        await asyncio.to_thread(self._open)
+        return self.count
+
+    def _subject_mask(self, subject: str) -> np.ndarray:
+        mask = self._subject_masks.get(subject)
+        if mask is None:
+            mask = np.fromiter((s == subject for s in self._meta["subject"]), dtype=bool, count=self.count)
+            self._subject_masks[subject] = mask
+        return mask
+
+    def _search(self, query: str, top_k: int, subject_filter: str | None) -> list[dict]:
+        self._open()
+        docs: list[np.ndarray] = []
+        weights: list[np.ndarray] = []
+        for term, qtf in Counter(char_bigrams(query)).items():
+            span = self._postings_range(term)
+            if span is None:
+                continue
+            offset, end = span
+            df = end - offset
+            idf = np.log(1 + (self.count - df + 0.5) / (df + 0.5))
+            term_docs = self._postings[offset : offset + df]
+            tf = self._tf[offset : offset + df].astype(np.float32)
+            docs.append(term_docs)
+            weights.append(qtf * idf * tf * (self._k1 + 1) / (tf + self._norm[term_docs]))
+        if not docs:
+            return []
+
+        scores = np.bincount(np.concatenate(docs), weights=np.concatenate(weights), minlength=self.count)
+        if subject_filter:
+            scores = np.where(self._subject_mask(subject_filter), scores, 0.0)
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [
+            {"score": float(scores[doc]), **{f: self._meta[f][doc] for f in LEXICAL_FIELDS}} for doc in ranked
+        ]
+
+    async def search(self, query: str, *, top_k: int = 10, subject_filter: str | None = None) -> list[dict]:
+        """BM25 top-k chunks for ``query`` (same hit shape as the vector stores)."""
+        return await asyncio.to_thread(self._search, query, top_k, subject_filter)
+
+
+# Global singleton (None when no index is configured)
+_index: LexicalIndex | None = None
+
+
+def get_lexical_index() -> LexicalIndex | None:
+    """Process-wide index, reopened when an import publishes a new generation."""
+    global _index
+    settings = get_settings()
+    if not settings.lexical_index_dir:
+        return None
+    directory = Path(settings.lexical_index_dir)
+    if _index is None or _index.generation != resolve_generation(directory):
+        if not (directory / "manifest.json").exists():
+            logger.warning("lexical_index.missing", path=str(directory))
+            return _index
+        _index = LexicalIndex(directory)
+    return _index
@@ -7,10 +7,15 @@ import orjson
 import structlog
 
 from app.config.settings import get_settings
+from app.core.http_pool import get_upstream_pools
+from app.services.response_cache import CacheScope, get_response_cache
+from app.services.single_flight import get_single_flight, request_key
 
 settings = get_settings()
 logger = structlog.get_logger()
 
+_GENERATE_TIMEOUT = 60.0
+
 
 class LLMClient:
     """Client for vLLM inference service (OpenAI-compatible API)."""
@@ -18,6 +23,11 @@ class LLMClient:
     def __init__(self, base_url: str | None = None):
         self.base_url = (base_url or settings.llm_service_url).rstrip("/")
 
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for this upstream."""
+        return get_upstream_pools().client(self.base_url)
+
     async def generate(
         self,
         messages: list[dict[str, str]],
@@ -26,8 +36,16 @@ class LLMClient:
         temperature: float = 0.7,
         max_tokens: int = 2048,
         top_p: float = 0.9,
+        cache: CacheScope | None = None,
     ) -> dict:
-        """Non-streaming completion."""
+        """Non-streaming completion.
+
+        Pass ``cache`` to opt this call into the shared response cache.
+        """
+        probe = await get_response_cache().lookup(messages, cache) if cache else None
+        if probe and probe.result is not None:
+            return probe.result
+
         payload = {
             "model": model,
             "messages": messages,
@@ -36,16 +54,27 @@ class LLMClient:
             "top_p": top_p,
             "stream": False,
         }
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(f"{self.base_url}/v1/chat/completions", json=payload)
+
+        async def _complete() -> dict:
+            resp = await self._client.post(
+                f"{self.base_url}/v1/chat/completions", json=payload, timeout=_GENERATE_TIMEOUT,
+            )
             resp.raise_for_status()
             result = resp.json()
-        choice = result["choices"][0]
-        return {
-            "content": choice["message"]["content"],
-            "usage": result.get("usage", {}),
-            "finish_reason": choice.get("finish_reason"),
-        }
+            choice = result["choices"][0]
+            completion = {
+                "content": choice["message"]["content"],
+                "usage": result.get("usage", {}),
+                "finish_reason": choice.get("finish_reason"),
+            }
+            # Only cache complete answers (not ones cut off by max_tokens)
+            if probe and completion["finish_reason"] == "stop":
+                get_response_cache().store(probe, completion)
+            return completion
+
+        # Identical concurrent requests share one upstream generation
+        flight = get_single_flight("llm", timeout=_GENERATE_TIMEOUT)
+        return await flight.do(request_key(self.base_url, payload), _complete)
 
     async def generate_stream(
         self,
@@ -55,8 +84,18 @@ class LLMClient:
         temperature: float = 0.7,
         max_tokens: int = 2048,
         top_p: float = 0.9,
+        cache: CacheScope | None = None,
     ) -> AsyncGenerator[str, None]:
-        """Streaming completion — yields text chunks."""
+        """Streaming completion — yields text chunks.
+
+        With ``cache``, a hit is replayed as a single chunk and a fully
+        streamed miss is stored for later callers.
+        """
+        probe = await get_response_cache().lookup(messages, cache) if cache else None
+        if probe and probe.result is not None:
+            yield probe.result["content"]
+            return
+
         payload = {
             "model": model,
             "messages": messages,
@@ -65,10 +104,11 @@ class LLMClient:
             "top_p": top_p,
             "stream": True,
         }
-        async with (
-            httpx.AsyncClient(timeout=120.0) as client,
-            client.stream("POST", f"{self.base_url}/v1/chat/completions", json=payload) as resp,
-        ):
+        streamed: list[str] = []
+        finish_reason: str | None = None
+        async with self._client.stream(
+            "POST", f"{self.base_url}/v1/chat/completions", json=payload, timeout=120.0,
+        ) as resp:
             resp.raise_for_status()
             async for line in resp.aiter_lines():
                 if not line.startswith("data: "):
@@ -77,16 +117,24 @@ class LLMClient:
                 if data.strip() == "[DONE]":
                     break
                 chunk = orjson.loads(data)
-                delta = chunk["choices"][0].get("delta", {})
-                text = delta.get("content")
+                choice = chunk["choices"][0]
+                text = choice.get("delta", {}).get("content")
                 if text:
+                    if probe:
+                        streamed.append(text)
                     yield text
+                if choice.get("finish_reason"):
+                    finish_reason = choice["finish_reason"]
+
+        if probe and finish_reason == "stop":
+            get_response_cache().store(
+                probe, {"content": "".join(streamed), "usage": {}, "finish_reason": finish_reason},
+            )
 
     async def health_check(self) -> bool:
         """Check if vLLM service is reachable."""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"{self.base_url}/health")
-                return resp.status_code == 200
+            resp = await self._client.get(f"{self.base_url}/health", timeout=5.0)
+            return resp.status_code == 200
         except httpx.HTTPError:
             return False
@@ -0,0 +1,303 @@
+"""Embedded vector index over a snapshot of the ``knowledge_base`` collection.
+
+Serves the same ``search`` interface as
+``MilvusKnowledgeStore`` without a Milvus server: as a failover when Milvus
+is unreachable, or as the primary engine for single-school deployments.
+
+A snapshot directory holds:
+
+- ``vectors.npy``   — L2-normalized float32 matrix (N × dim), opened with
+  ``mmap_mode="r"`` so every worker shares the same page-cache pages
+- ``graph.npy``     — optional N × 2M int32 nearest-neighbour graph (with reverse edges) for large corpora
+- ``entry.npy``     — entry rows for the graph walk, at least one per connected component
+- ``meta.json``     — columnar chunk metadata (id, content, subject, chapter, source)
+- ``manifest.json`` — count, dim and engine kind; written last
+
+Each write builds a new generation and swaps it in atomically (see
+``index_generations``); ``get_local_index`` reopens when that happens.
+
+Small corpora are searched exactly with one matrix product. Above
+``graph_threshold`` rows the snapshot also stores a k-NN graph that is
+searched greedily (beam width ``ef``) from a spread of entry points plus one
+per connected component — a single-layer HNSW-style walk that touches a few
+thousand rows per query.
+"""
+
+import asyncio
+import heapq
+import json
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+from app.config.settings import get_settings
+from app.services.index_generations import discard, open_pinned, publish, resolve_generation, staging_dir
+
+logger = structlog.get_logger()
+
+SNAPSHOT_FIELDS = ("id", "content", "subject", "chapter", "source")
+
+DEFAULT_GRAPH_THRESHOLD = 50_000
+DEFAULT_NEIGHBORS = 16
+_ENTRY_POINTS = 64
+_KNN_BLOCK = 1024
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def build_knn_graph(vectors: np.ndarray, neighbors: int = DEFAULT_NEIGHBORS) -> np.ndarray:
+    """Symmetrized k-NN graph (cosine) over normalized ``vectors``, computed in row blocks.
+
+    Row ``i`` holds ``i``'s ``neighbors`` nearest rows, then up to as many
+    rows that list ``i`` among theirs (most similar first). The reverse edges
+    keep rows that are nobody's near neighbour reachable by the greedy walk.
+    Unused slots repeat ``i`` itself, which the search has always visited.
+    """
+    n = len(vectors)
+    m = min(neighbors, n - 1)
+    if m <= 0:
+        return np.empty((n, 0), dtype=np.int32)
+    forward = np.empty((n, m), dtype=np.int32)
+    forward_sims = np.empty((n, m), dtype=np.float32)
+    for start in range(0, n, _KNN_BLOCK):
+        block = vectors[start : start + _KNN_BLOCK]
+        sims = block @ vectors.T
+        rows = np.arange(len(block))
+        sims[rows, start + rows] = -np.inf  # no self-edges
+        top = np.argpartition(-sims, m - 1, axis=1)[:, :m]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        forward[start : start + len(block)] = np.take_along_axis(top, order, axis=1)
+        forward_sims[start : start + len(block)] = np.take_along_axis(top_sims, order, axis=1)
+
+    # Reverse edges j → i for every i → j, grouped by j and ranked by similarity
+    src = np.repeat(np.arange(n, dtype=np.int32), m)
+    dst = forward.ravel()
+    order = np.lexsort((-forward_sims.ravel(), dst))
+    src, dst = src[order], dst[order]
+    rank = np.arange(len(dst)) - np.searchsorted(dst, dst)
+    keep = rank < m
+
+    graph = np.empty((n, 2 * m), dtype=np.int32)
+    graph[:, :m] = forward
+    graph[:, m:] = np.arange(n, dtype=np.int32)[:, None]
+    graph[dst[keep], m + rank[keep]] = src[keep]
+    return graph
+
+
+def graph_entry_points(graph: np.ndarray, spread: int = _ENTRY_POINTS) -> np.ndarray:
+    """Rows the greedy walk starts from: an even spread plus one row per connected component.
+
+    A k-NN graph over well-separated clusters falls apart into components the
+    walk cannot cross, so each one needs an entry point of its own.
+    """
+    n = len(graph)
+    if not n:
+        return np.empty(0, dtype=np.int32)
+    src = np.repeat(np.arange(n), graph.shape[1])
+    dst = graph.ravel()
+    # Label propagation with pointer jumping: every row ends up labelled with its component's smallest row
+    labels = np.arange(n)
+    while True:
+        merged = np.minimum(labels[src], labels[dst])
+        updated = labels.copy()
+        np.minimum.at(updated, src, merged)
+        np.minimum.at(updated, dst, merged)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    evenly = np.linspace(0, n - 1, num=min(spread, n), dtype=int)
+    return np.union1d(evenly, np.unique(labels)).astype(np.int32)
+
+
+def write_snapshot(
+    directory: Path,
+    vectors: np.ndarray,
+    meta: dict[str, list],
+    *,
+    graph_threshold: int = DEFAULT_GRAPH_THRESHOLD,
+    neighbors: int = DEFAULT_NEIGHBORS,
+) -> dict:
+    """Write a new snapshot generation and publish it at ``directory``; returns the manifest."""
+    vectors = _normalize(vectors)
+    count = len(vectors)
+    if any(len(meta.get(f, ())) != count for f in SNAPSHOT_FIELDS):
+        raise ValueError("metadata columns must match the number of vectors")
+
+    staged = staging_dir(directory)
+    try:
+        np.save(staged / "vectors.npy", vectors)
+        kind = "flat"
+        if count > graph_threshold:
+            graph = build_knn_graph(vectors, neighbors)
+            np.save(staged / "graph.npy", graph)
+            np.save(staged / "entry.npy", graph_entry_points(graph))
+            kind = "graph"
+        (staged / "meta.json").write_text(
+            json.dumps({f: list(meta[f]) for f in SNAPSHOT_FIELDS}, ensure_ascii=False), encoding="utf-8",
+        )
+        manifest = {"count": count, "dim": int(vectors.shape[1]) if count else 0, "kind": kind}
+        (staged / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    except BaseException:
+        discard(staged)
+        raise
+    publish(directory, staged)
+    return manifest
+
+
+class LocalVectorIndex:
+    """In-process ANN search over a snapshot directory.
+
+    Args:
+        directory: Snapshot written by ``write_snapshot``.
+        ef: Beam width for graph search (ignored for flat snapshots).
+    """
+
+    def __init__(self, directory: Path, *, ef: int = 128) -> None:
+        self.directory = directory
+        # Pin one generation so every file is read from the same snapshot
+        self.generation = resolve_generation(directory)
+        self.ef = ef
+        self._vectors: np.ndarray | None = None
+        self._graph: np.ndarray | None = None
+        self._meta: dict[str, list] = {}
+        self._entry: np.ndarray | None = None
+        self._subject_rows: dict[str, np.ndarray] = {}
+
+    @property
+    def kind(self) -> str:
+        return "graph" if self._graph is not None else "flat"
+
+    def _open(self) -> np.ndarray:
+        if self._vectors is None:
+            self.generation = open_pinned(self.directory, self.generation, self._open_generation)
+            assert self._vectors is not None
+            logger.info("local_index.opened", path=str(self.generation), count=len(self._vectors), kind=self.kind)
+        return self._vectors
+
+    def _open_generation(self, root: Path) -> None:
+        manifest = json.loads((root / "manifest.json").read_text(encoding="utf-8"))
+        self._meta = json.loads((root / "meta.json").read_text(encoding="utf-8"))
+        vectors = np.load(root / "vectors.npy", mmap_mode="r")
+        self._graph = None
+        if manifest["kind"] == "graph":
+            graph = np.load(root / "graph.npy", mmap_mode="r")
+            if (root / "entry.npy").exists():
+                self._entry = np.load(root / "entry.npy")
+            else:
+                # Snapshots written before entry points were stored
+                spread = np.linspace(0, len(vectors) - 1, num=min(_ENTRY_POINTS, len(vectors)), dtype=int)
+                self._entry = np.unique(spread)
+            self._graph = graph
+        # Set last: a retry after a pruned generation starts from scratch
+        self._vectors = vectors
+
+    async def load(self) -> int:
+        """Open the snapshot (memory-mapped); returns the number of vectors."""
+        return len(await asyncio.to_thread(self._open))
+
+    def _rows_for_subject(self, subject: str) -> np.ndarray:
+        rows = self._subject_rows.get(subject)
+        if rows is None:
+            rows = np.flatnonzero(np.asarray(self._meta["subject"], dtype=object) == subject)
+            self._subject_rows[subject] = rows
+        return rows
+
+    def _hit(self, row: int, score: float) -> dict:
+        return {
+            "id": self._meta["id"][row],
+            "score": float(score),
+            "content": self._meta["content"][row],
+            "subject": self._meta["subject"][row],
+            "chapter": self._meta["chapter"][row],
+            "source": self._meta["source"][row],
+        }
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=int)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _graph_search(self, vectors: np.ndarray, query: np.ndarray, k: int) -> list[tuple[int, float]]:
+        assert self._graph is not None and self._entry is not None
+        k = min(k, len(vectors))
+        if k <= 0:
+            return []
+        ef = max(self.ef, k)
+        visited = set(self._entry.tolist())
+        start_scores = vectors[self._entry] @ query
+        # candidates: max-heap by score; results: min-heap holding the best ``ef``
+        candidates = [(-s, int(r)) for r, s in zip(self._entry, start_scores, strict=True)]
+        heapq.heapify(candidates)
+        results = [(s, int(r)) for r, s in zip(self._entry, start_scores, strict=True)]
+        results = heapq.nlargest(ef, results)
+        heapq.heapify(results)
+        while candidates:
+            neg_score, row = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_score < results[0][0]:
+                break
+            # Mutual neighbours appear in both halves of a row
+            fresh = list(dict.fromkeys(int(r) for r in self._graph[row] if r not in visited))
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for r, s in zip(fresh, vectors[fresh] @ query, strict=True):
+                if len(results) < ef or s > results[0][0]:
+                    heapq.heappush(candidates, (-s, r))
+                    heapq.heappush(results, (s, r))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return [(r, s) for s, r in heapq.nlargest(k, results)]
+
+    def _search(self, query_embedding: list[float], top_k: int, subject_filter: str | None) -> list[dict]:
+        vectors = self._open()
+        if not len(vectors):
+            return []
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+        if subject_filter:
+            rows = self._rows_for_subject(subject_filter)
+            scores = vectors[rows] @ query
+            return [self._hit(int(rows[i]), scores[i]) for i in self._top(scores, top_k)]
+        if self._graph is None:
+            scores = vectors @ query
+            return [self._hit(int(i), scores[i]) for i in self._top(scores, top_k)]
+        return [self._hit(r, s) for r, s in self._graph_search(vectors, query, top_k)]
+
+    async def search(
+        self,
+        query_embedding: list[float],
+        *,
+        top_k: int = 5,
+        subject_filter: str | None = None,
+    ) -> list[dict]:
+        """Search for similar knowledge chunks (same hit shape as ``MilvusKnowledgeStore.search``)."""
+        return await asyncio.to_thread(self._search, query_embedding, top_k, subject_filter)
+
+
+# Global singleton (None when no snapshot is configured)
+_index: LocalVectorIndex | None = None
+
+
+def get_local_index() -> LocalVectorIndex | None:
+    """Process-wide index, reopened when an import publishes a new snapshot generation."""
+    global _index
+    settings = get_settings()
+    if not settings.local_index_dir:
+        return None
+    directory = Path(settings.local_index_dir)
+    if _index is None or _index.generation != resolve_generation(directory):
+        if not (directory / "manifest.json").exists():
+            logger.warning("local_index.missing", path=str(directory))
+            return _index
+        _index = LocalVectorIndex(directory, ef=settings.local_index_ef)
+    return _index
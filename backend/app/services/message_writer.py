@@ -0,0 +1,188 @@
+"""Write-behind buffer for chat messages — group commit across concurrent turns.
+
+Turns submitted within a short window are written in one transaction: a
+single multi-row INSERT for all their messages plus one atomic counter
+``UPDATE`` per conversation. Callers await their batch's commit, so a turn is
+still durable once ``submit`` returns; the buffer only trades a few
+milliseconds of post-reply latency for far fewer round-trips under load.
+"""
+
+import asyncio
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import structlog
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.settings import get_settings
+from app.core.database import async_session_factory
+from app.models.conversation import Conversation, Message
+
+logger = structlog.get_logger()
+
+# Columns copied from a transient ``Message`` into the bulk INSERT
+_MESSAGE_COLUMNS = (
+    "id",
+    "conversation_id",
+    "role",
+    "content_type",
+    "content",
+    "token_count",
+    "intent_label",
+    "intent_confidence",
+    "emotion_label",
+    "emotion_score",
+    "is_flagged",
+    "created_at",
+    "updated_at",
+)
+
+
+def message_row(msg: Message) -> dict:
+    return {column: getattr(msg, column) for column in _MESSAGE_COLUMNS}
+
+
+@dataclass
+class _PendingTurn:
+    conv_id: uuid.UUID
+    rows: list[dict]
+    context_snapshot: dict | None
+    future: asyncio.Future[None]
+
+
+class MessageWriteBuffer:
+    """Batch message inserts and counter updates from concurrent turns.
+
+    Args:
+        session_factory: Factory for the buffer's own sessions (not the request's).
+        max_batch: Flush immediately once this many rows are queued.
+        max_delay: Seconds to wait for other turns to join a batch.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        max_batch: int = 256,
+        max_delay: float = 0.02,
+    ) -> None:
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: list[_PendingTurn] = []
+        self._queued_rows = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._closing = False
+        self.batches = 0
+        self.turns = 0
+        self.rows = 0
+        self.failures = 0
+
+    async def submit(
+        self,
+        conv_id: uuid.UUID,
+        messages: Sequence[Message],
+        *,
+        context_snapshot: dict | None = None,
+    ) -> None:
+        """Queue one turn's messages (and optional snapshot) and wait for the batch to commit."""
+        if self._closing:
+            raise RuntimeError("message write buffer is closed")
+        pending = _PendingTurn(
+            conv_id=conv_id,
+            rows=[message_row(m) for m in messages],
+            context_snapshot=context_snapshot,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._queue.append(pending)
+        self._queued_rows += len(pending.rows)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        await asyncio.shield(pending.future)
+
+    async def _run(self) -> None:
+        while self._queue or not self._closing:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._closing and self._queued_rows < self.max_batch:
+                # Let concurrent turns join this batch
+                await asyncio.sleep(self.max_delay)
+            batch, self._queue = self._queue, []
+            self._queued_rows = 0
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list[_PendingTurn]) -> None:
+        rows = [row for pending in batch for row in pending.rows]
+        per_conv: dict[uuid.UUID, tuple[int, dict | None]] = {}
+        for pending in batch:
+            count, snapshot = per_conv.get(pending.conv_id, (0, None))
+            per_conv[pending.conv_id] = (count + len(pending.rows), pending.context_snapshot or snapshot)
+
+        now = datetime.now(UTC)
+        try:
+            async with self._session_factory() as session, session.begin():
+                if rows:
+                    await session.execute(insert(Message), rows)
+                for conv_id, (count, snapshot) in per_conv.items():
+                    values: dict = {}
+                    if count:
+                        values.update(message_count=Conversation.message_count + count, last_message_at=now)
+                    if snapshot is not None:
+                        values["context_snapshot"] = snapshot
+                    if values:
+                        await session.execute(update(Conversation).where(Conversation.id == conv_id).values(**values))
+        except Exception as exc:
+            self.failures += 1
+            await logger.aexception("message_writer.flush_failed", turns=len(batch), rows=len(rows))
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.turns += len(batch)
+        self.rows += len(rows)
+        for pending in batch:
+            if not pending.future.done():
+                pending.future.set_result(None)
+
+    async def aclose(self) -> None:
+        """Flush whatever is queued and stop the background task."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "turns": self.turns,
+            "rows": self.rows,
+            "failures": self.failures,
+            "queued_turns": len(self._queue),
+            "avg_turns_per_batch": round(self.turns / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+# Global singleton (None when write-behind is disabled)
+_writer: MessageWriteBuffer | None = None
+
+
+def get_message_writer() -> MessageWriteBuffer | None:
+    global _writer
+    settings = get_settings()
+    if not settings.message_write_behind:
+        return None
+    if _writer is None:
+        _writer = MessageWriteBuffer(
+            async_session_factory,
+            max_batch=settings.message_write_behind_max_batch,
+            max_delay=settings.message_write_behind_max_delay_ms / 1000,
+        )
+    return _writer
@@ -1,5 +1,12 @@
 """Milvus vector database client for knowledge retrieval."""
 
+import asyncio
+import json
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
 import structlog
 from pymilvus import Collection, CollectionSchema, DataType, FieldSchema, connections, utility
 
@@ -15,6 +22,8 @@ CONVERSATION_COLLECTION = "conversation_embeddings"
 # BGE-large-zh output dimension
 EMBEDDING_DIM = 1024
 
+T = TypeVar("T")
+
 
 def connect_milvus() -> None:
     """Establish connection to Milvus server."""
@@ -56,10 +65,57 @@ def ensure_knowledge_collection() -> Collection:
 
 
 class MilvusKnowledgeStore:
-    """CRUD operations for the knowledge vector store."""
+    """CRUD operations for the knowledge vector store.
+
+    pymilvus is synchronous, so every call runs on a bounded thread pool
+    instead of the event loop. The collection is resolved and loaded into
+    query nodes once per store; use ``get_knowledge_store()`` for the
+    process-wide instance.
 
-    def __init__(self) -> None:
-        self.collection = ensure_knowledge_collection()
+    Args:
+        max_workers: Threads for blocking Milvus calls.
+    """
+
+    def __init__(self, *, max_workers: int | None = None) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.milvus_search_workers, thread_name_prefix="milvus",
+        )
+        self._collection: Collection | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _get_collection(self, *, load: bool) -> Collection:
+        with self._lock:
+            if self._collection is None:
+                if not connections.has_connection("default"):
+                    connect_milvus()
+                self._collection = ensure_knowledge_collection()
+            if load and not self._loaded:
+                self._collection.load()
+                self._loaded = True
+                logger.info(
+                    "milvus.collection_loaded", name=KNOWLEDGE_COLLECTION, entities=self._collection.num_entities,
+                )
+            return self._collection
+
+    @property
+    def collection(self) -> Collection:
+        return self._get_collection(load=False)
+
+    async def load(self) -> int:
+        """Connect, ensure and load the collection (startup warm-up); returns the entity count."""
+        collection = await self._run(lambda: self._get_collection(load=True))
+        return collection.num_entities
+
+    def _insert(self, columns: list[list], upsert: bool) -> None:
+        collection = self._get_collection(load=False)
+        if upsert:
+            collection.upsert(columns)
+        else:
+            collection.insert(columns)
 
     async def insert(
         self,
@@ -69,29 +125,42 @@ class MilvusKnowledgeStore:
         subjects: list[str],
         chapters: list[str],
         sources: list[str],
+        *,
+        upsert: bool = False,
     ) -> int:
-        """Insert knowledge chunks into Milvus."""
-        self.collection.insert([ids, embeddings, contents, subjects, chapters, sources])
-        self.collection.flush()
+        """Insert knowledge chunks into Milvus (``upsert`` replaces rows with the same id).
+
+        Inserts are not flushed; bulk loaders call ``flush()`` once at the end
+        instead of sealing a small segment per batch.
+        """
+        await self._run(self._insert, [ids, embeddings, contents, subjects, chapters, sources], upsert)
         return len(ids)
 
-    async def search(
-        self,
-        query_embedding: list[float],
-        *,
-        top_k: int = 5,
-        subject_filter: str | None = None,
-    ) -> list[dict]:
-        """Search for similar knowledge chunks.
+    async def delete(self, ids: list[str]) -> int:
+        """Delete knowledge chunks by id."""
 
-        Returns list of dicts with keys: id, content, subject, chapter, source, score.
-        """
-        self.collection.load()
+        def _delete() -> int:
+            result = self._get_collection(load=False).delete(f"id in {json.dumps(ids, ensure_ascii=False)}")
+            return result.delete_count
+
+        return await self._run(_delete) if ids else 0
+
+    async def flush(self) -> int:
+        """Seal pending inserts into segments; returns the entity count."""
+
+        def _flush() -> int:
+            collection = self._get_collection(load=False)
+            collection.flush()
+            return collection.num_entities
 
+        return await self._run(_flush)
+
+    def _search(self, query_embedding: list[float], top_k: int, subject_filter: str | None) -> list[dict]:
+        collection = self._get_collection(load=True)
         search_params = {"metric_type": "COSINE", "params": {"ef": 128}}
         expr = f'subject == "{subject_filter}"' if subject_filter else None
 
-        results = self.collection.search(
+        results = collection.search(
             data=[query_embedding],
             anns_field="embedding",
             param=search_params,
@@ -99,15 +168,48 @@ class MilvusKnowledgeStore:
             expr=expr,
             output_fields=["content", "subject", "chapter", "source"],
         )
-
-        hits = []
-        for result in results[0]:
-            hits.append({
+        return [
+            {
                 "id": result.id,
                 "score": result.score,
                 "content": result.entity.get("content"),
                 "subject": result.entity.get("subject"),
                 "chapter": result.entity.get("chapter"),
                 "source": result.entity.get("source"),
-            })
-        return hits
+            }
+            for result in results[0]
+        ]
+
+    async def search(
+        self,
+        query_embedding: list[float],
+        *,
+        top_k: int = 5,
+        subject_filter: str | None = None,
+    ) -> list[dict]:
+        """Search for similar knowledge chunks.
+
+        Returns list of dicts with keys: id, content, subject, chapter, source, score.
+        """
+        return await self._run(self._search, query_embedding, top_k, subject_filter)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global singleton
+_store: MilvusKnowledgeStore | None = None
+
+
+def get_knowledge_store() -> MilvusKnowledgeStore:
+    global _store
+    if _store is None:
+        _store = MilvusKnowledgeStore()
+    return _store
+
+
+def close_knowledge_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -1,13 +1,28 @@
 """Neo4j knowledge graph client for entity-relationship queries."""
 
+import asyncio
+
 import structlog
 from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
 
 from app.config.settings import get_settings
 
 settings = get_settings()
 logger = structlog.get_logger()
 
+# Uniqueness constraints back the MERGE keys with an index, so imports and
+# lookups by name/id are index seeks instead of label scans
+SCHEMA_STATEMENTS = (
+    "CREATE CONSTRAINT subject_name IF NOT EXISTS FOR (s:Subject) REQUIRE s.name IS UNIQUE",
+    "CREATE CONSTRAINT knowledge_point_name IF NOT EXISTS FOR (kp:KnowledgePoint) REQUIRE kp.name IS UNIQUE",
+    "CREATE CONSTRAINT exercise_id IF NOT EXISTS FOR (ex:Exercise) REQUIRE ex.id IS UNIQUE",
+    "CREATE INDEX chapter_subject_name IF NOT EXISTS FOR (c:Chapter) ON (c.subject, c.name)",
+)
+
+# Errors after which the same transaction can simply be retried
+TRANSIENT_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+
 
 class KnowledgeGraphClient:
     """Neo4j client for the education knowledge graph.
@@ -15,8 +30,8 @@ class KnowledgeGraphClient:
     Graph schema:
     - (:Subject {name, description})
     - (:Chapter {name, subject, order})
-    - (:KnowledgePoint {name, description, difficulty, importance})
-    - (:Exercise {content, answer, difficulty, type})
+    - (:KnowledgePoint {name, description, difficulty, importance, aliases})
+    - (:Exercise {id, content, answer, explanation, difficulty, type})
     - (:Subject)-[:HAS_CHAPTER]->(:Chapter)
     - (:Chapter)-[:CONTAINS]->(:KnowledgePoint)
     - (:KnowledgePoint)-[:PREREQUISITE]->(:KnowledgePoint)
@@ -33,6 +48,82 @@ class KnowledgeGraphClient:
     async def close(self) -> None:
         await self.driver.close()
 
+    async def ensure_schema(self) -> None:
+        """Create the constraints and indexes the importers and queries rely on (idempotent)."""
+        async with self.driver.session() as session:
+            for statement in SCHEMA_STATEMENTS:
+                await session.run(statement)
+        logger.info("neo4j.schema_ensured", statements=len(SCHEMA_STATEMENTS))
+
+    async def write_batches(
+        self,
+        query: str,
+        rows: list[dict],
+        *,
+        batch_size: int = 500,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ) -> int:
+        """Run an ``UNWIND $rows`` write once per batch of ``rows``, each in its own transaction.
+
+        A batch that hits a transient error (deadlock, leader switch, lost
+        connection) is retried up to ``retries`` times with exponential
+        backoff; committed batches are never re-sent.
+
+        Returns:
+            Sum of the query's ``written`` column over all batches.
+        """
+        written = 0
+        async with self.driver.session() as session:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start : start + batch_size]
+                for attempt in range(retries + 1):
+                    tx = await session.begin_transaction()
+                    try:
+                        result = await tx.run(query, rows=batch)
+                        record = await result.single()
+                        await tx.commit()
+                    except TRANSIENT_ERRORS as e:
+                        await tx.close()
+                        if attempt == retries:
+                            raise
+                        logger.warning("neo4j.batch_retry", batch_start=start, attempt=attempt + 1, error=str(e))
+                        await asyncio.sleep(backoff * 2**attempt)
+                        continue
+                    except BaseException:
+                        await tx.close()
+                        raise
+                    written += record["written"] if record is not None else 0
+                    break
+        return written
+
+    async def fetch_graph(self) -> dict[str, list[dict]]:
+        """Whole subject/chapter/knowledge-point graph, for the in-memory snapshot."""
+        queries = {
+            "points": """
+            MATCH (kp:KnowledgePoint)
+            RETURN kp.name AS name,
+                   kp.description AS description,
+                   kp.difficulty AS difficulty,
+                   kp.importance AS importance,
+                   kp.aliases AS aliases
+            """,
+            "chapters": """
+            MATCH (s:Subject)-[:HAS_CHAPTER]->(c:Chapter)-[:CONTAINS]->(kp:KnowledgePoint)
+            RETURN s.name AS subject, c.name AS chapter, kp.name AS name
+            """,
+            "edges": """
+            MATCH (a:KnowledgePoint)-[r:PREREQUISITE|RELATED_TO]->(b:KnowledgePoint)
+            RETURN a.name AS src, type(r) AS rel, b.name AS dst
+            """,
+        }
+        rows: dict[str, list[dict]] = {}
+        async with self.driver.session() as session:
+            for key, query in queries.items():
+                result = await session.run(query)
+                rows[key] = [dict(record) async for record in result]
+        return rows
+
     async def get_related_knowledge_points(self, knowledge_point_name: str, depth: int = 2) -> list[dict]:
         """Find related knowledge points within N hops."""
         query = """
@@ -103,3 +194,21 @@ class KnowledgeGraphClient:
                 return record is not None and record["n"] == 1
         except Exception:
             return False
+
+
+# Global singleton (one driver and connection pool per process)
+_client: KnowledgeGraphClient | None = None
+
+
+def get_knowledge_graph_client() -> KnowledgeGraphClient:
+    global _client
+    if _client is None:
+        _client = KnowledgeGraphClient()
+    return _client
+
+
+async def close_knowledge_graph_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
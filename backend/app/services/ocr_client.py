@@ -4,6 +4,7 @@ import httpx
 import structlog
 
 from app.config.settings import get_settings
+from app.core.http_pool import get_upstream_pools
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -19,20 +20,25 @@ class OCRClient:
     """
 
     def __init__(self, base_url: str | None = None):
-        self.base_url = (base_url or "http://localhost:8866").rstrip("/")
+        self.base_url = (base_url or settings.ocr_service_url).rstrip("/")
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for this upstream."""
+        return get_upstream_pools().client(self.base_url)
 
     async def recognize(self, image_base64: str) -> dict:
         """Extract text from a base64-encoded image.
 
         Returns dict with keys: texts (list of detected text blocks), full_text (concatenated).
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                f"{self.base_url}/ocr/recognize",
-                json={"image": image_base64},
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = await self._client.post(
+            f"{self.base_url}/ocr/recognize",
+            json={"image": image_base64},
+            timeout=30.0,
+        )
+        resp.raise_for_status()
+        return resp.json()
 
     async def recognize_to_text(self, image_base64: str) -> str:
         """Extract and return concatenated text from image."""
@@ -41,8 +47,7 @@ class OCRClient:
 
     async def health_check(self) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"{self.base_url}/health")
-                return resp.status_code == 200
+            resp = await self._client.get(f"{self.base_url}/health", timeout=5.0)
+            return resp.status_code == 200
         except httpx.HTTPError:
             return False
@@ -1,27 +1,106 @@
 """RAG pipeline: query → embed → Milvus retrieval → Neo4j enrichment → context assembly."""
 
+import asyncio
+import time
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING
+
 import structlog
 
+from app.config.settings import get_settings
+from app.services.cache import get_cache_service
+from app.services.context_packer import ContextPacker, line_tokens
+from app.services.corpus_version import current_corpus_version
 from app.services.embedding_service import EmbeddingService
+from app.services.lexical_index import LexicalIndex, get_lexical_index
+from app.services.rerank_service import get_reranker, rerank_hits
+from app.services.single_flight import get_single_flight, request_key
+
+if TYPE_CHECKING:
+    from app.hub.turn_scope import TurnScope
 
 logger = structlog.get_logger()
 
 
+_HITS_HEADER = "--- 相关知识 ---"
+_RELATED_HEADER = "\n--- 关联知识点 ---"
+
+# Last time a missing graph snapshot was logged (once per snapshot retry window)
+_graph_unavailable_logged_at: float | None = None
+
+
+@dataclass
+class RetrievalResult:
+    """Structured retrieval output, cached as-is so any prompt format can reuse it."""
+
+    hits: list[dict] = field(default_factory=list)
+    related: list[dict] = field(default_factory=list)
+    complete: bool = True  # False when a retrieval stage failed
+
+    def to_dict(self) -> dict:
+        return {"hits": self.hits, "related": self.related, "complete": self.complete}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RetrievalResult":
+        return cls(hits=data.get("hits", []), related=data.get("related", []), complete=data.get("complete", True))
+
+
+def _hit_line(i: int, hit: dict) -> str:
+    return f"[{i}] ({hit.get('subject', '')}/{hit.get('chapter', '')}) {hit.get('content', '')}"
+
+
+def format_context(result: RetrievalResult) -> str:
+    """Assemble retrieved hits into the context block injected into the LLM prompt."""
+    context_parts: list[str] = []
+    if result.hits:
+        context_parts.append(_HITS_HEADER)
+        for i, hit in enumerate(result.hits, 1):
+            context_parts.append(_hit_line(i, hit))
+    if result.related:
+        context_parts.append(_RELATED_HEADER)
+        for kp in result.related:
+            context_parts.append(f"• {kp['name']}: {kp['description']}")
+    return "\n".join(context_parts)
+
+
+def reciprocal_rank_fusion(rankings: list[list[dict]], *, k: int = 60, top_k: int = 5) -> list[dict]:
+    """Fuse ranked hit lists by ``sum(1 / (k + rank))`` per chunk id.
+
+    Scores from different engines (cosine vs BM25) are not comparable, so only
+    ranks are used. Each fused hit keeps the first engine's fields and gets
+    the fused value as ``score``.
+    """
+    fused: dict[str, float] = {}
+    first_seen: dict[str, dict] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, 1):
+            hit_id = str(hit.get("id"))
+            fused[hit_id] = fused.get(hit_id, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(hit_id, hit)
+    ordered = sorted(fused, key=fused.__getitem__, reverse=True)[:top_k]
+    return [{**first_seen[hit_id], "score": fused[hit_id]} for hit_id in ordered]
+
+
 class RAGPipeline:
     """Retrieval-Augmented Generation pipeline.
 
     Flow:
     1. Embed user query with BGE-large-zh
-    2. Search Milvus for top-K similar knowledge chunks
-    3. (Optional) Query Neo4j for related knowledge points
-    4. Assemble retrieved context for LLM prompt injection
+    2. Search Milvus for top-K similar knowledge chunks, alongside a BM25
+       bigram index; the two rankings are fused by reciprocal rank
+    3. (Optional) Rerank over-fetched candidates, keeping the best K
+    4. (Optional) Link knowledge points mentioned in the query and expand
+       them over the in-memory graph snapshot
+    5. Pack the chunks into a token budget (dedupe, MMR, skip what the
+       conversation already quoted) and assemble the prompt context
 
     Note: Milvus and Neo4j clients are lazily imported to avoid import-time
     connections when these services are unavailable (e.g., in unit tests).
     """
 
-    def __init__(self) -> None:
-        self.embedding_service = EmbeddingService()
+    def __init__(self, embedding_service: EmbeddingService | None = None) -> None:
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.packer = ContextPacker()
 
     async def retrieve(
         self,
@@ -30,6 +109,7 @@ class RAGPipeline:
         top_k: int = 5,
         subject_filter: str | None = None,
         include_graph: bool = False,
+        turn: "TurnScope | None" = None,
     ) -> str:
         """Retrieve relevant context for a user query.
 
@@ -38,58 +118,231 @@ class RAGPipeline:
             top_k: Number of vector search results.
             subject_filter: Optional subject to narrow search (e.g., "数学").
             include_graph: Whether to also query Neo4j for related knowledge.
+            turn: Per-turn memo; reuses the turn's query embedding if present.
 
         Returns:
             Assembled context string ready for LLM prompt injection.
         """
-        context_parts: list[str] = []
+        result = await self.retrieve_hits(
+            query, top_k=top_k, subject_filter=subject_filter, include_graph=include_graph, turn=turn,
+        )
+        return self.pack(result)
+
+    def pack(self, result: RetrievalResult, *, history: list[str] | None = None, budget: int | None = None) -> str:
+        """Render ``result`` for the prompt, packing chunks into the RAG token budget.
+
+        Near-duplicate chunks and chunks already quoted in ``history`` are
+        dropped; the rest are chosen by MMR until ``budget`` (default
+        ``RAG_CONTEXT_TOKEN_BUDGET``) is spent.
+        """
+        if budget is None:
+            budget = get_settings().rag_context_token_budget
+        reserved = sum(line_tokens(f"• {kp['name']}: {kp['description']}") for kp in result.related)
+        reserved += line_tokens(_HITS_HEADER) + (line_tokens(_RELATED_HEADER) if result.related else 0)
+        packed = self.packer.pack(
+            result.hits,
+            budget - reserved,
+            history=history,
+            # Numbering width barely varies; cost every line as if it were [1]
+            line_cost=lambda hit: line_tokens(_hit_line(1, hit)),
+        )
+        logger.debug("rag.packed", **vars(packed.stats))
+        return format_context(replace(result, hits=packed.hits))
+
+    async def retrieve_hits(
+        self,
+        query: str,
+        *,
+        top_k: int = 5,
+        subject_filter: str | None = None,
+        include_graph: bool = False,
+        turn: "TurnScope | None" = None,
+    ) -> RetrievalResult:
+        """Structured retrieval (same arguments as ``retrieve``), served from the RAG cache when possible.
+
+        The cache key covers every retrieval parameter, the engine settings
+        that shape the ranking and the corpus version, so a re-import
+        (which bumps the version) never serves stale hits.
+        """
+        settings = get_settings()
+        cache = get_cache_service() if settings.rag_cache_enabled else None
+        cache_key: str | None = None
+        if cache is not None:
+            try:
+                version = await current_corpus_version(cache)
+                cache_key = request_key(
+                    version,
+                    query,
+                    top_k,
+                    subject_filter,
+                    include_graph,
+                    settings.vector_engine,
+                    bool(settings.lexical_index_dir),
+                    settings.rag_rrf_k,
+                    settings.rerank_backend,
+                    settings.rerank_model,
+                    settings.rerank_candidates,
+                )
+                cached = await cache.get_rag_result(cache_key)
+                if cached is not None:
+                    return RetrievalResult.from_dict(cached)
+            except Exception:
+                logger.warning("rag.cache_unavailable", op="get")
+
+        # Identical concurrent retrievals share one embedding + search round
+        data = await get_single_flight("rag").do(
+            request_key(query, top_k, subject_filter, include_graph),
+            lambda: self._retrieve_dict(
+                query, top_k=top_k, subject_filter=subject_filter, include_graph=include_graph, turn=turn,
+            ),
+        )
+        result = RetrievalResult.from_dict(data)
+
+        # Degraded results (a stage failed) are not cached
+        if cache is not None and cache_key is not None and result.complete:
+            try:
+                await cache.set_rag_result(cache_key, data, ttl=settings.rag_cache_ttl_seconds)
+            except Exception:
+                logger.warning("rag.cache_unavailable", op="set")
+        return result
+
+    async def _retrieve_dict(self, query: str, **kwargs) -> dict:
+        # JSON-safe form so the single-flight group can share it across workers
+        return (await self._retrieve(query, **kwargs)).to_dict()
+
+    async def _vector_search(
+        self,
+        query_embedding: list[float],
+        *,
+        top_k: int,
+        subject_filter: str | None,
+    ) -> list[dict]:
+        """Search Milvus, failing over to the local snapshot index when configured."""
+        from app.services.local_vector_index import get_local_index
+
+        settings = get_settings()
+        local = get_local_index()
+        if settings.vector_engine == "local" and local is not None:
+            return await local.search(query_embedding, top_k=top_k, subject_filter=subject_filter)
+
+        from app.services.milvus_client import get_knowledge_store
 
-        # 1. Embed the query
         try:
-            query_embedding = await self.embedding_service.embed_single(query)
+            return await get_knowledge_store().search(query_embedding, top_k=top_k, subject_filter=subject_filter)
         except Exception:
-            logger.warning("rag.embedding_failed", query=query[:50])
-            return ""
+            if local is None or not settings.local_index_failover:
+                raise
+            logger.warning("rag.milvus_failover", path=str(local.directory))
+            return await local.search(query_embedding, top_k=top_k, subject_filter=subject_filter)
 
-        # 2. Milvus vector search
+    async def _dense_hits(
+        self,
+        query: str,
+        query_embedding: list[float] | None,
+        *,
+        top_k: int,
+        subject_filter: str | None,
+    ) -> list[dict] | None:
+        """Vector hits, or None when the stage failed."""
+        if query_embedding is None:
+            return None
         try:
-            from app.services.milvus_client import MilvusKnowledgeStore
-
-            store = MilvusKnowledgeStore()
-            hits = await store.search(query_embedding, top_k=top_k, subject_filter=subject_filter)
-
-            if hits:
-                context_parts.append("--- 相关知识 ---")
-                for i, hit in enumerate(hits, 1):
-                    context_parts.append(
-                        f"[{i}] ({hit.get('subject', '')}/{hit.get('chapter', '')}) "
-                        f"{hit.get('content', '')}"
-                    )
+            return await self._vector_search(query_embedding, top_k=top_k, subject_filter=subject_filter)
         except Exception:
             logger.warning("rag.milvus_search_failed", query=query[:50])
+            return None
+
+    @staticmethod
+    async def _lexical_hits(
+        query: str,
+        lexical: LexicalIndex | None,
+        *,
+        top_k: int,
+        subject_filter: str | None,
+    ) -> list[dict] | None:
+        """Lexical hits ([] when no index is configured), or None when the stage failed."""
+        if lexical is None:
+            return []
+        try:
+            return await lexical.search(query, top_k=top_k, subject_filter=subject_filter)
+        except Exception:
+            logger.warning("rag.lexical_search_failed", query=query[:50])
+            return None
+
+    async def _retrieve(
+        self,
+        query: str,
+        *,
+        top_k: int,
+        subject_filter: str | None,
+        include_graph: bool,
+        turn: "TurnScope | None" = None,
+    ) -> RetrievalResult:
+        result = RetrievalResult()
+
+        # 1. Embed the query (on failure the lexical stage can still ground the answer)
+        query_embedding: list[float] | None = None
+        try:
+            if turn is not None:
+                query_embedding = await turn.embedding(query)
+            else:
+                query_embedding = await self.embedding_service.embed_single(query)
+        except Exception:
+            logger.warning("rag.embedding_failed", query=query[:50])
+
+        # 2. Vector search and BM25 lexical search, fused by reciprocal rank
+        settings = get_settings()
+        lexical = get_lexical_index()
+        reranker = get_reranker()
+        # With a reranker, over-fetch N candidates and let it pick the best K
+        keep = max(settings.rerank_candidates, top_k) if reranker is not None else top_k
+        depth = max(keep * 2, 10) if lexical is not None else keep
+        vector_hits, lexical_hits = await asyncio.gather(
+            self._dense_hits(query, query_embedding, top_k=depth, subject_filter=subject_filter),
+            self._lexical_hits(query, lexical, top_k=depth, subject_filter=subject_filter),
+        )
+        result.complete = vector_hits is not None and lexical_hits is not None
+        result.hits = reciprocal_rank_fusion([vector_hits or [], lexical_hits or []], k=settings.rag_rrf_k, top_k=keep)
+
+        # 3. Rerank (optional), falling back to retrieval order past the latency budget
+        if reranker is not None:
+            result.hits, reranked = await rerank_hits(
+                reranker, query, result.hits, top_k=top_k, budget=settings.rerank_budget_ms / 1000,
+            )
+            result.complete = result.complete and reranked
 
-        # 3. Neo4j knowledge graph (optional)
+        # 4. Knowledge graph (optional): link mentioned knowledge points, then expand around them
+        # Without a snapshot (Neo4j unreachable) there is nothing to link against, so the
+        # stage is skipped until the holder's next rebuild attempt rather than queried per request
         if include_graph:
             try:
-                from app.services.neo4j_client import KnowledgeGraphClient
-
-                graph = KnowledgeGraphClient()
-                # Extract potential knowledge point names from query
-                # (simple heuristic — future: NER extraction)
-                related = await graph.get_related_knowledge_points(query[:20])
-                await graph.close()
-
-                if related:
-                    context_parts.append("\n--- 关联知识点 ---")
-                    for kp in related[:5]:
-                        name = kp.get("name", "")
-                        desc = kp.get("description", "")
-                        if name:
-                            context_parts.append(f"• {name}: {desc}")
+                from app.services.graph_snapshot import get_graph_snapshots
+
+                snapshot = await get_graph_snapshots().get()
+                if snapshot is None:
+                    _log_graph_unavailable()
+                    result.complete = False
+                else:
+                    linked = snapshot.link(query)
+                    result.related = [
+                        {"name": kp["name"], "description": kp["description"] or ""}
+                        for kp in snapshot.expand(linked, depth=1, limit=5)
+                    ]
             except Exception:
-                logger.warning("rag.neo4j_query_failed", query=query[:50])
+                logger.warning("rag.graph_enrichment_failed", query=query[:50])
+                result.complete = False
+
+        return result
+
+
+def _log_graph_unavailable() -> None:
+    from app.services.graph_snapshot import SNAPSHOT_RETRY_SECONDS
 
-        return "\n".join(context_parts)
+    global _graph_unavailable_logged_at
+    now = time.monotonic()
+    if _graph_unavailable_logged_at is None or now - _graph_unavailable_logged_at >= SNAPSHOT_RETRY_SECONDS:
+        _graph_unavailable_logged_at = now
+        logger.debug("rag.graph_snapshot_unavailable")
 
 
 class DocumentChunker:
@@ -0,0 +1,177 @@
+"""Rerank stage: rescore (query, chunk) pairs and keep the best K.
+
+Retrieval over-fetches N candidates (fused vector + lexical order); the
+reranker scores all pairs in one batched call and the top K go into the
+prompt, so precision improves without a bigger prompt. The stage runs under
+a per-request time budget: when the reranker is slow or down, the
+candidates keep their retrieval order.
+
+Backends:
+    remote — cross-encoder endpoint (TEI/Jina style ``POST /v1/rerank``)
+    local  — character-bigram overlap scorer; a dependency-free stand-in
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Protocol
+
+import httpx
+import structlog
+
+from app.config.settings import get_settings
+from app.core.http_pool import get_upstream_pools
+from app.services.lexical_index import char_bigrams
+
+logger = structlog.get_logger()
+
+
+class Reranker(Protocol):
+    async def score(self, query: str, documents: list[str]) -> list[float]: ...
+
+
+class RerankService:
+    """Client for a cross-encoder rerank endpoint.
+
+    Expected API:
+        POST /v1/rerank
+        {"model": "bge-reranker-base", "query": "...", "documents": ["...", ...]}
+        → {"results": [{"index": 0, "relevance_score": 0.93}, ...]}
+    """
+
+    def __init__(self, base_url: str | None = None, model: str | None = None) -> None:
+        settings = get_settings()
+        self.base_url = (base_url or settings.rerank_service_url or settings.rag_service_url).rstrip("/")
+        self.model = model or settings.rerank_model
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for this upstream."""
+        return get_upstream_pools().client(self.base_url)
+
+    async def score(self, query: str, documents: list[str]) -> list[float]:
+        """Relevance score per document, in input order (one upstream call)."""
+        resp = await self._client.post(
+            f"{self.base_url}/v1/rerank",
+            json={"model": self.model, "query": query, "documents": documents},
+            timeout=10.0,
+        )
+        resp.raise_for_status()
+        scores = [0.0] * len(documents)
+        for item in resp.json()["results"]:
+            scores[item["index"]] = float(item["relevance_score"])
+        return scores
+
+
+class LocalReranker:
+    """Bigram-overlap scorer: share of the query's bigrams found in the chunk, length-damped."""
+
+    async def score(self, query: str, documents: list[str]) -> list[float]:
+        terms = set(char_bigrams(query))
+        if not terms:
+            return [0.0] * len(documents)
+        scores = []
+        for doc in documents:
+            doc_terms = set(char_bigrams(doc))
+            overlap = len(terms & doc_terms) / len(terms)
+            scores.append(overlap / (1 + math.log1p(len(doc_terms)) / 10))
+        return scores
+
+
+@dataclass
+class RerankStats:
+    calls: int = 0
+    reranked: int = 0
+    budget_exceeded: int = 0
+    failures: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    # |reranked top-K ∩ retrieval top-K| / K — near 1.0 means over-fetching buys little
+    recall_sum: float = 0.0
+    # Deepest retrieval rank promoted into the top K — tells how large N needs to be
+    deepest_rank_sum: int = 0
+    deepest_rank_max: int = 0
+
+    def snapshot(self) -> dict:
+        done = self.reranked or 1
+        return {
+            "calls": self.calls,
+            "reranked": self.reranked,
+            "budget_exceeded": self.budget_exceeded,
+            "failures": self.failures,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "recall_at_k": round(self.recall_sum / done, 3) if self.reranked else None,
+            "avg_deepest_rank": round(self.deepest_rank_sum / done, 2) if self.reranked else None,
+            "max_deepest_rank": self.deepest_rank_max,
+        }
+
+
+_stats = RerankStats()
+
+
+async def rerank_hits(
+    reranker: Reranker,
+    query: str,
+    candidates: list[dict],
+    *,
+    top_k: int,
+    budget: float,
+) -> tuple[list[dict], bool]:
+    """Best ``top_k`` of ``candidates`` by reranker score.
+
+    Returns:
+        (hits, reranked) — on timeout or error the first ``top_k`` candidates
+        in retrieval order and False.
+    """
+    if top_k <= 0:
+        return [], True
+    if len(candidates) <= 1:
+        return candidates[:top_k], True
+
+    started = time.perf_counter()
+    _stats.calls += 1
+    try:
+        scores = await asyncio.wait_for(
+            reranker.score(query, [c.get("content") or "" for c in candidates]), timeout=budget,
+        )
+    except TimeoutError:
+        _stats.budget_exceeded += 1
+        logger.warning("rerank.budget_exceeded", budget_ms=round(budget * 1000), candidates=len(candidates))
+        return candidates[:top_k], False
+    except Exception:
+        _stats.failures += 1
+        logger.warning("rerank.failed", candidates=len(candidates))
+        return candidates[:top_k], False
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        _stats.total_ms += elapsed
+        _stats.max_ms = max(_stats.max_ms, elapsed)
+
+    order = sorted(range(len(candidates)), key=lambda i: -scores[i])[:top_k]
+    k = min(top_k, len(candidates))
+    _stats.reranked += 1
+    _stats.recall_sum += sum(1 for i in order if i < k) / k
+    deepest = max(order) + 1
+    _stats.deepest_rank_sum += deepest
+    _stats.deepest_rank_max = max(_stats.deepest_rank_max, deepest)
+    return [{**candidates[i], "rerank_score": scores[i]} for i in order], True
+
+
+def rerank_stats() -> dict:
+    return _stats.snapshot()
+
+
+# Global singleton (None when the rerank stage is disabled)
+_reranker: Reranker | None = None
+
+
+def get_reranker() -> Reranker | None:
+    global _reranker
+    backend = get_settings().rerank_backend
+    if backend not in ("remote", "local"):
+        return None
+    if _reranker is None:
+        _reranker = RerankService() if backend == "remote" else LocalReranker()
+    return _reranker
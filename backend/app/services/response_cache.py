@@ -0,0 +1,262 @@
+"""LLM response cache — exact and near-duplicate reuse of completed generations.
+
+Two tiers in front of ``LLMClient``:
+  - Exact: SHA-256 of the normalized messages + cache namespace + persona version
+  - Near-duplicate: cosine similarity of the query embedding (BGE) against
+    recent queries that share the same prompt prefix (system + history)
+
+Caching is opt-in per call (``CacheScope``) and per agent (settings); the
+emotional and crisis paths are never cached regardless of configuration.
+"""
+
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+import orjson
+import structlog
+
+from app.config.settings import get_settings
+from app.services.embedding_service import EmbeddingService
+
+logger = structlog.get_logger()
+
+# Namespaces that must never be served from cache
+NEVER_CACHE: frozenset[str] = frozenset({"emotional", "crisis"})
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-fold (full-width → half-width), lowercase and collapse whitespace."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+@dataclass(frozen=True)
+class CacheScope:
+    """Per-call cache opt-in.
+
+    Args:
+        namespace: Agent type or feature, e.g. "academic" or "creative.story".
+        persona_version: Persona identity/version the prompt was built with.
+        query: The raw user question, used for the near-duplicate tier.
+    """
+
+    namespace: str
+    persona_version: str | None = None
+    query: str | None = None
+
+
+@dataclass
+class CacheProbe:
+    """Result of a cache lookup; pass back to ``store`` after a miss."""
+
+    scope: CacheScope
+    key: str
+    prefix_key: str
+    result: dict | None = None
+    vector: np.ndarray | None = None
+
+
+@dataclass
+class _Entry:
+    result: dict
+    expires_at: float
+    prefix_key: str
+    vector: np.ndarray | None = None
+
+
+@dataclass
+class ResponseCacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    stores: int = 0
+    evictions: int = 0
+    per_namespace: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def record(self, namespace: str, outcome: str) -> None:
+        bucket = self.per_namespace.setdefault(namespace, {"hits": 0, "misses": 0})
+        bucket["hits" if outcome != "misses" else "misses"] += 1
+        setattr(self, outcome, getattr(self, outcome) + 1)
+
+
+class ResponseCache:
+    """In-process TTL + LRU cache of LLM completions."""
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        enabled_namespaces: set[str] | None = None,
+        max_entries: int = 2048,
+        ttl_seconds: float = 600.0,
+        semantic_threshold: float | None = 0.97,
+        embedding_service: EmbeddingService | None = None,
+    ) -> None:
+        self.enabled = enabled
+        self.enabled_namespaces = enabled_namespaces
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self._embedding = embedding_service
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # prefix_key → keys of entries sharing that prompt prefix (semantic candidates)
+        self._by_prefix: dict[str, set[str]] = {}
+        self.stats = ResponseCacheStats()
+
+    def is_enabled_for(self, namespace: str) -> bool:
+        root = namespace.split(".", 1)[0]
+        if not self.enabled or root in NEVER_CACHE:
+            return False
+        return self.enabled_namespaces is None or root in self.enabled_namespaces
+
+    @staticmethod
+    def _hash(*parts: object) -> str:
+        return hashlib.sha256(orjson.dumps(parts)).hexdigest()
+
+    def _keys(self, messages: list[dict[str, str]], scope: CacheScope) -> tuple[str, str]:
+        normalized = [(m.get("role", ""), normalize_text(m.get("content", ""))) for m in messages]
+        key = self._hash(scope.namespace, scope.persona_version, normalized)
+        prefix_key = self._hash(scope.namespace, scope.persona_version, normalized[:-1])
+        return key, prefix_key
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        siblings = self._by_prefix.get(entry.prefix_key)
+        if siblings is not None:
+            siblings.discard(key)
+            if not siblings:
+                del self._by_prefix[entry.prefix_key]
+
+    async def _embed(self, query: str) -> np.ndarray | None:
+        if self._embedding is None:
+            return None
+        try:
+            vector = np.asarray(await self._embedding.embed_single(normalize_text(query)), dtype=np.float32)
+        except Exception:
+            logger.warning("response_cache.embedding_failed")
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def _semantic_match(self, prefix_key: str, vector: np.ndarray, now: float) -> _Entry | None:
+        keys = [k for k in self._by_prefix.get(prefix_key, ()) if self._entries[k].vector is not None]
+        if not keys:
+            return None
+        matrix = np.stack([self._entries[k].vector for k in keys])
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if self.semantic_threshold is None or float(scores[best]) < self.semantic_threshold:
+            return None
+        entry = self._entries[keys[best]]
+        if entry.expires_at <= now:
+            self._evict(keys[best])
+            return None
+        self._entries.move_to_end(keys[best])
+        return entry
+
+    async def lookup(self, messages: list[dict[str, str]], scope: CacheScope) -> CacheProbe | None:
+        """Return a probe (with ``result`` set on a hit), or None when caching is bypassed."""
+        if not self.is_enabled_for(scope.namespace):
+            self.stats.bypassed += 1
+            return None
+
+        now = time.monotonic()
+        key, prefix_key = self._keys(messages, scope)
+        probe = CacheProbe(scope=scope, key=key, prefix_key=prefix_key)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._evict(key)
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats.record(scope.namespace, "exact_hits")
+            probe.result = entry.result
+            return probe
+
+        if self.semantic_threshold is not None and scope.query:
+            probe.vector = await self._embed(scope.query)
+            if probe.vector is not None:
+                match = self._semantic_match(prefix_key, probe.vector, now)
+                if match is not None:
+                    self.stats.record(scope.namespace, "semantic_hits")
+                    probe.result = match.result
+                    return probe
+
+        self.stats.record(scope.namespace, "misses")
+        return probe
+
+    def store(self, probe: CacheProbe, result: dict) -> None:
+        """Cache a completed generation for the probed request."""
+        self._evict(probe.key)
+        self._entries[probe.key] = _Entry(
+            result=result,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            prefix_key=probe.prefix_key,
+            vector=probe.vector,
+        )
+        self._by_prefix.setdefault(probe.prefix_key, set()).add(probe.key)
+        self.stats.stores += 1
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_prefix.clear()
+
+    def snapshot(self) -> dict:
+        """Hit/miss counters for the runtime stats endpoint."""
+        s = self.stats
+        lookups = s.exact_hits + s.semantic_hits + s.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "exact_hits": s.exact_hits,
+            "semantic_hits": s.semantic_hits,
+            "misses": s.misses,
+            "bypassed": s.bypassed,
+            "stores": s.stores,
+            "evictions": s.evictions,
+            "hit_ratio": round((s.exact_hits + s.semantic_hits) / lookups, 3) if lookups else 0.0,
+            "per_namespace": s.per_namespace,
+        }
+
+
+def persona_fingerprint(persona: dict | None) -> str | None:
+    """Stable identity for a persona dict (explicit version if present, else content hash)."""
+    if not persona:
+        return None
+    if persona.get("id") is not None and persona.get("version") is not None:
+        return f"{persona['id']}:{persona['version']}"
+    return hashlib.sha256(orjson.dumps(persona, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()[:16]
+
+
+# Global singleton
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = ResponseCache(
+            enabled=settings.llm_cache_enabled,
+            enabled_namespaces=set(settings.llm_cache_agents),
+            max_entries=settings.llm_cache_max_entries,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            semantic_threshold=settings.llm_cache_semantic_threshold,
+            embedding_service=EmbeddingService(),
+        )
+    return _cache
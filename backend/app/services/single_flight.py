@@ -0,0 +1,180 @@
+"""Single-flight coalescing of identical in-flight upstream requests.
+
+When many callers issue the same request at once (e.g. a teacher shares one
+prompt with the whole class), only the first — the leader — goes upstream;
+the rest await the leader's result. Optionally coordinates across workers
+through a Redis lock plus a short-lived result key in ``CacheService``.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import math
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, TypeVar
+
+import orjson
+import structlog
+
+from app.config.settings import get_settings
+from app.services.cache import CacheService, get_cache_service
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+_LOCK_NAMESPACE = "sf_lock"
+_RESULT_NAMESPACE = "sf_result"
+# Extra lock lifetime beyond the wrapped call's timeout (result write, clock skew)
+_LOCK_MARGIN_SECONDS = 5
+
+
+def request_key(*parts: Any) -> str:
+    """Stable hash of the request parameters that determine the upstream result."""
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a request key.
+
+    Args:
+        name: Group name used in stats and Redis keys (e.g. "llm", "embedding").
+        cache: When set, also coalesce across workers via Redis. Results must
+            be JSON-serializable.
+        lock_ttl: Seconds the cross-worker leader lock is held at most; must
+            outlast the wrapped call, or a second worker starts a duplicate.
+        result_ttl: Seconds the leader's result stays readable by followers.
+        poll_interval: Follower polling period while waiting on a remote leader.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        cache: CacheService | None = None,
+        lock_ttl: int = 30,
+        result_ttl: int = 5,
+        poll_interval: float = 0.05,
+    ) -> None:
+        self.name = name
+        self._cache = cache
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+        self.calls = 0
+        self.collapsed = 0
+        self.remote_collapsed = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` once per key among concurrent callers and share its outcome."""
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.collapsed += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._lead(key, fn))
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return await asyncio.shield(future)
+
+    def _finish(self, key: str, future: asyncio.Future[Any]) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            future.exception()
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        if self._cache is None:
+            return await fn()
+        try:
+            return await self._lead_distributed(key, fn)
+        except _RedisUnavailable:
+            return await fn()
+
+    async def _lead_distributed(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        assert self._cache is not None
+        lock_key = f"{self.name}:{key}"
+        # Identifies this leader, so an overrunning leader cannot release its successor's lock
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            async with self._redis_call():
+                acquired = await self._cache.set_nx(_LOCK_NAMESPACE, lock_key, token, ttl=self.lock_ttl)
+
+            if acquired:
+                try:
+                    result = await fn()
+                    encoded = orjson.dumps(result).decode()
+                    await self._cache.set(_RESULT_NAMESPACE, lock_key, encoded, ttl=self.result_ttl)
+                    return result
+                finally:
+                    # Never let a failed unlock replace the leader's outcome; the TTL frees it anyway
+                    try:
+                        await self._cache.delete_if_equal(_LOCK_NAMESPACE, lock_key, token)
+                    except Exception:
+                        logger.warning("single_flight.unlock_failed", group=self.name)
+
+            # Another worker is leading: wait for its result, or take over if its lock lapses
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                async with self._redis_call():
+                    raw = await self._cache.get(_RESULT_NAMESPACE, lock_key)
+                    if raw is not None:
+                        self.remote_collapsed += 1
+                        return raw  # type: ignore[return-value]
+                    lock_held = await self._cache.exists(_LOCK_NAMESPACE, lock_key)
+                if not lock_held:
+                    break
+            else:
+                logger.warning("single_flight.remote_leader_timeout", group=self.name)
+                return await fn()
+
+    @contextlib.asynccontextmanager
+    async def _redis_call(self) -> AsyncIterator[None]:
+        """Turn a Redis error into ``_RedisUnavailable`` so the caller degrades to the in-process path."""
+        try:
+            yield
+        except Exception as exc:
+            logger.warning("single_flight.redis_unavailable", group=self.name)
+            raise _RedisUnavailable from exc
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "remote_collapsed": self.remote_collapsed,
+            "in_flight": len(self._inflight),
+        }
+
+
+class _RedisUnavailable(Exception):
+    pass
+
+
+_groups: dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str, *, timeout: float | None = None) -> SingleFlight:
+    """Process-wide single-flight group by name.
+
+    ``timeout`` is the wrapped call's upstream timeout; the cross-worker lock
+    is held a little longer so it cannot lapse while the leader still waits.
+    """
+    group = _groups.get(name)
+    if group is None:
+        settings = get_settings()
+        cache = get_cache_service() if settings.single_flight_distributed else None
+        group = SingleFlight(name, cache=cache)
+        _groups[name] = group
+    if timeout is not None:
+        group.lock_ttl = max(group.lock_ttl, math.ceil(timeout) + _LOCK_MARGIN_SECONDS)
+    return group
+
+
+def single_flight_stats() -> dict[str, dict]:
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,109 @@
+"""Staged executor — run independent request stages concurrently under one deadline.
+
+Used by ChatService to overlap the pre-LLM stages of a turn (e.g. RAG retrieval
+and history loading) so a turn costs max(stage) instead of sum(stage), while
+recording per-stage wall-clock timings.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class Stage:
+    """One unit of work in a staged fan-out.
+
+    Required stages are not bound by the request deadline, since the turn
+    cannot proceed without them; ``timeout`` caps them separately (the stage
+    then fails with ``TimeoutError``, which propagates like any error).
+    Without it they run unbounded. Optional stages are best-effort: on
+    error, or when the request deadline passes, they are cancelled and
+    resolve to ``default``.
+    """
+
+    name: str
+    work: Awaitable[Any]
+    optional: bool = False
+    default: Any = None
+    timeout: float | None = None
+
+
+class StagedExecutor:
+    """Per-request executor tracking a shared deadline and stage timings (ms)."""
+
+    def __init__(self, deadline_seconds: float) -> None:
+        self._started = time.perf_counter()
+        self._deadline = self._started + deadline_seconds
+        self.timings: dict[str, float] = {}
+        self.timed_out: list[str] = []
+
+    def remaining(self) -> float:
+        """Seconds left before the request deadline (never negative)."""
+        return max(self._deadline - time.perf_counter(), 0.0)
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Record the duration of an inline (usually synchronous) stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    async def _run_timed(self, stage: Stage) -> Any:
+        start = time.perf_counter()
+        try:
+            if stage.timeout is not None:
+                return await asyncio.wait_for(stage.work, stage.timeout)
+            return await stage.work
+        finally:
+            self.timings[stage.name] = round((time.perf_counter() - start) * 1000, 2)
+
+    async def run(self, *stages: Stage) -> dict[str, Any]:
+        """Run stages concurrently; return results keyed by stage name."""
+        tasks = {stage.name: asyncio.ensure_future(self._run_timed(stage)) for stage in stages}
+        optional = [tasks[s.name] for s in stages if s.optional]
+
+        if optional:
+            # Optional stages only get until the deadline
+            await asyncio.wait(optional, timeout=self.remaining())
+
+        results: dict[str, Any] = {}
+        try:
+            for stage in stages:
+                task = tasks[stage.name]
+                if not stage.optional:
+                    results[stage.name] = await task
+                    continue
+
+                if not task.done():
+                    task.cancel()
+                    self.timed_out.append(stage.name)
+                    logger.warning("staged_executor.stage_deadline_exceeded", stage=stage.name)
+                    results[stage.name] = stage.default
+                elif task.cancelled() or task.exception() is not None:
+                    logger.warning(
+                        "staged_executor.optional_stage_failed",
+                        stage=stage.name,
+                        error=None if task.cancelled() else repr(task.exception()),
+                    )
+                    results[stage.name] = stage.default
+                else:
+                    results[stage.name] = task.result()
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return results
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self._started) * 1000, 2)
@@ -3,6 +3,7 @@
 import structlog
 
 from app.config.settings import get_settings
+from app.core.http_pool import get_upstream_pools
 
 logger = structlog.get_logger()
 
@@ -27,7 +28,7 @@ class TTSClient:
 
     def __init__(self, base_url: str | None = None) -> None:
         settings = get_settings()
-        self._base_url = (base_url or getattr(settings, "tts_service_url", "http://localhost:8090")).rstrip("/")
+        self._base_url = (base_url or settings.tts_service_url).rstrip("/")
 
     async def synthesize(
         self,
@@ -42,19 +43,18 @@ class TTSClient:
             speaker: Speaker preset name.
             speed: Speech speed multiplier (0.5-2.0).
         """
-        import httpx
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self._base_url}/api/v1/tts",
-                json={
-                    "text": text,
-                    "speaker": speaker,
-                    "speed": speed,
-                },
-            )
-            response.raise_for_status()
-            audio_data = response.content
+        client = get_upstream_pools().client(self._base_url)
+        response = await client.post(
+            f"{self._base_url}/api/v1/tts",
+            json={
+                "text": text,
+                "speaker": speaker,
+                "speed": speed,
+            },
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        audio_data = response.content
 
         logger.info(
             "tts.synthesized",
@@ -66,9 +66,7 @@ class TTSClient:
 
     async def get_speakers(self) -> list[str]:
         """List available speaker presets."""
-        import httpx
-
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{self._base_url}/api/v1/speakers")
-            response.raise_for_status()
-            return response.json().get("speakers", [])
+        client = get_upstream_pools().client(self._base_url)
+        response = await client.get(f"{self._base_url}/api/v1/speakers", timeout=10.0)
+        response.raise_for_status()
+        return response.json().get("speakers", [])
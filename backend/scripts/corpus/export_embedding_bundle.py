@@ -0,0 +1,119 @@
+"""Build a portable precomputed-embedding bundle of the knowledge corpus.
+
+The bundle (see ``app.services.embedding_bundle``) is embedded once and then
+loaded by ``import_knowledge --bundle`` in every other environment without
+re-embedding. It is built either from a chunk JSONL file (embedding it here)
+or from the vectors already stored in Milvus.
+
+Usage:
+    python -m scripts.corpus.export_embedding_bundle dist/math-bundle --chunks data/corpus/math/knowledge_chunks.jsonl
+    python -m scripts.corpus.export_embedding_bundle dist/all-bundle --from-milvus
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+# Add backend root to sys.path so app modules are importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+logger = structlog.get_logger()
+
+
+async def bundle_from_chunks(
+    directory: Path,
+    chunks_file: Path,
+    *,
+    batch_size: int = 32,
+    model: str | None = None,
+    embedder=None,
+) -> dict:
+    """Embed every chunk in ``chunks_file`` and write the bundle; returns its manifest."""
+    from app.services.embedding_bundle import BUNDLE_FIELDS, write_bundle
+    from app.services.embedding_service import DEFAULT_EMBEDDING_MODEL, EmbeddingService
+    from scripts.corpus.import_knowledge import iter_chunks
+
+    model = model or DEFAULT_EMBEDDING_MODEL
+    embedder = embedder or EmbeddingService()
+    meta: dict[str, list] = {field: [] for field in BUNDLE_FIELDS}
+    blocks: list[np.ndarray] = []
+    batch: list[dict] = []
+
+    async def embed_batch() -> None:
+        vectors = await embedder.embed([c["content"] for c in batch], model=model)
+        blocks.append(np.asarray(vectors, dtype=np.float16))
+        for chunk in batch:
+            for field in BUNDLE_FIELDS:
+                meta[field].append(chunk.get(field) or "")
+        logger.info("bundle_embedded", rows=len(meta["id"]))
+
+    for chunk in iter_chunks(chunks_file):
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            await embed_batch()
+            batch = []
+    if batch:
+        await embed_batch()
+
+    vectors = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float16)
+    manifest = write_bundle(directory, vectors, meta, model=model)
+    logger.info("bundle_written", path=str(directory), count=manifest["count"], dim=manifest["dim"], model=model)
+    return manifest
+
+
+def bundle_from_milvus(directory: Path, *, batch_size: int = 1000, model: str | None = None) -> dict:
+    """Page through ``knowledge_base`` and write its stored vectors as a bundle; returns the manifest."""
+    from app.services.embedding_bundle import BUNDLE_FIELDS, write_bundle
+    from app.services.embedding_service import DEFAULT_EMBEDDING_MODEL
+    from app.services.milvus_client import connect_milvus, ensure_knowledge_collection
+
+    model = model or DEFAULT_EMBEDDING_MODEL
+    connect_milvus()
+    collection = ensure_knowledge_collection()
+    collection.load()
+
+    blocks: list[np.ndarray] = []
+    meta: dict[str, list] = {field: [] for field in BUNDLE_FIELDS}
+    iterator = collection.query_iterator(batch_size=batch_size, output_fields=[*BUNDLE_FIELDS, "embedding"])
+    try:
+        while rows := iterator.next():
+            blocks.append(np.asarray([row["embedding"] for row in rows], dtype=np.float16))
+            for row in rows:
+                for field in BUNDLE_FIELDS:
+                    meta[field].append(row.get(field) or "")
+            logger.info("bundle_page", exported=len(meta["id"]))
+    finally:
+        iterator.close()
+
+    vectors = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float16)
+    manifest = write_bundle(directory, vectors, meta, model=model)
+    logger.info("bundle_written", path=str(directory), count=manifest["count"], dim=manifest["dim"], model=model)
+    return manifest
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a precomputed-embedding bundle of the knowledge corpus")
+    parser.add_argument("directory", type=Path, help="Output bundle directory")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--chunks", type=Path, help="Embed this knowledge_chunks.jsonl file")
+    source.add_argument("--from-milvus", action="store_true", help="Export the vectors stored in Milvus")
+    parser.add_argument("--batch-size", type=int, default=None, help="Embedding batch / Milvus page size")
+    parser.add_argument("--model", default=None, help="Embedding model tag (default: the service default)")
+    args = parser.parse_args()
+
+    if args.chunks is not None:
+        if not args.chunks.exists():
+            print(f"Error: File not found: {args.chunks}")
+            sys.exit(1)
+        asyncio.run(bundle_from_chunks(args.directory, args.chunks, batch_size=args.batch_size or 32, model=args.model))
+    else:
+        bundle_from_milvus(args.directory, batch_size=args.batch_size or 1000, model=args.model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Export the Milvus knowledge base into a local vector index snapshot.
+
+The snapshot backs ``LocalVectorIndex`` — the embedded retrieval engine used
+as a Milvus failover, or as the primary engine with ``VECTOR_ENGINE=local``.
+
+Usage:
+    python -m scripts.corpus.export_vector_snapshot data/index/knowledge
+    python -m scripts.corpus.export_vector_snapshot data/index/knowledge --graph-threshold 20000
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+# Add backend root to sys.path so app modules are importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+logger = structlog.get_logger()
+
+
+def export_snapshot(
+    directory: Path,
+    *,
+    batch_size: int = 1000,
+    graph_threshold: int | None = None,
+    neighbors: int | None = None,
+) -> dict:
+    """Page through ``knowledge_base`` and write a snapshot to ``directory``.
+
+    Returns:
+        The written manifest (count, dim, kind).
+    """
+    from app.services.local_vector_index import (
+        DEFAULT_GRAPH_THRESHOLD,
+        DEFAULT_NEIGHBORS,
+        SNAPSHOT_FIELDS,
+        write_snapshot,
+    )
+    from app.services.milvus_client import connect_milvus, ensure_knowledge_collection
+
+    connect_milvus()
+    collection = ensure_knowledge_collection()
+    collection.load()
+
+    vectors: list[list[float]] = []
+    meta: dict[str, list] = {field: [] for field in SNAPSHOT_FIELDS}
+    iterator = collection.query_iterator(batch_size=batch_size, output_fields=[*SNAPSHOT_FIELDS, "embedding"])
+    try:
+        while rows := iterator.next():
+            for row in rows:
+                vectors.append(row["embedding"])
+                for field in SNAPSHOT_FIELDS:
+                    meta[field].append(row.get(field) or "")
+            logger.info("snapshot_page", exported=len(vectors))
+    finally:
+        iterator.close()
+
+    manifest = write_snapshot(
+        directory,
+        np.asarray(vectors, dtype=np.float32),
+        meta,
+        graph_threshold=graph_threshold if graph_threshold is not None else DEFAULT_GRAPH_THRESHOLD,
+        neighbors=neighbors or DEFAULT_NEIGHBORS,
+    )
+    logger.info("snapshot_written", path=str(directory), **manifest)
+    return manifest
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export Milvus knowledge_base to a local vector index snapshot")
+    parser.add_argument("directory", type=Path, help="Output snapshot directory")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched per Milvus page")
+    parser.add_argument("--graph-threshold", type=int, default=None, help="Build a k-NN graph above this many rows")
+    parser.add_argument("--neighbors", type=int, default=None, help="Graph out-degree")
+    args = parser.parse_args()
+
+    export_snapshot(
+        args.directory, batch_size=args.batch_size, graph_threshold=args.graph_threshold, neighbors=args.neighbors,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,60 @@
 """Unified CLI to validate and import a complete corpus directory.
 
 Orchestrates the full pipeline: validate → import knowledge → import graph → import exercises.
+With ``--sync`` only records changed since the last import are re-imported
+(see ``import_manifest``).
 
 Usage:
     python -m scripts.corpus.import_all data/corpus/math/
     python -m scripts.corpus.import_all data/corpus/math/ --dry-run
     python -m scripts.corpus.import_all data/corpus/math/ --skip-validation
+    python -m scripts.corpus.import_all data/corpus/math/ --sync
 """
 
 import asyncio
 import sys
+from collections.abc import Collection
 from pathlib import Path
 
 import structlog
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from scripts.corpus.import_exercises import import_exercises
-from scripts.corpus.import_graph import import_graph
-from scripts.corpus.import_knowledge import import_chunks
+from scripts.corpus.import_exercises import import_exercises, load_exercises
+from scripts.corpus.import_graph import graph_key, import_graph, load_graph_data
+from scripts.corpus.import_knowledge import delete_chunks, import_chunks, iter_chunks
+from scripts.corpus.import_manifest import MANIFEST_NAME, SECTIONS, ImportManifest, ManifestDiff, content_hash
 from scripts.corpus.validate_corpus import CorpusValidator
 
 logger = structlog.get_logger()
 
 
+def current_hashes(corpus_dir: Path) -> dict[str, dict[str, str]]:
+    """Content hash per record of each corpus file in ``corpus_dir``; an absent file has no records."""
+    hashes: dict[str, dict[str, str]] = {section: {} for section in SECTIONS}
+    chunks_file = corpus_dir / "knowledge_chunks.jsonl"
+    if chunks_file.exists():
+        hashes["chunks"] = {c["id"]: content_hash(c) for c in iter_chunks(chunks_file)}
+    graph_file = corpus_dir / "knowledge_graph.jsonl"
+    if graph_file.exists():
+        hashes["graph"] = {
+            graph_key(category, item): content_hash(item)
+            for category, items in load_graph_data(graph_file).items()
+            for item in items
+        }
+    exercises_file = corpus_dir / "exercises.jsonl"
+    if exercises_file.exists():
+        hashes["exercises"] = {ex["id"]: content_hash(ex) for ex in load_exercises(exercises_file)}
+    return hashes
+
+
 async def run_pipeline(
     corpus_dir: Path,
     *,
     dry_run: bool = False,
     skip_validation: bool = False,
     batch_size: int = 20,
+    sync: bool = False,
 ) -> bool:
     """Run the full corpus import pipeline.
 
@@ -39,13 +64,30 @@ async def run_pipeline(
     3. Import knowledge graph → Neo4j
     4. Import exercises → Neo4j (linked to knowledge points)
 
+    Every successful live step records its records' content hashes in the
+    corpus manifest. With ``sync`` only records whose hash changed since then
+    are imported and records that disappeared (or whose whole file was
+    deleted) are deleted; an unchanged corpus is a no-op. Records a step
+    could not write are left out of the manifest so the next sync retries them.
+
     Returns True if all steps succeeded.
     """
     print("=" * 60)
     print(f"Corpus Import Pipeline: {corpus_dir}")
-    print(f"Mode: {'DRY RUN' if dry_run else 'LIVE IMPORT'}")
+    print(f"Mode: {'DRY RUN' if dry_run else 'LIVE IMPORT'}{' (sync)' if sync else ''}")
     print("=" * 60)
 
+    manifest = ImportManifest(corpus_dir / MANIFEST_NAME)
+    hashes = current_hashes(corpus_dir)
+    diffs: dict[str, ManifestDiff] = {}
+    if sync:
+        diffs = {section: manifest.diff(section, current) for section, current in hashes.items()}
+        for section, diff in diffs.items():
+            print(f"  {section}: {diff.summary()}")
+        if not any(diffs.values()):
+            print("\nCorpus unchanged since the last import; nothing to do.")
+            return True
+
     # Step 1: Validation
     if not skip_validation:
         print("\n[1/4] Validating corpus files...")
@@ -59,39 +101,84 @@ async def run_pipeline(
     else:
         print("\n[1/4] Validation skipped.")
 
+    def record(section: str, pending: Collection[str] = ()) -> None:
+        if not dry_run:
+            manifest.update(section, hashes[section], pending=pending)
+
+    def wanted(section: str, path: Path) -> bool:
+        # A corpus file deleted since the last import still has its records removed
+        return bool(diffs[section]) if sync else path.exists()
+
+    success = True
+
     # Step 2: Knowledge chunks → Milvus
     chunks_file = corpus_dir / "knowledge_chunks.jsonl"
-    if chunks_file.exists():
+    if wanted("chunks", chunks_file):
         print("\n[2/4] Importing knowledge chunks → Milvus...")
-        result = await import_chunks(chunks_file, batch_size=batch_size, dry_run=dry_run)
+        diff = diffs.get("chunks")
+        result: dict = {"imported": 0, "failed": 0}
+        if chunks_file.exists():
+            result = await import_chunks(
+                chunks_file,
+                batch_size=batch_size,
+                dry_run=dry_run,
+                only_ids=diff.changed if diff is not None else None,
+                upsert=diff is not None,
+            )
+        if diff is not None and diff.removed and not dry_run:
+            result["removed"] = await delete_chunks(sorted(diff.removed))
         print(f"  Result: {result}")
         if result.get("failed"):
             print("  WARNING: Some chunks failed to import.")
+            success = False
+        else:
+            record("chunks")
     else:
-        print("\n[2/4] No knowledge_chunks.jsonl found, skipping Milvus import.")
+        print("\n[2/4] No knowledge chunk changes, skipping Milvus import.")
 
     # Step 3: Knowledge graph → Neo4j
     graph_file = corpus_dir / "knowledge_graph.jsonl"
-    if graph_file.exists():
+    if wanted("graph", graph_file):
         print("\n[3/4] Importing knowledge graph → Neo4j...")
-        result = await import_graph(graph_file, dry_run=dry_run)
+        diff = diffs.get("graph")
+        result = await import_graph(
+            graph_file,
+            dry_run=dry_run,
+            only=diff.changed if diff is not None else None,
+            remove=diff.removed if diff is not None else None,
+        )
         print(f"  Result: {result}")
+        if result.get("unmatched"):
+            # Rows whose endpoints are missing wrote nothing; retry the section on the next sync
+            print("  WARNING: Some graph records matched no existing node; not recording them as imported.")
+            success = False
+        else:
+            record("graph")
     else:
-        print("\n[3/4] No knowledge_graph.jsonl found, skipping graph import.")
+        print("\n[3/4] No knowledge graph changes, skipping graph import.")
 
     # Step 4: Exercises → Neo4j
     exercises_file = corpus_dir / "exercises.jsonl"
-    if exercises_file.exists():
+    if wanted("exercises", exercises_file):
         print("\n[4/4] Importing exercises → Neo4j...")
-        result = await import_exercises(exercises_file, dry_run=dry_run)
+        diff = diffs.get("exercises")
+        result = await import_exercises(
+            exercises_file,
+            dry_run=dry_run,
+            only=diff.changed if diff is not None else None,
+            remove=diff.removed if diff is not None else None,
+        )
+        skipped_ids = set(result.pop("skipped_ids", ()))
         print(f"  Result: {result}")
+        # Exercises whose knowledge point is missing are retried on the next sync
+        record("exercises", pending=skipped_ids)
     else:
-        print("\n[4/4] No exercises.jsonl found, skipping exercise import.")
+        print("\n[4/4] No exercise changes, skipping exercise import.")
 
     print("\n" + "=" * 60)
-    print("Pipeline complete.")
+    print("Pipeline complete." if success else "Pipeline finished with failures.")
     print("=" * 60)
-    return True
+    return success
 
 
 def main() -> None:
@@ -102,6 +189,7 @@ def main() -> None:
     parser.add_argument("--dry-run", action="store_true", help="Validate and preview without importing")
     parser.add_argument("--skip-validation", action="store_true", help="Skip validation step")
     parser.add_argument("--batch-size", type=int, default=20, help="Embedding batch size for Milvus")
+    parser.add_argument("--sync", action="store_true", help="Only import records changed since the last import")
     args = parser.parse_args()
 
     if not args.corpus_dir.is_dir():
@@ -114,6 +202,7 @@ def main() -> None:
             dry_run=args.dry_run,
             skip_validation=args.skip_validation,
             batch_size=args.batch_size,
+            sync=args.sync,
         )
     )
     sys.exit(0 if success else 1)
@@ -3,15 +3,20 @@
 Reads JSONL files containing exercises and attaches them to the corresponding
 KnowledgePoint nodes via HAS_EXERCISE edges.
 
+Exercises without an explicit id get one derived from their content. Older
+imports assigned random ``ex-<8 hex>`` ids instead; every live import deletes
+those legacy nodes first (unless the corpus file still names them), so the
+first re-import replaces them rather than adding a second copy.
+
 Usage:
     python -m scripts.corpus.import_exercises data/corpus/math/exercises.jsonl
     python -m scripts.corpus.import_exercises data/corpus/math/exercises.jsonl --dry-run
 """
 
 import asyncio
+import hashlib
 import json
 import sys
-import uuid
 from pathlib import Path
 
 import structlog
@@ -21,6 +26,12 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 logger = structlog.get_logger()
 
 
+def exercise_id(item: dict) -> str:
+    """Stable id for an exercise without one, so re-imports update it instead of adding a copy."""
+    digest = hashlib.sha1(f"{item['knowledge_point']}\n{item['content']}".encode()).hexdigest()[:12]
+    return f"ex-{digest}"
+
+
 def load_exercises(filepath: Path) -> list[dict]:
     """Load exercises from JSONL file."""
     exercises = []
@@ -35,17 +46,91 @@ def load_exercises(filepath: Path) -> list[dict]:
                     if field not in item:
                         raise ValueError(f"Missing required field: {field}")
                 if "id" not in item:
-                    item["id"] = f"ex-{uuid.uuid4().hex[:8]}"
+                    item["id"] = exercise_id(item)
                 exercises.append(item)
             except (json.JSONDecodeError, ValueError) as e:
                 logger.warning("skip_invalid_line", lineno=lineno, error=str(e))
     return exercises
 
 
-async def import_exercises(filepath: Path, *, dry_run: bool = False) -> dict:
-    """Import exercises from JSONL into Neo4j."""
-    exercises = load_exercises(filepath)
-    if not exercises:
+EXERCISE_QUERY = """
+UNWIND $rows AS row
+MATCH (kp:KnowledgePoint {name: row.kp_name})
+MERGE (ex:Exercise {id: row.id})
+SET ex.content = row.content,
+    ex.answer = row.answer,
+    ex.explanation = row.explanation,
+    ex.difficulty = row.difficulty,
+    ex.type = row.type
+MERGE (kp)-[:HAS_EXERCISE]->(ex)
+// One row per node pair from here on; ``matched`` keeps the count of input rows behind it
+WITH kp, ex, count(*) AS matched
+CALL {
+    WITH kp, ex
+    // An exercise re-pointed to another knowledge point leaves its old link
+    OPTIONAL MATCH (other:KnowledgePoint)-[stale:HAS_EXERCISE]->(ex)
+    WHERE other <> kp
+    DELETE stale
+}
+RETURN sum(matched) AS written
+"""
+
+# Exercises imported before ids were content-derived got a random ``ex-<8 hex>`` id, which no
+# corpus record maps to any more; ids still present in the corpus file are kept
+LEGACY_CLEANUP_QUERY = """
+MATCH (ex:Exercise)
+WHERE ex.id =~ 'ex-[0-9a-f]{8}' AND NOT ex.id IN $keep
+DETACH DELETE ex
+RETURN count(*) AS written
+"""
+
+REMOVE_QUERY = """
+UNWIND $rows AS row
+MATCH (ex:Exercise {id: row.id})
+DETACH DELETE ex
+RETURN count(*) AS written
+"""
+
+
+def exercise_rows(exercises: list[dict]) -> list[dict]:
+    """UNWIND parameter rows for ``EXERCISE_QUERY``."""
+    return [
+        {
+            "kp_name": ex["knowledge_point"],
+            "id": ex["id"],
+            "content": ex["content"],
+            "answer": ex["answer"],
+            "explanation": ex.get("explanation", ""),
+            "difficulty": ex.get("difficulty", 3),
+            "type": ex.get("type", "solution"),
+        }
+        for ex in exercises
+    ]
+
+
+async def import_exercises(
+    filepath: Path,
+    *,
+    dry_run: bool = False,
+    batch_size: int = 500,
+    retries: int = 3,
+    only: set[str] | None = None,
+    remove: set[str] | None = None,
+) -> dict:
+    """Import exercises from JSONL into Neo4j (batched ``UNWIND`` transactions).
+
+    ``only`` and ``remove`` (exercise ids) restrict the import to changed
+    exercises and delete dropped ones, for incremental sync. A missing
+    ``filepath`` counts as an empty corpus file, so only ``remove`` applies.
+    The summary's ``skipped_ids`` lists exercises left out because their
+    knowledge point is not in the graph yet.
+    """
+    exercises = load_exercises(filepath) if filepath.exists() else []
+    total = len(exercises)
+    corpus_ids = [ex["id"] for ex in exercises]
+    if only is not None:
+        exercises = [ex for ex in exercises if ex["id"] in only]
+    if not total and not remove:
         logger.error("no_exercises_loaded", filepath=str(filepath))
         return {"total": 0, "imported": 0}
 
@@ -65,50 +150,47 @@ async def import_exercises(filepath: Path, *, dry_run: bool = False) -> dict:
     from app.services.neo4j_client import KnowledgeGraphClient
 
     client = KnowledgeGraphClient()
-    imported = 0
-    skipped = 0
 
     try:
+        await client.ensure_schema()
+        removed = 0
+        if remove:
+            removed = await client.write_batches(
+                REMOVE_QUERY, [{"id": i} for i in sorted(remove)], batch_size=batch_size, retries=retries,
+            )
+        # One lookup for every target KnowledgePoint instead of one per exercise
+        names = sorted({ex["knowledge_point"] for ex in exercises})
         async with client.driver.session() as session:
-            for ex in exercises:
-                # Check that the target KnowledgePoint exists
-                check = await session.run(
-                    "MATCH (kp:KnowledgePoint {name: $name}) RETURN kp.name AS name",
-                    name=ex["knowledge_point"],
-                )
-                record = await check.single()
-                if not record:
-                    logger.warning("knowledge_point_not_found", name=ex["knowledge_point"], exercise_id=ex["id"])
-                    skipped += 1
-                    continue
-
-                await session.run(
-                    """
-                    MATCH (kp:KnowledgePoint {name: $kp_name})
-                    MERGE (ex:Exercise {id: $id})
-                    SET ex.content = $content,
-                        ex.answer = $answer,
-                        ex.explanation = $explanation,
-                        ex.difficulty = $difficulty,
-                        ex.type = $type
-                    MERGE (kp)-[:HAS_EXERCISE]->(ex)
-                    """,
-                    kp_name=ex["knowledge_point"],
-                    id=ex["id"],
-                    content=ex["content"],
-                    answer=ex["answer"],
-                    explanation=ex.get("explanation", ""),
-                    difficulty=ex.get("difficulty", 3),
-                    type=ex.get("type", "solution"),
-                )
-                imported += 1
-                logger.info("exercise_imported", id=ex["id"], kp=ex["knowledge_point"])
+            result = await session.run(LEGACY_CLEANUP_QUERY, keep=corpus_ids)
+            legacy_removed = (await result.single())["written"]
+            if legacy_removed:
+                logger.info("legacy_exercises_removed", count=legacy_removed)
+            result = await session.run(
+                "MATCH (kp:KnowledgePoint) WHERE kp.name IN $names RETURN kp.name AS name", names=names,
+            )
+            known = {record["name"] async for record in result}
+
+        linked = []
+        for ex in exercises:
+            if ex["knowledge_point"] in known:
+                linked.append(ex)
+            else:
+                logger.warning("knowledge_point_not_found", name=ex["knowledge_point"], exercise_id=ex["id"])
+        imported = await client.write_batches(
+            EXERCISE_QUERY, exercise_rows(linked), batch_size=batch_size, retries=retries,
+        )
     finally:
         await client.close()
 
-    summary = {"total": len(exercises), "imported": imported, "skipped": skipped}
+    summary = {
+        "total": total,
+        "imported": imported,
+        "skipped": len(exercises) - len(linked),
+        "removed": removed + legacy_removed,
+    }
     logger.info("exercise_import_complete", **summary)
-    return summary
+    linked_ids = {ex["id"] for ex in linked}
+    return {**summary, "skipped_ids": sorted(ex["id"] for ex in exercises if ex["id"] not in linked_ids)}
 
 
 def main() -> None:
@@ -117,13 +199,17 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Import exercises into Neo4j")
     parser.add_argument("filepath", type=Path, help="Path to JSONL file with exercises")
     parser.add_argument("--dry-run", action="store_true", help="Validate without importing")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per UNWIND transaction")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per batch on transient Neo4j errors")
     args = parser.parse_args()
 
     if not args.filepath.exists():
         print(f"Error: File not found: {args.filepath}")
         sys.exit(1)
 
-    asyncio.run(import_exercises(args.filepath, dry_run=args.dry_run))
+    asyncio.run(
+        import_exercises(args.filepath, dry_run=args.dry_run, batch_size=args.batch_size, retries=args.retries)
+    )
 
 
 if __name__ == "__main__":
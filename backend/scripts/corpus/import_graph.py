@@ -44,16 +44,179 @@ def load_graph_data(filepath: Path) -> dict[str, list[dict]]:
     return data
 
 
-async def import_graph(filepath: Path, *, dry_run: bool = False) -> dict:
+SUBJECT_QUERY = """
+UNWIND $rows AS row
+MERGE (s:Subject {name: row.name})
+SET s.description = row.description
+RETURN count(*) AS written
+"""
+
+CHAPTER_QUERY = """
+UNWIND $rows AS row
+MATCH (s:Subject {name: row.subject})
+MERGE (c:Chapter {name: row.name, subject: row.subject})
+SET c.order = row.order
+MERGE (s)-[:HAS_CHAPTER]->(c)
+RETURN count(*) AS written
+"""
+
+KNOWLEDGE_POINT_QUERY = """
+UNWIND $rows AS row
+MATCH (c:Chapter {name: row.chapter, subject: row.subject})
+MERGE (kp:KnowledgePoint {name: row.name})
+SET kp.description = row.description,
+    kp.difficulty = row.difficulty,
+    kp.importance = row.importance,
+    kp.aliases = row.aliases
+MERGE (c)-[:CONTAINS]->(kp)
+// One row per node pair from here on; ``matched`` keeps the count of input rows behind it
+WITH c, kp, count(*) AS matched
+CALL {
+    WITH c, kp
+    // A knowledge point moved to another chapter leaves its old CONTAINS edge behind
+    OPTIONAL MATCH (old:Chapter)-[stale:CONTAINS]->(kp)
+    WHERE old <> c
+    DELETE stale
+}
+CALL {
+    WITH kp
+    // Outgoing edges are re-created from the current record in the edge stages
+    OPTIONAL MATCH (kp)-[edge:PREREQUISITE|RELATED_TO]->()
+    DELETE edge
+}
+RETURN sum(matched) AS written
+"""
+
+# Relationship types can't be parameters, so one query per edge type
+EDGE_QUERIES = {
+    rel: f"""
+UNWIND $rows AS row
+MATCH (a:KnowledgePoint {{name: row.src}})
+MATCH (b:KnowledgePoint {{name: row.dst}})
+MERGE (a)-[:{rel}]->(b)
+RETURN count(*) AS written
+"""
+    for rel in ("PREREQUISITE", "RELATED_TO")
+}
+
+# Deletions for records dropped from the corpus, children first
+REMOVE_QUERIES = {
+    "knowledge_point": """
+UNWIND $rows AS row
+MATCH (kp:KnowledgePoint {name: row.name})
+DETACH DELETE kp
+RETURN count(*) AS written
+""",
+    "chapter": """
+UNWIND $rows AS row
+MATCH (c:Chapter {name: row.name, subject: row.subject})
+DETACH DELETE c
+RETURN count(*) AS written
+""",
+    "subject": """
+UNWIND $rows AS row
+MATCH (s:Subject {name: row.name})
+DETACH DELETE s
+RETURN count(*) AS written
+""",
+}
+
+
+def graph_key(category: str, item: dict) -> str:
+    """Identity of a graph record in the import manifest (chapters are unique per subject)."""
+    if category == "chapter":
+        return json.dumps([category, item.get("subject"), item.get("name")], ensure_ascii=False)
+    return json.dumps([category, item.get("name")], ensure_ascii=False)
+
+
+def removal_rows(keys: set[str]) -> dict[str, list[dict]]:
+    """``REMOVE_QUERIES`` parameter rows for manifest keys that left the corpus."""
+    rows: dict[str, list[dict]] = {category: [] for category in REMOVE_QUERIES}
+    for key in sorted(keys):
+        category, *ident = json.loads(key)
+        if category == "chapter":
+            rows[category].append({"subject": ident[0], "name": ident[1]})
+        else:
+            rows[category].append({"name": ident[0]})
+    return rows
+
+
+def graph_rows(data: dict[str, list[dict]], only: set[str] | None = None) -> dict[str, list[dict]]:
+    """UNWIND parameter rows per write stage, in dependency order.
+
+    With ``only`` (manifest keys), just those records are written, plus every
+    edge that starts or ends at one of the written knowledge points.
+    """
+
+    def wanted(category: str, item: dict) -> bool:
+        return only is None or graph_key(category, item) in only
+
+    all_points = data["knowledge_point"]
+    points = [kp for kp in all_points if wanted("knowledge_point", kp)]
+    touched = {kp["name"] for kp in points}
+
+    def edges(field: str) -> list[dict]:
+        return [
+            {"src": kp["name"], "dst": dst}
+            for kp in all_points
+            for dst in kp.get(field, [])
+            if only is None or kp["name"] in touched or dst in touched
+        ]
+
+    return {
+        "subjects": [
+            {"name": s["name"], "description": s.get("description", "")}
+            for s in data["subject"]
+            if wanted("subject", s)
+        ],
+        "chapters": [
+            {"name": ch["name"], "subject": ch["subject"], "order": ch.get("order", 0)}
+            for ch in data["chapter"]
+            if wanted("chapter", ch)
+        ],
+        "knowledge_points": [
+            {
+                "name": kp["name"],
+                "chapter": kp["chapter"],
+                "subject": kp["subject"],
+                "description": kp.get("description", ""),
+                "difficulty": kp.get("difficulty", 1),
+                "importance": kp.get("importance", 3),
+                "aliases": kp.get("aliases", []),
+            }
+            for kp in points
+        ],
+        "PREREQUISITE": edges("prerequisites"),
+        "RELATED_TO": edges("related"),
+    }
+
+
+async def import_graph(
+    filepath: Path,
+    *,
+    dry_run: bool = False,
+    batch_size: int = 500,
+    retries: int = 3,
+    only: set[str] | None = None,
+    remove: set[str] | None = None,
+) -> dict:
     """Import knowledge graph from JSONL into Neo4j.
 
-    Processing order:
+    ``only`` and ``remove`` (``graph_key`` values) restrict the import to
+    changed records and delete dropped ones, for incremental sync. A missing
+    ``filepath`` counts as an empty corpus file, so only ``remove`` applies.
+
+    Processing order (each stage as batched ``UNWIND`` transactions):
+    0. Ensure constraints/indexes on the MERGE keys; delete removed records
     1. Create Subject nodes
     2. Create Chapter nodes + HAS_CHAPTER edges
     3. Create KnowledgePoint nodes + CONTAINS edges
     4. Create PREREQUISITE and RELATED_TO edges
     """
-    data = load_graph_data(filepath)
+    if filepath.exists():
+        data = load_graph_data(filepath)
+    else:
+        data = {"subject": [], "chapter": [], "knowledge_point": []}
     total = sum(len(v) for v in data.values())
     logger.info(
         "graph_data_loaded",
@@ -70,87 +233,47 @@ async def import_graph(filepath: Path, *, dry_run: bool = False) -> dict:
 
     from app.services.neo4j_client import KnowledgeGraphClient
 
+    rows = graph_rows(data, only)
+    removals = removal_rows(remove or set())
+    stages = [
+        ("subjects", SUBJECT_QUERY),
+        ("chapters", CHAPTER_QUERY),
+        ("knowledge_points", KNOWLEDGE_POINT_QUERY),
+        *EDGE_QUERIES.items(),
+    ]
     client = KnowledgeGraphClient()
-    created = 0
+    written: dict[str, int] = {}
+    removed = unmatched = 0
 
     try:
-        async with client.driver.session() as session:
-            # 1. Create Subjects
-            for s in data["subject"]:
-                await session.run(
-                    "MERGE (s:Subject {name: $name}) SET s.description = $desc",
-                    name=s["name"],
-                    desc=s.get("description", ""),
-                )
-                created += 1
-                logger.info("created_subject", name=s["name"])
-
-            # 2. Create Chapters with HAS_CHAPTER edges
-            for ch in data["chapter"]:
-                await session.run(
-                    """
-                    MATCH (s:Subject {name: $subject})
-                    MERGE (c:Chapter {name: $name, subject: $subject})
-                    SET c.order = $order
-                    MERGE (s)-[:HAS_CHAPTER]->(c)
-                    """,
-                    name=ch["name"],
-                    subject=ch["subject"],
-                    order=ch.get("order", 0),
-                )
-                created += 1
-                logger.info("created_chapter", name=ch["name"], subject=ch["subject"])
-
-            # 3. Create KnowledgePoints with CONTAINS edges
-            for kp in data["knowledge_point"]:
-                await session.run(
-                    """
-                    MATCH (c:Chapter {name: $chapter, subject: $subject})
-                    MERGE (kp:KnowledgePoint {name: $name})
-                    SET kp.description = $description,
-                        kp.difficulty = $difficulty,
-                        kp.importance = $importance
-                    MERGE (c)-[:CONTAINS]->(kp)
-                    """,
-                    name=kp["name"],
-                    chapter=kp["chapter"],
-                    subject=kp["subject"],
-                    description=kp.get("description", ""),
-                    difficulty=kp.get("difficulty", 1),
-                    importance=kp.get("importance", 3),
+        await client.ensure_schema()
+        for category, query in REMOVE_QUERIES.items():
+            if removals[category]:
+                removed += await client.write_batches(
+                    query, removals[category], batch_size=batch_size, retries=retries,
                 )
-                created += 1
-                logger.info("created_knowledge_point", name=kp["name"])
-
-            # 4. Create PREREQUISITE and RELATED_TO edges
-            for kp in data["knowledge_point"]:
-                for prereq_name in kp.get("prerequisites", []):
-                    await session.run(
-                        """
-                        MATCH (kp:KnowledgePoint {name: $name})
-                        MATCH (prereq:KnowledgePoint {name: $prereq})
-                        MERGE (kp)-[:PREREQUISITE]->(prereq)
-                        """,
-                        name=kp["name"],
-                        prereq=prereq_name,
-                    )
-                    logger.debug("created_prerequisite", from_=kp["name"], to=prereq_name)
-
-                for related_name in kp.get("related", []):
-                    await session.run(
-                        """
-                        MATCH (kp:KnowledgePoint {name: $name})
-                        MATCH (rel:KnowledgePoint {name: $related})
-                        MERGE (kp)-[:RELATED_TO]->(rel)
-                        """,
-                        name=kp["name"],
-                        related=related_name,
-                    )
-                    logger.debug("created_related", from_=kp["name"], to=related_name)
+        for stage, query in stages:
+            written[stage] = await client.write_batches(query, rows[stage], batch_size=batch_size, retries=retries)
+            missed = len(rows[stage]) - written[stage]
+            unmatched += missed
+            logger.info("graph_stage_imported", stage=stage, written=written[stage], unmatched=missed)
     finally:
         await client.close()
 
-    summary = {"total": total, "created": created}
+    # Graph-enriched retrievals cached before this import are now stale
+    from app.services.corpus_version import bump_corpus_version
+
+    await bump_corpus_version()
+
+    created = written["subjects"] + written["chapters"] + written["knowledge_points"]
+    summary = {
+        "total": total,
+        "created": created,
+        "removed": removed,
+        "prerequisites": written["PREREQUISITE"],
+        "related": written["RELATED_TO"],
+        "unmatched": unmatched,
+    }
     logger.info("graph_import_complete", **summary)
     return summary
 
@@ -161,13 +284,15 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Import knowledge graph into Neo4j")
     parser.add_argument("filepath", type=Path, help="Path to JSONL file with graph data")
     parser.add_argument("--dry-run", action="store_true", help="Validate without importing")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per UNWIND transaction")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per batch on transient Neo4j errors")
     args = parser.parse_args()
 
     if not args.filepath.exists():
         print(f"Error: File not found: {args.filepath}")
         sys.exit(1)
 
-    asyncio.run(import_graph(args.filepath, dry_run=args.dry_run))
+    asyncio.run(import_graph(args.filepath, dry_run=args.dry_run, batch_size=args.batch_size, retries=args.retries))
 
 
 if __name__ == "__main__":
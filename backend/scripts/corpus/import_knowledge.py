@@ -3,28 +3,61 @@
 Reads JSONL files containing knowledge chunks, generates embeddings via
 the embedding service, and inserts them into Milvus for semantic search.
 
+The import is a streaming pipeline joined by bounded queues, so memory stays
+flat and a slow stage applies backpressure to the ones before it:
+
+    reader (JSONL lines → embed batches)
+      → N embedding workers
+      → writer (bulk Milvus inserts, one flush at the end)
+
+Every inserted id is appended, with its content hash, to a checkpoint file
+next to the input; a restarted import skips chunks whose id and content both
+match a checkpoint entry (an edited chunk is re-imported), and the checkpoint is removed once a run
+finishes without failures.
+
+``--bundle`` skips the pipeline altogether: a precomputed embedding bundle
+(``export_embedding_bundle``) is bulk-loaded into Milvus or a local vector
+index snapshot without calling the embedding service.
+
 Usage:
     python -m scripts.corpus.import_knowledge data/corpus/math/knowledge_chunks.jsonl
     python -m scripts.corpus.import_knowledge data/corpus/math/knowledge_chunks.jsonl --batch-size 10 --dry-run
+    python -m scripts.corpus.import_knowledge data/corpus/math/knowledge_chunks.jsonl --workers 8 --restart
+    python -m scripts.corpus.import_knowledge --bundle dist/math-bundle
+    python -m scripts.corpus.import_knowledge --bundle dist/math-bundle --target local --local-index data/index
 """
 
 import asyncio
+import hashlib
 import json
+import os
 import sys
-import uuid
+import time
+from collections.abc import Iterator
 from pathlib import Path
 
+import numpy as np
 import structlog
 
 # Add backend root to sys.path so app modules are importable
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+from scripts.corpus.import_manifest import content_hash
+
 logger = structlog.get_logger()
 
+# Seconds between progress log lines
+_PROGRESS_EVERY = 5.0
 
-def load_chunks(filepath: Path) -> list[dict]:
-    """Load knowledge chunks from a JSONL file."""
-    chunks = []
+
+def chunk_id(item: dict) -> str:
+    """Stable id for a chunk without one, so a resumed import recognises it."""
+    digest = hashlib.sha1(item["content"].encode("utf-8")).hexdigest()[:12]
+    return f"{item['subject']}-{digest}"
+
+
+def iter_chunks(filepath: Path) -> Iterator[dict]:
+    """Stream valid knowledge chunks from a JSONL file (invalid lines are logged and skipped)."""
     with open(filepath, encoding="utf-8") as f:
         for lineno, line in enumerate(f, 1):
             line = line.strip()
@@ -37,13 +70,56 @@ def load_chunks(filepath: Path) -> list[dict]:
                     if field not in item:
                         raise ValueError(f"Missing required field: {field}")
                 if "id" not in item:
-                    item["id"] = f"{item['subject']}-{uuid.uuid4().hex[:8]}"
+                    item["id"] = chunk_id(item)
                 if "source" not in item:
                     item["source"] = ""
-                chunks.append(item)
+                yield item
             except (json.JSONDecodeError, ValueError) as e:
                 logger.warning("skip_invalid_line", lineno=lineno, error=str(e))
-    return chunks
+
+
+def load_chunks(filepath: Path) -> list[dict]:
+    """Load knowledge chunks from a JSONL file."""
+    return list(iter_chunks(filepath))
+
+
+def default_checkpoint(filepath: Path) -> Path:
+    return filepath.with_name(filepath.name + ".checkpoint")
+
+
+class Checkpoint:
+    """Append-only file of inserted chunks, one ``<id>\t<content hash>`` per line.
+
+    Args:
+        path: Checkpoint file; chunks whose id and hash are in it are treated as imported.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: dict[str, str] = {}
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                if line:
+                    # Entries without a hash never match, so their chunks are re-imported
+                    chunk_id_, _, digest = line.partition("\t")
+                    self.done[chunk_id_] = digest
+
+    def contains(self, chunk: dict) -> bool:
+        """Whether ``chunk`` was inserted with its current content."""
+        return self.done.get(chunk["id"]) == content_hash(chunk)
+
+    def record(self, chunks: list[dict]) -> None:
+        """Durably mark ``chunks`` as inserted."""
+        entries = {c["id"]: content_hash(c) for c in chunks}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{i}\t{digest}\n" for i, digest in entries.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(entries)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+        self.done.clear()
 
 
 async def import_chunks(
@@ -51,22 +127,41 @@ async def import_chunks(
     *,
     batch_size: int = 20,
     dry_run: bool = False,
+    lexical_index_dir: Path | None = None,
+    workers: int = 4,
+    insert_batch_size: int = 500,
+    checkpoint_path: Path | None = None,
+    restart: bool = False,
+    only_ids: set[str] | None = None,
+    upsert: bool = False,
+    store=None,
+    embedder=None,
 ) -> dict:
     """Import knowledge chunks from JSONL into Milvus.
 
-    Returns:
-        Summary dict with counts of imported/skipped/failed items.
-    """
-    chunks = load_chunks(filepath)
-    if not chunks:
-        logger.error("no_chunks_loaded", filepath=str(filepath))
-        return {"total": 0, "imported": 0, "failed": 0}
+    Successfully inserted chunks are also upserted into the BM25 lexical
+    index at ``lexical_index_dir`` (defaults to ``LEXICAL_INDEX_DIR``). On a
+    resumed run the chunks already in the checkpoint are re-added too, since
+    the interrupted run never reached its lexical update.
 
-    logger.info("chunks_loaded", total=len(chunks), filepath=str(filepath))
+    Args:
+        batch_size: Chunks per embedding request.
+        workers: Concurrent embedding requests.
+        insert_batch_size: Rows per Milvus insert.
+        checkpoint_path: Resume file (defaults to ``<filepath>.checkpoint``).
+        restart: Ignore and replace an existing checkpoint.
+        only_ids: Import just these chunk ids (incremental sync); the rest count as unchanged.
+        upsert: Replace existing rows with the same id instead of appending.
+        store, embedder: Injected ``MilvusKnowledgeStore`` / ``EmbeddingService`` (tests).
 
+    Returns:
+        Summary dict with counts of imported/skipped/failed items and throughput.
+    """
     if dry_run:
         logger.info("dry_run_mode", msg="Skipping embedding and Milvus insert")
-        for c in chunks:
+        total = 0
+        for c in iter_chunks(filepath):
+            total += 1
             logger.info(
                 "chunk_preview",
                 id=c["id"],
@@ -74,66 +169,330 @@ async def import_chunks(
                 chapter=c["chapter"],
                 content_len=len(c["content"]),
             )
-        return {"total": len(chunks), "imported": 0, "failed": 0, "dry_run": True}
+        if not total:
+            logger.error("no_chunks_loaded", filepath=str(filepath))
+        return {"total": total, "imported": 0, "failed": 0, "dry_run": True}
 
     # Lazy import to avoid requiring service dependencies for dry-run
     from app.config.settings import get_settings
-    from app.services.embedding_service import EmbeddingService
-    from app.services.milvus_client import MilvusKnowledgeStore, connect_milvus
 
     settings = get_settings()
-    connect_milvus()
-    store = MilvusKnowledgeStore()
-    embedder = EmbeddingService()
+    if store is None:
+        from app.services.milvus_client import MilvusKnowledgeStore, connect_milvus
 
-    imported = 0
-    failed = 0
+        connect_milvus()
+        store = MilvusKnowledgeStore()
+    if embedder is None:
+        from app.services.embedding_service import EmbeddingService
 
-    # Process in batches
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i : i + batch_size]
-        texts = [c["content"] for c in batch]
+        embedder = EmbeddingService()
 
-        try:
-            embeddings = await embedder.embed(texts)
-        except Exception as e:
-            logger.error("embedding_failed", batch_start=i, error=str(e))
-            failed += len(batch)
-            continue
+    checkpoint = Checkpoint(checkpoint_path or default_checkpoint(filepath))
+    if restart:
+        checkpoint.clear()
+    elif checkpoint.done:
+        logger.info("import_resuming", checkpoint=str(checkpoint.path), already_imported=len(checkpoint.done))
+
+    lexical_dir = lexical_index_dir or (Path(settings.lexical_index_dir) if settings.lexical_index_dir else None)
+    counts = {"total": 0, "imported": 0, "skipped": 0, "unchanged": 0, "failed": 0}
+    inserted: list[dict] = []
+    started = time.perf_counter()
 
-        ids = [c["id"] for c in batch]
-        contents = texts
-        subjects = [c["subject"] for c in batch]
-        chapters = [c["chapter"] for c in batch]
-        sources = [c.get("source", "") for c in batch]
+    # Bounded queues: the reader stalls when embedding falls behind, embedding stalls when inserts do
+    embed_queue: asyncio.Queue[list[dict] | None] = asyncio.Queue(maxsize=workers * 2)
+    write_queue: asyncio.Queue[tuple[list[dict], list[list[float]]] | None] = asyncio.Queue(maxsize=workers * 2)
 
+    async def read() -> None:
+        batch: list[dict] = []
+        seen: set[str] = set()
+        for chunk in iter_chunks(filepath):
+            counts["total"] += 1
+            if only_ids is not None and chunk["id"] not in only_ids:
+                counts["unchanged"] += 1
+                continue
+            if checkpoint.contains(chunk) or chunk["id"] in seen:
+                counts["skipped"] += 1
+                if lexical_dir is not None and chunk["id"] not in seen:
+                    # In Milvus from an interrupted run, but maybe not yet in the BM25 index
+                    inserted.append(chunk)
+                    seen.add(chunk["id"])
+                continue
+            seen.add(chunk["id"])
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                await embed_queue.put(batch)
+                batch = []
+        if batch:
+            await embed_queue.put(batch)
+        for _ in range(workers):
+            await embed_queue.put(None)
+
+    async def embed() -> None:
+        while (batch := await embed_queue.get()) is not None:
+            try:
+                embeddings = await embedder.embed([c["content"] for c in batch])
+            except Exception as e:
+                logger.error("embedding_failed", first_id=batch[0]["id"], error=str(e))
+                counts["failed"] += len(batch)
+                continue
+            await write_queue.put((batch, embeddings))
+
+    async def write_rows(rows: list[dict], embeddings: list[list[float]]) -> None:
+        ids = [c["id"] for c in rows]
         try:
-            count = await store.insert(ids, embeddings, contents, subjects, chapters, sources)
-            imported += count
-            logger.info("batch_imported", batch_start=i, count=count)
+            count = await store.insert(
+                ids,
+                embeddings,
+                [c["content"] for c in rows],
+                [c["subject"] for c in rows],
+                [c["chapter"] for c in rows],
+                [c.get("source", "") for c in rows],
+                upsert=upsert,
+            )
         except Exception as e:
-            logger.error("milvus_insert_failed", batch_start=i, error=str(e))
-            failed += len(batch)
+            logger.error("milvus_insert_failed", first_id=ids[0], count=len(ids), error=str(e))
+            counts["failed"] += len(rows)
+            return
+        checkpoint.record(rows)
+        counts["imported"] += count
+        if lexical_dir is not None:
+            inserted.extend(rows)
+
+    async def write() -> None:
+        rows: list[dict] = []
+        vectors: list[list[float]] = []
+        last_progress = time.perf_counter()
+        while (item := await write_queue.get()) is not None:
+            rows.extend(item[0])
+            vectors.extend(item[1])
+            if len(rows) >= insert_batch_size:
+                await write_rows(rows, vectors)
+                rows, vectors = [], []
+            if time.perf_counter() - last_progress >= _PROGRESS_EVERY:
+                last_progress = time.perf_counter()
+                elapsed = last_progress - started
+                logger.info(
+                    "import_progress",
+                    imported=counts["imported"],
+                    failed=counts["failed"],
+                    chunks_per_sec=round(counts["imported"] / elapsed, 1),
+                )
+        if rows:
+            await write_rows(rows, vectors)
+
+    async def embed_all() -> None:
+        await asyncio.gather(*(embed() for _ in range(workers)))
+        await write_queue.put(None)
+
+    await asyncio.gather(read(), embed_all(), write())
+
+    if counts["imported"]:
+        entities = await store.flush()
+        logger.info("milvus_flushed", entities=entities)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        **counts,
+        "elapsed_s": round(elapsed, 2),
+        "chunks_per_sec": round(counts["imported"] / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    if not counts["total"]:
+        logger.error("no_chunks_loaded", filepath=str(filepath))
+
+    if lexical_dir is not None and inserted:
+        from app.services.lexical_index import update_lexical_index
+
+        manifest = update_lexical_index(lexical_dir, inserted)
+        logger.info("lexical_index_updated", path=str(lexical_dir), **manifest)
+
+    if counts["imported"] or inserted:
+        # Cached retrievals from the previous corpus must stop matching
+        from app.services.corpus_version import bump_corpus_version
+
+        await bump_corpus_version()
+
+    if not counts["failed"]:
+        checkpoint.clear()
 
-    summary = {"total": len(chunks), "imported": imported, "failed": failed}
     logger.info("import_complete", **summary)
     return summary
 
 
+async def import_bundle(
+    directory: Path,
+    *,
+    target: str = "milvus",
+    model: str | None = None,
+    insert_batch_size: int = 500,
+    local_index_dir: Path | None = None,
+    lexical_index_dir: Path | None = None,
+    verify: bool = True,
+    store=None,
+) -> dict:
+    """Bulk-load a precomputed embedding bundle without calling the embedding service.
+
+    Args:
+        directory: Bundle written by ``export_embedding_bundle``.
+        target: ``"milvus"`` (upsert into ``knowledge_base``) or ``"local"``
+            (write a ``LocalVectorIndex`` snapshot to ``local_index_dir``).
+        model: Embedding model queries are embedded with; the bundle must match.
+        verify: Check the bundle's checksums before loading.
+
+    Returns:
+        Summary dict with counts of imported/failed items and throughput.
+    """
+    from app.config.settings import get_settings
+    from app.services.embedding_bundle import BUNDLE_FIELDS, EmbeddingBundle
+    from app.services.embedding_service import DEFAULT_EMBEDDING_MODEL
+
+    settings = get_settings()
+    started = time.perf_counter()
+    bundle = EmbeddingBundle(directory, verify=verify)
+    logger.info("bundle_opened", path=str(directory), count=bundle.count, dim=bundle.dim, model=bundle.model)
+
+    counts = {"total": bundle.count, "imported": 0, "failed": 0}
+    if target == "local":
+        from app.services.local_vector_index import write_snapshot
+
+        bundle.check_compatible(model=model or DEFAULT_EMBEDDING_MODEL)
+        snapshot_dir = local_index_dir or (Path(settings.local_index_dir) if settings.local_index_dir else None)
+        if snapshot_dir is None:
+            raise ValueError("target=local needs --local-index or LOCAL_INDEX_DIR")
+        manifest = write_snapshot(snapshot_dir, np.asarray(bundle.vectors, dtype=np.float32), bundle.meta)
+        counts["imported"] = manifest["count"]
+        logger.info("snapshot_written", path=str(snapshot_dir), **manifest)
+    elif target == "milvus":
+        if store is None:
+            from app.services.milvus_client import EMBEDDING_DIM, MilvusKnowledgeStore, connect_milvus
+
+            bundle.check_compatible(model=model or DEFAULT_EMBEDDING_MODEL, dim=EMBEDDING_DIM)
+            connect_milvus()
+            store = MilvusKnowledgeStore()
+        else:
+            bundle.check_compatible(model=model or DEFAULT_EMBEDDING_MODEL)
+        for columns, vectors in bundle.batches(insert_batch_size):
+            ids = columns["id"]
+            try:
+                # Upsert: loading the same bundle twice must not duplicate rows
+                counts["imported"] += await store.insert(
+                    ids,
+                    vectors.tolist(),
+                    columns["content"],
+                    columns["subject"],
+                    columns["chapter"],
+                    columns["source"],
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.error("milvus_insert_failed", first_id=ids[0], count=len(ids), error=str(e))
+                counts["failed"] += len(ids)
+        if counts["imported"]:
+            entities = await store.flush()
+            logger.info("milvus_flushed", entities=entities)
+    else:
+        raise ValueError(f"unknown bundle target {target!r}")
+
+    lexical_dir = lexical_index_dir or (Path(settings.lexical_index_dir) if settings.lexical_index_dir else None)
+    if lexical_dir is not None and counts["imported"]:
+        from app.services.lexical_index import update_lexical_index
+
+        chunks = [{f: bundle.meta[f][i] for f in BUNDLE_FIELDS} for i in range(bundle.count)]
+        manifest = update_lexical_index(lexical_dir, chunks)
+        logger.info("lexical_index_updated", path=str(lexical_dir), **manifest)
+
+    if counts["imported"]:
+        from app.services.corpus_version import bump_corpus_version
+
+        await bump_corpus_version()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        **counts,
+        "elapsed_s": round(elapsed, 2),
+        "chunks_per_sec": round(counts["imported"] / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info("bundle_import_complete", target=target, **summary)
+    return summary
+
+
+async def delete_chunks(ids: list[str], *, lexical_index_dir: Path | None = None, store=None) -> int:
+    """Delete chunks removed from the corpus from Milvus and the lexical index."""
+    if not ids:
+        return 0
+    from app.config.settings import get_settings
+
+    settings = get_settings()
+    if store is None:
+        from app.services.milvus_client import MilvusKnowledgeStore, connect_milvus
+
+        connect_milvus()
+        store = MilvusKnowledgeStore()
+    deleted = await store.delete(ids)
+    await store.flush()
+
+    lexical_dir = lexical_index_dir or (Path(settings.lexical_index_dir) if settings.lexical_index_dir else None)
+    if lexical_dir is not None:
+        from app.services.lexical_index import update_lexical_index
+
+        manifest = update_lexical_index(lexical_dir, [], removed=ids)
+        logger.info("lexical_index_updated", path=str(lexical_dir), **manifest)
+
+    from app.services.corpus_version import bump_corpus_version
+
+    await bump_corpus_version()
+    logger.info("chunks_deleted", requested=len(ids), deleted=deleted)
+    return deleted
+
+
 def main() -> None:
     import argparse
 
     parser = argparse.ArgumentParser(description="Import knowledge chunks into Milvus")
-    parser.add_argument("filepath", type=Path, help="Path to JSONL file with knowledge chunks")
+    parser.add_argument("filepath", type=Path, nargs="?", help="Path to JSONL file with knowledge chunks")
     parser.add_argument("--batch-size", type=int, default=20, help="Embedding batch size")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent embedding requests")
+    parser.add_argument("--insert-batch-size", type=int, default=500, help="Rows per Milvus insert")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Resume file (default: <file>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
     parser.add_argument("--dry-run", action="store_true", help="Validate without importing")
+    parser.add_argument("--lexical-index", type=Path, default=None, help="BM25 index directory to update")
+    parser.add_argument("--bundle", type=Path, default=None, help="Load a precomputed embedding bundle instead")
+    parser.add_argument("--target", choices=("milvus", "local"), default="milvus", help="Where to load a bundle")
+    parser.add_argument("--local-index", type=Path, default=None, help="Snapshot directory for --target local")
+    parser.add_argument("--model", default=None, help="Embedding model the bundle must have been built with")
+    parser.add_argument("--no-verify", action="store_true", help="Skip bundle checksum verification")
     args = parser.parse_args()
 
-    if not args.filepath.exists():
+    if args.bundle is not None:
+        result = asyncio.run(
+            import_bundle(
+                args.bundle,
+                target=args.target,
+                model=args.model,
+                insert_batch_size=args.insert_batch_size,
+                local_index_dir=args.local_index,
+                lexical_index_dir=args.lexical_index,
+                verify=not args.no_verify,
+            )
+        )
+        sys.exit(1 if result.get("failed") else 0)
+
+    if args.filepath is None or not args.filepath.exists():
         print(f"Error: File not found: {args.filepath}")
         sys.exit(1)
 
-    result = asyncio.run(import_chunks(args.filepath, batch_size=args.batch_size, dry_run=args.dry_run))
+    result = asyncio.run(
+        import_chunks(
+            args.filepath,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            lexical_index_dir=args.lexical_index,
+            workers=args.workers,
+            insert_batch_size=args.insert_batch_size,
+            checkpoint_path=args.checkpoint,
+            restart=args.restart,
+        )
+    )
     if result.get("failed"):
         sys.exit(1)
 
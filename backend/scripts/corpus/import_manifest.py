@@ -0,0 +1,83 @@
+"""Content-hash manifest of the last successful corpus import.
+
+``import_all --sync`` hashes every knowledge chunk (by id), graph record (by
+``graph_key``) and exercise (by id), diffs the hashes against the manifest
+left in the corpus directory by the previous import, and only re-embeds /
+upserts what changed and deletes what disappeared. A section of the manifest
+is rewritten only after its import step finished without failures, so a
+failed step is retried in full on the next sync; records an import step
+left out (``pending``) keep their previous hash and are retried as well.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from pathlib import Path
+
+MANIFEST_NAME = ".import_manifest.json"
+SECTIONS = ("chunks", "graph", "exercises")
+
+
+def content_hash(record: dict) -> str:
+    """Hash of a record's canonical JSON form (key order does not matter)."""
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class ManifestDiff:
+    changed: set[str] = field(default_factory=set)
+    removed: set[str] = field(default_factory=set)
+    unchanged: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+
+    def summary(self) -> dict:
+        return {"changed": len(self.changed), "removed": len(self.removed), "unchanged": self.unchanged}
+
+
+class ImportManifest:
+    """Per-section ``key → content hash`` maps, stored as JSON.
+
+    Args:
+        path: Manifest file (usually ``<corpus_dir>/.import_manifest.json``).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.sections: dict[str, dict[str, str]] = {section: {} for section in SECTIONS}
+        if path.exists():
+            stored = json.loads(path.read_text(encoding="utf-8"))
+            for section in SECTIONS:
+                self.sections[section] = dict(stored.get(section, {}))
+
+    def diff(self, section: str, current: dict[str, str]) -> ManifestDiff:
+        """What changed in ``section`` since the manifest was written."""
+        previous = self.sections[section]
+        changed = {key for key, digest in current.items() if previous.get(key) != digest}
+        return ManifestDiff(
+            changed=changed,
+            removed=set(previous) - set(current),
+            unchanged=len(current) - len(changed),
+        )
+
+    def update(self, section: str, current: dict[str, str], *, pending: Collection[str] = ()) -> None:
+        """Record ``current`` as the imported state of ``section`` and save.
+
+        Keys in ``pending`` were not written; they keep their previous hash
+        (or stay absent) so the next sync retries them.
+        """
+        previous = self.sections[section]
+        recorded = {key: digest for key, digest in current.items() if key not in pending}
+        recorded.update({key: previous[key] for key in pending if key in previous})
+        self.sections[section] = recorded
+        self.save()
+
+    def save(self) -> None:
+        # Write-then-rename so a crash never leaves a truncated manifest
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.sections, ensure_ascii=False, sort_keys=True, indent=0), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -3,174 +3,337 @@
 Checks JSONL files for structural correctness, required fields, cross-references
 between knowledge chunks, graph data, and exercises.
 
+Files are streamed in byte-range shards cut at line boundaries; shards of
+large files are checked in parallel on a process pool. Each shard returns its
+per-line findings plus a compact record per line (ids, names, references),
+and the cross-file checks run over in-memory sets built from those records.
+Findings are reported as ``file:line: message`` in file and line order, so
+the report is identical however the shards were scheduled.
+
 Usage:
     python -m scripts.corpus.validate_corpus data/corpus/math/
+    python -m scripts.corpus.validate_corpus data/corpus/math/ --workers 8
 """
 
 import json
+import os
 import sys
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import structlog
 
 logger = structlog.get_logger()
 
+CHUNKS_FILE = "knowledge_chunks.jsonl"
+GRAPH_FILE = "knowledge_graph.jsonl"
+EXERCISES_FILE = "exercises.jsonl"
+CORPUS_FILES = (CHUNKS_FILE, GRAPH_FILE, EXERCISES_FILE)
+
+EXERCISE_TYPES = ("choice", "fill", "solution", "true_false")
+GRAPH_TYPES = ("subject", "chapter", "knowledge_point")
+
+# Files above this size are split into shards of about this many bytes
+DEFAULT_SHARD_BYTES = 8 << 20
+
+ERROR = "error"
+WARNING = "warning"
+
+Finding = tuple[str, str]  # (level, message)
+
+
+def _check_chunk(item: dict) -> tuple[list[Finding], tuple]:
+    findings: list[Finding] = []
+    for name in ("subject", "chapter", "content"):
+        if name not in item:
+            findings.append((ERROR, f"Missing field '{name}'"))
+    content = item.get("content", "")
+    if len(content) < 20:
+        findings.append((WARNING, f"Content too short ({len(content)} chars)"))
+    if len(content) > 8192:
+        findings.append((ERROR, "Content exceeds Milvus VARCHAR limit (8192)"))
+    for name in ("difficulty", "importance"):
+        val = item.get(name)
+        if val is not None and not (1 <= val <= 5):
+            findings.append((WARNING, f"{name}={val} outside [1,5]"))
+    return findings, (item.get("id", ""), item.get("title", ""))
+
+
+def _check_graph_item(item: dict) -> tuple[list[Finding], tuple | None]:
+    kind = item.get("type")
+    if kind not in GRAPH_TYPES:
+        return [(ERROR, f"Unknown type '{kind}'")], None
+    findings: list[Finding] = []
+    if "name" not in item:
+        findings.append((ERROR, "Missing 'name'"))
+    name = item.get("name")
+    if kind == "subject":
+        return findings, (kind, name)
+    if kind == "chapter":
+        return findings, (kind, name, item.get("subject"))
+    aliases = item.get("aliases", [])
+    if not isinstance(aliases, list) or not all(isinstance(a, str) and a for a in aliases):
+        findings.append((ERROR, f"KP '{name}' aliases must be a list of non-empty strings"))
+    record = (
+        kind,
+        name,
+        item.get("chapter"),
+        item.get("subject"),
+        tuple(item.get("prerequisites", [])),
+        tuple(item.get("related", [])),
+    )
+    return findings, record
+
+
+def _check_exercise(item: dict) -> tuple[list[Finding], tuple]:
+    findings: list[Finding] = []
+    for name in ("knowledge_point", "content", "answer"):
+        if name not in item:
+            findings.append((ERROR, f"Missing field '{name}'"))
+    ex_type = item.get("type", "")
+    if ex_type and ex_type not in EXERCISE_TYPES:
+        findings.append((WARNING, f"Unknown exercise type '{ex_type}'"))
+    return findings, (item.get("id", ""), item.get("knowledge_point", ""))
+
+
+_LINE_CHECKS: dict[str, Callable[[dict], tuple[list[Finding], tuple | None]]] = {
+    CHUNKS_FILE: _check_chunk,
+    GRAPH_FILE: _check_graph_item,
+    EXERCISES_FILE: _check_exercise,
+}
+
+
+@dataclass
+class ShardResult:
+    """Outcome of one shard; line numbers are relative to the shard's first line."""
+
+    lines: int = 0
+    findings: list[tuple[int, str, str]] = field(default_factory=list)
+    records: list[tuple[int, tuple]] = field(default_factory=list)
+
+
+def shard_ranges(path: Path, shard_bytes: int) -> list[tuple[int, int]]:
+    """Byte ranges of roughly ``shard_bytes`` covering ``path``, each ending on a line boundary."""
+    size = path.stat().st_size
+    bounds = [0]
+    with open(path, "rb") as f:
+        pos = shard_bytes
+        while pos < size:
+            f.seek(pos)
+            f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            bounds.append(pos)
+            pos += shard_bytes
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:], strict=False))
+
+
+def scan_shard(filename: str, path: str, start: int, end: int) -> ShardResult:
+    """Check the lines of ``path`` in ``[start, end)`` (runs in a worker process)."""
+    check = _LINE_CHECKS[filename]
+    result = ShardResult()
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            raw = f.readline(remaining)
+            if not raw:
+                break
+            remaining -= len(raw)
+            result.lines += 1
+            lineno = result.lines
+            try:
+                line = raw.decode("utf-8").strip()
+            except UnicodeDecodeError as e:
+                result.findings.append((lineno, ERROR, f"Invalid UTF-8 — {e}"))
+                continue
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                result.findings.append((lineno, ERROR, f"Invalid JSON — {e}"))
+                continue
+            if not isinstance(item, dict):
+                result.findings.append((lineno, ERROR, "Line is not a JSON object"))
+                continue
+            findings, record = check(item)
+            result.findings.extend((lineno, level, message) for level, message in findings)
+            if record is not None:
+                result.records.append((lineno, record))
+    return result
+
 
 class CorpusValidator:
-    """Validate a corpus directory for consistency and completeness."""
+    """Validate a corpus directory for consistency and completeness.
+
+    Args:
+        corpus_dir: Directory with the corpus JSONL files.
+        workers: Processes for checking shards (default: CPU count; 1 = in-process).
+        shard_bytes: Target shard size; smaller files are checked in one piece.
+    """
 
-    def __init__(self, corpus_dir: Path):
+    def __init__(self, corpus_dir: Path, *, workers: int | None = None, shard_bytes: int = DEFAULT_SHARD_BYTES):
         self.corpus_dir = corpus_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_bytes = shard_bytes
         self.errors: list[str] = []
         self.warnings: list[str] = []
         self.stats: dict = {}
+        self._scanned: dict[str, tuple[list[tuple[int, str, str]], list[tuple[int, tuple]]] | None] = {}
+
+    def _scan(self, filenames: tuple[str, ...]) -> None:
+        """Check every shard of ``filenames``, on the process pool when a file was split."""
+        tasks: list[tuple[str, str, int, int]] = []
+        files = 0
+        for filename in filenames:
+            self._scanned.pop(filename, None)
+            path = self.corpus_dir / filename
+            if not path.exists():
+                self._scanned[filename] = None
+                continue
+            files += 1
+            tasks.extend((filename, str(path), start, end) for start, end in shard_ranges(path, self.shard_bytes))
 
-    def _load_jsonl(self, filename: str) -> list[dict]:
-        filepath = self.corpus_dir / filename
-        if not filepath.exists():
-            self.errors.append(f"Missing file: {filename}")
-            return []
-        items = []
-        with open(filepath, encoding="utf-8") as f:
-            for lineno, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    items.append(json.loads(line))
-                except json.JSONDecodeError as e:
-                    self.errors.append(f"{filename}:{lineno}: Invalid JSON — {e}")
-        return items
-
-    def validate_knowledge_chunks(self) -> list[dict]:
-        """Validate knowledge_chunks.jsonl."""
-        chunks = self._load_jsonl("knowledge_chunks.jsonl")
-        self.stats["knowledge_chunks"] = len(chunks)
-
-        ids = set()
-        for i, c in enumerate(chunks):
-            prefix = f"knowledge_chunks.jsonl:{i + 1}"
-            # Required fields
-            for field in ("subject", "chapter", "content"):
-                if field not in c:
-                    self.errors.append(f"{prefix}: Missing field '{field}'")
-            # Content length
-            content = c.get("content", "")
-            if len(content) < 20:
-                self.warnings.append(f"{prefix}: Content too short ({len(content)} chars)")
-            if len(content) > 8192:
-                self.errors.append(f"{prefix}: Content exceeds Milvus VARCHAR limit (8192)")
-            # Duplicate ID
-            cid = c.get("id", "")
+        # A pool only pays off once some file is big enough to be split
+        if self.workers > 1 and len(tasks) > files:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+                results = list(pool.map(scan_shard, *zip(*tasks, strict=True)))
+        else:
+            results = [scan_shard(*task) for task in tasks]
+
+        # Rebase shard-relative line numbers; results are in task (= file, offset) order
+        offsets: dict[str, int] = {}
+        for (filename, *_), result in zip(tasks, results, strict=True):
+            offset = offsets.get(filename, 0)
+            findings, records = self._scanned.setdefault(filename, ([], []))
+            findings.extend((offset + lineno, level, message) for lineno, level, message in result.findings)
+            records.extend((offset + lineno, record) for lineno, record in result.records)
+            offsets[filename] = offset + result.lines
+        for filename in filenames:
+            self._scanned.setdefault(filename, ([], []))
+
+    def _records(self, filename: str) -> tuple[list[tuple[int, str, str]], list[tuple[int, tuple]]] | None:
+        if filename not in self._scanned:
+            self._scan((filename,))
+        return self._scanned[filename]
+
+    def _report(self, filename: str, findings: list[tuple[int, str, str]]) -> None:
+        """Append ``findings`` for ``filename`` in line order (stable for checks on the same line)."""
+        for lineno, level, message in sorted(findings, key=lambda f: f[0]):
+            target = self.errors if level == ERROR else self.warnings
+            target.append(f"{filename}:{lineno}: {message}")
+
+    def validate_knowledge_chunks(self) -> set[str]:
+        """Validate knowledge_chunks.jsonl; returns the chunk titles."""
+        scanned = self._records(CHUNKS_FILE)
+        if scanned is None:
+            self.errors.append(f"Missing file: {CHUNKS_FILE}")
+            self.stats["knowledge_chunks"] = 0
+            return set()
+        line_findings, records = scanned
+        self.stats["knowledge_chunks"] = len(records)
+
+        findings = list(line_findings)
+        ids: set[str] = set()
+        titles: set[str] = set()
+        for lineno, (cid, title) in records:
             if cid in ids:
-                self.errors.append(f"{prefix}: Duplicate id '{cid}'")
+                findings.append((lineno, ERROR, f"Duplicate id '{cid}'"))
             ids.add(cid)
-            # Difficulty/importance range
-            for field in ("difficulty", "importance"):
-                val = c.get(field)
-                if val is not None and not (1 <= val <= 5):
-                    self.warnings.append(f"{prefix}: {field}={val} outside [1,5]")
-        return chunks
-
-    def validate_knowledge_graph(self) -> dict[str, list[dict]]:
-        """Validate knowledge_graph.jsonl."""
-        items = self._load_jsonl("knowledge_graph.jsonl")
-        grouped: dict[str, list[dict]] = {"subject": [], "chapter": [], "knowledge_point": []}
-        for i, item in enumerate(items):
-            prefix = f"knowledge_graph.jsonl:{i + 1}"
-            t = item.get("type")
-            if t not in grouped:
-                self.errors.append(f"{prefix}: Unknown type '{t}'")
-                continue
-            if "name" not in item:
-                self.errors.append(f"{prefix}: Missing 'name'")
-            grouped[t].append(item)
-
-        self.stats["graph_subjects"] = len(grouped["subject"])
-        self.stats["graph_chapters"] = len(grouped["chapter"])
-        self.stats["graph_knowledge_points"] = len(grouped["knowledge_point"])
-
+            titles.add(title)
+        self._report(CHUNKS_FILE, findings)
+        return titles
+
+    def validate_knowledge_graph(self) -> dict[str, int]:
+        """Validate knowledge_graph.jsonl; returns knowledge-point name → line."""
+        scanned = self._records(GRAPH_FILE)
+        if scanned is None:
+            self.errors.append(f"Missing file: {GRAPH_FILE}")
+            for key in ("graph_subjects", "graph_chapters", "graph_knowledge_points"):
+                self.stats[key] = 0
+            return {}
+        line_findings, records = scanned
+
+        subject_rows = [record for _, record in records if record[0] == "subject"]
+        chapters = [(lineno, record) for lineno, record in records if record[0] == "chapter"]
+        points = [(lineno, record) for lineno, record in records if record[0] == "knowledge_point"]
+        subjects = {name for _, name in subject_rows}
+        self.stats["graph_subjects"] = len(subject_rows)
+        self.stats["graph_chapters"] = len(chapters)
+        self.stats["graph_knowledge_points"] = len(points)
+
+        findings = list(line_findings)
         # Cross-reference: chapter subjects must reference existing subjects
-        subject_names = {s["name"] for s in grouped["subject"]}
-        for ch in grouped["chapter"]:
-            if ch.get("subject") not in subject_names:
-                self.warnings.append(
-                    f"Chapter '{ch.get('name')}' references unknown subject '{ch.get('subject')}'"
-                )
-
-        # Cross-reference: KP chapters must exist
-        chapter_keys = {(ch.get("name"), ch.get("subject")) for ch in grouped["chapter"]}
-        kp_names = {kp["name"] for kp in grouped["knowledge_point"]}
-        for kp in grouped["knowledge_point"]:
-            key = (kp.get("chapter"), kp.get("subject"))
-            if key not in chapter_keys:
-                self.warnings.append(
-                    f"KnowledgePoint '{kp.get('name')}' references unknown chapter '{kp.get('chapter')}'"
-                )
-            # Prerequisite/related references
-            for prereq in kp.get("prerequisites", []):
-                if prereq not in kp_names:
-                    self.warnings.append(
-                        f"KP '{kp.get('name')}' has prerequisite '{prereq}' not in graph"
-                    )
-            for rel in kp.get("related", []):
-                if rel not in kp_names:
-                    self.warnings.append(
-                        f"KP '{kp.get('name')}' has related '{rel}' not in graph"
-                    )
-
-        return grouped
-
-    def validate_exercises(self, kp_names: set[str]) -> list[dict]:
-        """Validate exercises.jsonl against known knowledge points."""
-        exercises = self._load_jsonl("exercises.jsonl")
-        self.stats["exercises"] = len(exercises)
-
-        ids = set()
-        for i, ex in enumerate(exercises):
-            prefix = f"exercises.jsonl:{i + 1}"
-            for field in ("knowledge_point", "content", "answer"):
-                if field not in ex:
-                    self.errors.append(f"{prefix}: Missing field '{field}'")
-            # Duplicate ID
-            eid = ex.get("id", "")
+        for lineno, (_, name, subject) in chapters:
+            if subject not in subjects:
+                findings.append((lineno, WARNING, f"Chapter '{name}' references unknown subject '{subject}'"))
+
+        # Cross-reference: KP chapters and prerequisite/related targets must exist
+        chapter_keys = {(name, subject) for _, (_, name, subject) in chapters}
+        kp_lines = {name: lineno for lineno, (_, name, *_rest) in points}
+        for lineno, (_, name, chapter, subject, prerequisites, related) in points:
+            if (chapter, subject) not in chapter_keys:
+                findings.append((lineno, WARNING, f"KnowledgePoint '{name}' references unknown chapter '{chapter}'"))
+            for prereq in prerequisites:
+                if prereq not in kp_lines:
+                    findings.append((lineno, WARNING, f"KP '{name}' has prerequisite '{prereq}' not in graph"))
+            for rel in related:
+                if rel not in kp_lines:
+                    findings.append((lineno, WARNING, f"KP '{name}' has related '{rel}' not in graph"))
+        self._report(GRAPH_FILE, findings)
+        return kp_lines
+
+    def validate_exercises(self, kp_names: set[str] | dict[str, int]) -> set[str]:
+        """Validate exercises.jsonl against known knowledge points; returns the points covered."""
+        scanned = self._records(EXERCISES_FILE)
+        if scanned is None:
+            self.errors.append(f"Missing file: {EXERCISES_FILE}")
+            self.stats["exercises"] = 0
+            return set()
+        line_findings, records = scanned
+        self.stats["exercises"] = len(records)
+
+        findings = list(line_findings)
+        ids: set[str] = set()
+        covered: set[str] = set()
+        for lineno, (eid, kp) in records:
             if eid in ids:
-                self.errors.append(f"{prefix}: Duplicate id '{eid}'")
+                findings.append((lineno, ERROR, f"Duplicate id '{eid}'"))
             ids.add(eid)
-            # Cross-reference KP
-            kp = ex.get("knowledge_point", "")
             if kp and kp not in kp_names:
-                self.warnings.append(f"{prefix}: knowledge_point '{kp}' not found in graph")
-            # Type check
-            ex_type = ex.get("type", "")
-            if ex_type and ex_type not in ("choice", "fill", "solution", "true_false"):
-                self.warnings.append(f"{prefix}: Unknown exercise type '{ex_type}'")
-        return exercises
+                findings.append((lineno, WARNING, f"knowledge_point '{kp}' not found in graph"))
+            covered.add(kp)
+        self._report(EXERCISES_FILE, findings)
+        return covered
 
     def validate_all(self) -> bool:
         """Run all validations. Returns True if no errors."""
-        self.validate_knowledge_chunks()
-        graph = self.validate_knowledge_graph()
-        kp_names = {kp["name"] for kp in graph["knowledge_point"]}
-        self.validate_exercises(kp_names)
+        self._scan(CORPUS_FILES)
+        chunk_titles = self.validate_knowledge_chunks()
+        kp_lines = self.validate_knowledge_graph()
+        covered_kps = self.validate_exercises(kp_lines)
 
         # Coverage check: do all KPs have at least one exercise?
-        exercises = self._load_jsonl("exercises.jsonl")
-        covered_kps = {ex.get("knowledge_point") for ex in exercises}
-        uncovered = kp_names - covered_kps
+        uncovered = set(kp_lines) - covered_kps
         if uncovered:
             self.warnings.append(
                 f"{len(uncovered)} knowledge points without exercises: {', '.join(sorted(uncovered))}"
             )
 
-        # Do all KPs have knowledge chunks?
-        chunks = self._load_jsonl("knowledge_chunks.jsonl")
-        # Build a rough title→exists set
-        chunk_titles = {c.get("title", "") for c in chunks}
-        for kp_name in kp_names:
-            if kp_name not in chunk_titles:
-                self.warnings.append(f"KP '{kp_name}' has no matching knowledge chunk (by title)")
-
+        # Do all KPs have knowledge chunks? (rough match by chunk title)
+        self._report(
+            GRAPH_FILE,
+            [
+                (lineno, WARNING, f"KP '{name}' has no matching knowledge chunk (by title)")
+                for name, lineno in kp_lines.items()
+                if name not in chunk_titles
+            ],
+        )
         return len(self.errors) == 0
 
     def print_report(self) -> None:
@@ -178,7 +341,7 @@ class CorpusValidator:
         print("=" * 60)
         print(f"Corpus Validation Report: {self.corpus_dir}")
         print("=" * 60)
-        print(f"\nStatistics:")
+        print("\nStatistics:")
         for k, v in self.stats.items():
             print(f"  {k}: {v}")
 
@@ -204,13 +367,14 @@ def main() -> None:
 
     parser = argparse.ArgumentParser(description="Validate corpus data files")
     parser.add_argument("corpus_dir", type=Path, help="Directory containing JSONL corpus files")
+    parser.add_argument("--workers", type=int, default=None, help="Validation processes (default: CPU count)")
     args = parser.parse_args()
 
     if not args.corpus_dir.is_dir():
         print(f"Error: Not a directory: {args.corpus_dir}")
         sys.exit(1)
 
-    validator = CorpusValidator(args.corpus_dir)
+    validator = CorpusValidator(args.corpus_dir, workers=args.workers)
     is_valid = validator.validate_all()
     validator.print_report()
     sys.exit(0 if is_valid else 1)
@@ -0,0 +1,48 @@
+"""Tests for startup agent registration and warm-up."""
+
+import httpx
+
+from app.core import bootstrap
+from app.core.container import ServiceContainer
+from app.core.http_pool import UpstreamPoolRegistry
+from app.hub.agent_registry import AgentRegistry
+from app.models.conversation import AgentType
+
+
+class TestRegisterAgents:
+    def test_registers_all_six(self):
+        registry = AgentRegistry()
+        bootstrap.register_agents(registry)
+        assert set(registry.get_available_types()) == set(AgentType)
+
+    def test_idempotent_and_keeps_existing(self):
+        registry = AgentRegistry()
+        bootstrap.register_agents(registry)
+        academic = registry.get_agent(AgentType.ACADEMIC)
+        bootstrap.register_agents(registry)
+        assert registry.get_agent(AgentType.ACADEMIC) is academic
+
+
+class TestWarmUp:
+    async def test_failures_are_reported_not_raised(self, monkeypatch):
+        async def upstream_down():
+            raise ConnectionError("unreachable")
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("refused", request=request)
+
+        pools = UpstreamPoolRegistry(http2=False)
+        pools.register("http://vllm:8000", transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(bootstrap, "_preload_milvus", upstream_down)
+        monkeypatch.setattr(bootstrap, "_preload_graph", upstream_down)
+        monkeypatch.setattr(bootstrap, "_warm_turn", lambda services: _noop())
+
+        report = await bootstrap.warm_up(ServiceContainer(registry=AgentRegistry()), pools)
+        assert list(report) == ["automata", "pools", "milvus", "graph", "rag", "turn"]
+        assert report["automata"]["ok"] is True
+        assert report["milvus"]["ok"] is False
+        assert await pools.preconnect() == {"http://vllm:8000": False}
+
+
+async def _noop() -> None:
+    return None
@@ -0,0 +1,153 @@
+"""Tests for ChatService turn persistence on early exits."""
+
+import types
+import uuid
+
+import pytest
+
+from app.models.conversation import AgentType, Conversation, MessageRole
+from app.services import chat_service
+from app.services.chat_service import ChatService
+from app.services.context_builder import ContextWindow
+from app.services.rag_pipeline import RetrievalResult
+from app.services.staged_executor import StagedExecutor
+
+
+class FakeWriter:
+    def __init__(self) -> None:
+        self.turns: list[list] = []
+
+    async def submit(self, conv_id, messages, *, context_snapshot=None):
+        self.turns.append(list(messages))
+
+
+class FakeSession:
+    """Stands in for both the request session and a fresh ``async_session_factory()`` session."""
+
+    def __init__(self, log: list) -> None:
+        self.log = log
+        self.pending: list = []
+
+    def __contains__(self, obj) -> bool:
+        return obj in self.pending
+
+    def add_all(self, objs) -> None:
+        self.pending.extend(objs)
+
+    async def flush(self) -> None:
+        pass
+
+    async def execute(self, statement) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    def begin(self):
+        session = self
+
+        class Transaction:
+            async def __aenter__(self):
+                return session
+
+            async def __aexit__(self, exc_type, *exc) -> None:
+                if exc_type is None:
+                    session.log.extend(session.pending)
+
+        return Transaction()
+
+
+def _service(monkeypatch) -> tuple[ChatService, FakeWriter]:
+    service = ChatService(db=None)
+    writer = FakeWriter()
+    service.message_writer = writer
+    service.context_cache = None
+    conv = Conversation(id=uuid.uuid4(), user_id=uuid.uuid4(), agent_type=AgentType.ACADEMIC, persona_id=None)
+
+    async def get_conversation(conv_id, user_id):
+        return conv
+
+    async def gather(conv, content, turn, executor):
+        return ContextWindow(messages=[], tokens=0), ""
+
+    monkeypatch.setattr(service, "get_conversation", get_conversation)
+    monkeypatch.setattr(service, "_gather_turn_context", gather)
+    return service, writer
+
+
+async def test_user_message_saved_when_stream_is_closed_midway(monkeypatch):
+    service, writer = _service(monkeypatch)
+    service.registry = types.SimpleNamespace(get_agent=lambda agent_type: None)
+
+    async def stream(messages):
+        yield "二次函数"
+        yield "的顶点"
+
+    service.llm = types.SimpleNamespace(generate_stream=stream)
+
+    events = service.process_message_stream(uuid.uuid4(), uuid.uuid4(), "二次函数怎么求最值")
+    async for event_type, _ in events:
+        if event_type == "stream_chunk":
+            break
+    await events.aclose()  # client disconnected mid-reply
+
+    assert len(writer.turns) == 1
+    [message] = writer.turns[0]
+    assert (message.role, message.content) == (MessageRole.USER, "二次函数怎么求最值")
+
+
+async def test_user_message_saved_when_generation_raises(monkeypatch):
+    service, writer = _service(monkeypatch)
+    service.registry = types.SimpleNamespace(get_agent=lambda agent_type: object())
+
+    async def process(context):
+        raise RuntimeError("agent crashed")
+
+    service.orchestrator = types.SimpleNamespace(process=process)
+
+    with pytest.raises(RuntimeError):
+        await service.process_message(uuid.uuid4(), uuid.uuid4(), "二次函数怎么求最值")
+    assert [[m.role for m in turn] for turn in writer.turns] == [[MessageRole.USER]]
+
+
+async def test_user_message_committed_in_own_session_without_write_behind(monkeypatch):
+    service, _ = _service(monkeypatch)
+    service.message_writer = None
+    service.db = FakeSession([])  # the request session: rolled back by get_db, never committed
+    committed: list = []
+    monkeypatch.setattr(chat_service, "async_session_factory", lambda: FakeSession(committed))
+    service.registry = types.SimpleNamespace(get_agent=lambda agent_type: object())
+
+    async def process(context):
+        raise RuntimeError("agent crashed")
+
+    service.orchestrator = types.SimpleNamespace(process=process)
+
+    with pytest.raises(RuntimeError):
+        await service.process_message(uuid.uuid4(), uuid.uuid4(), "二次函数怎么求最值")
+    assert [(m.role, m.content) for m in committed] == [(MessageRole.USER, "二次函数怎么求最值")]
+
+
+async def test_chat_retrieval_includes_graph_per_setting(monkeypatch):
+    service = ChatService(db=None)
+    requested: list[dict] = []
+
+    async def retrieve_hits(query, **kwargs):
+        requested.append(kwargs)
+        return RetrievalResult()
+
+    async def load_history(conv):
+        return ContextWindow(messages=[], tokens=0)
+
+    async def persona():
+        return None
+
+    service.rag = types.SimpleNamespace(retrieve_hits=retrieve_hits, pack=lambda result, history: "")
+    monkeypatch.setattr(service, "_load_context_messages", load_history)
+    turn = types.SimpleNamespace(persona=persona)
+
+    await service._gather_turn_context(object(), "勾股定理", turn, StagedExecutor(1.0))
+    assert requested[0]["include_graph"] is service._settings.rag_include_graph is True
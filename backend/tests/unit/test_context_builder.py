@@ -0,0 +1,212 @@
+"""Tests for token-budgeted conversation context and rolling summaries."""
+
+import asyncio
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from app.core.database import commit_session
+from app.models.conversation import AgentType, Conversation, MessageRole
+from app.services import chat_service
+from app.services.chat_service import ChatService
+from app.services.context_builder import (
+    DEFAULT_CONTEXT_BUDGET,
+    ContextBuilder,
+    ContextTurn,
+    ContextWindow,
+    estimate_tokens,
+    summarized_until,
+)
+
+_T0 = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class FakeLLM:
+    def __init__(self, content: str = "学生在问二次函数", fail: bool = False) -> None:
+        self.content = content
+        self.fail = fail
+        self.calls: list[list[dict]] = []
+
+    async def generate(self, messages, **kwargs):
+        self.calls.append(messages)
+        if self.fail:
+            raise RuntimeError("vLLM down")
+        return {"content": self.content, "usage": {}, "finish_reason": "stop"}
+
+
+def _turns(*contents: str) -> list[ContextTurn]:
+    return [
+        ContextTurn(
+            role="user" if i % 2 == 0 else "assistant",
+            content=c,
+            created_at=_T0 + timedelta(seconds=i),
+            tokens=estimate_tokens(c),
+        )
+        for i, c in enumerate(contents)
+    ]
+
+
+class TestEstimateTokens:
+    def test_cjk_counts_per_character(self):
+        assert estimate_tokens("二次函数") == 4 + 4
+
+    def test_latin_counts_per_four_chars(self):
+        assert estimate_tokens("abcdefgh") == 2 + 4
+
+    def test_budget_lookup(self):
+        assert ContextBuilder.budget_for(AgentType.HEALTH) < ContextBuilder.budget_for(AgentType.CLASSROOM)
+        assert DEFAULT_CONTEXT_BUDGET > 0
+
+
+class TestBuild:
+    def test_within_budget_keeps_all(self):
+        window = ContextBuilder(FakeLLM()).build(_turns("你好", "你好呀", "讲讲函数"), None, budget=1000)
+        assert [m["content"] for m in window.messages] == ["你好", "你好呀", "讲讲函数"]
+        assert window.overflow == []
+
+    def test_overflow_keeps_newest_turns(self):
+        turns = _turns(*[f"第{i}轮" + "字" * 20 for i in range(10)])
+        window = ContextBuilder(FakeLLM()).build(turns, None, budget=100)
+        assert window.messages[-1]["content"] == turns[-1].content
+        assert window.tokens <= 100
+        assert window.overflow
+        assert window.overflow[0] is turns[0]
+        assert turns[-1] not in window.overflow
+
+    def test_summary_prepended_and_counted(self):
+        snapshot = {"summary": "之前讨论了勾股定理", "summary_tokens": 30}
+        window = ContextBuilder(FakeLLM()).build(_turns("继续"), snapshot, budget=1000)
+        assert window.messages[0]["role"] == "system"
+        assert "勾股定理" in window.messages[0]["content"]
+        assert window.tokens == 30 + estimate_tokens("继续")
+
+    def test_oversized_message_truncated(self):
+        window = ContextBuilder(FakeLLM()).build(_turns("长" * 500), None, budget=50)
+        assert len(window.messages) == 1
+        assert len(window.messages[0]["content"]) < 100
+        assert window.overflow == []
+
+
+class TestFoldOverflow:
+    async def test_updates_summary_and_cursor(self):
+        llm = FakeLLM()
+        turns = _turns("什么是二次函数", "形如 y=ax²+bx+c 的函数")
+        snapshot = await ContextBuilder(llm).fold_overflow({"summary": "旧摘要"}, turns)
+        assert snapshot["summary"] == "学生在问二次函数"
+        assert summarized_until(snapshot) == turns[-1].created_at
+        assert "旧摘要" in llm.calls[0][1]["content"]
+
+    async def test_failure_keeps_snapshot(self):
+        assert await ContextBuilder(FakeLLM(fail=True)).fold_overflow(None, _turns("q")) is None
+
+    async def test_nothing_to_fold(self):
+        llm = FakeLLM()
+        assert await ContextBuilder(llm).fold_overflow(None, []) is None
+        assert llm.calls == []
+
+
+class FakeContextCache:
+    def __init__(self, turns: list[dict] | None = None) -> None:
+        self.turns = turns
+        self.set_calls = 0
+
+    async def get_conversation_context(self, conv_id: str):
+        return self.turns
+
+    async def set_conversation_context(self, conv_id: str, messages, ttl: int = 300, max_len: int = 20):
+        self.set_calls += 1
+        self.turns = list(messages)[-max_len:]
+
+
+class FailingDB:
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("context should be served from the cache")
+
+
+class TestContextCache:
+    def test_turn_round_trip(self):
+        turn = _turns("你好")[0]
+        assert ContextTurn.from_cache(turn.to_cache()) == turn
+
+    async def test_hit_skips_database(self):
+        service = ChatService(FailingDB())
+        service.context_cache = FakeContextCache([t.to_cache() for t in _turns("问题", "回答")])
+        turns = await service._load_context_turns(uuid.uuid4())
+        assert [t.content for t in turns] == ["问题", "回答"]
+        assert service.context_cache.set_calls == 0
+
+
+class FakeWriter:
+    def __init__(self) -> None:
+        self.snapshots: list[dict | None] = []
+
+    async def submit(self, conv_id, messages, *, context_snapshot=None):
+        self.snapshots.append(context_snapshot)
+
+
+class TestBackgroundFold:
+    async def test_fold_runs_off_the_reply_path(self):
+        release = asyncio.Event()
+
+        class SlowLLM(FakeLLM):
+            async def generate(self, messages, **kwargs):
+                await release.wait()
+                return await super().generate(messages, **kwargs)
+
+        service = ChatService(FailingDB())
+        service.context_builder = ContextBuilder(SlowLLM())
+        service.message_writer = FakeWriter()
+        conv = Conversation(id=uuid.uuid4(), context_snapshot=None)
+        window = ContextWindow(messages=[], tokens=0, overflow=_turns("旧问题", "旧回答"))
+
+        service._schedule_context_fold(conv, window)
+        service._schedule_context_fold(conv, window)  # one fold per conversation at a time
+        await asyncio.sleep(0)
+        assert conv.context_snapshot is None
+
+        release.set()
+        await asyncio.wait_for(chat_service._context_folds[conv.id], 1)
+        assert len(service.message_writer.snapshots) == 1
+        assert conv.context_snapshot["summary"] == "学生在问二次函数"
+        assert conv.id not in chat_service._context_folds
+
+
+class RecordingSession:
+    """Just enough of an AsyncSession for the non-buffered persist path."""
+
+    def __init__(self) -> None:
+        self.info: dict = {}
+        self.added: list = []
+
+    def add_all(self, rows) -> None:
+        self.added.extend(rows)
+
+    async def flush(self) -> None:
+        pass
+
+    async def execute(self, *args, **kwargs) -> None:
+        pass
+
+    async def commit(self) -> None:
+        pass
+
+
+class TestContextWriteThrough:
+    async def test_cache_appended_only_after_commit(self):
+        appended: list[list[dict]] = []
+
+        class AppendCache(FakeContextCache):
+            async def append_conversation_context(self, conv_id, messages, ttl=300, max_len=20):
+                appended.append(list(messages))
+
+        db = RecordingSession()
+        service = ChatService(db)
+        service.message_writer = None
+        service.context_cache = AppendCache()
+        conv_id = uuid.uuid4()
+        await service._persist_turn(conv_id, service._new_message(conv_id, MessageRole.USER, "问题"))
+        assert len(db.added) == 1 and appended == []
+
+        await commit_session(db)
+        assert [m["content"] for m in appended[0]] == ["问题"]
+        await commit_session(db)
+        assert len(appended) == 1
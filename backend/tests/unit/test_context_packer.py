@@ -0,0 +1,88 @@
+"""Tests for token-aware RAG context packing (dedupe, history skip, budget, MMR)."""
+
+import pytest
+
+from app.services.context_packer import ContextPacker, line_tokens, minhash, shingles
+from app.services.rag_pipeline import RAGPipeline, RetrievalResult
+
+QUADRATIC = "二次函数的图像是抛物线，开口方向由二次项系数的符号决定，对称轴为x等于负二a分之b，顶点坐标可以通过配方求得。"
+REDOX = "氧化还原反应的本质是电子的转移，化合价升高的物质被氧化，是还原剂；化合价降低的物质被还原，是氧化剂。"
+SEQUENCE = "等差数列的通项公式为首项加上项数减一乘以公差，前n项和等于首项与末项之和乘以项数再除以二。"
+NEWTON = "牛顿第二定律指出物体的加速度与所受合外力成正比，与物体的质量成反比，加速度的方向与合外力方向相同。"
+
+
+def _hit(hit_id: str, content: str, score: float) -> dict:
+    return {"id": hit_id, "content": content, "score": score, "subject": "数学", "chapter": "第一章"}
+
+
+def test_minhash_estimates_jaccard():
+    a = shingles(QUADRATIC + REDOX)
+    b = shingles(QUADRATIC + SEQUENCE)
+    exact = len(a & b) / len(a | b)
+    estimate = (minhash(a) == minhash(b)).mean()
+    assert estimate == pytest.approx(exact, abs=0.2)
+    assert (minhash(a) == minhash(a)).all()
+    assert (minhash(shingles(REDOX)) == minhash(shingles(NEWTON))).mean() < 0.2
+
+
+def test_near_duplicates_are_suppressed():
+    hits = [
+        _hit("a", QUADRATIC, 0.9),
+        # Same passage from the other retrieval stage, trimmed differently
+        _hit("b", QUADRATIC[2:], 0.85),
+        _hit("c", REDOX, 0.5),
+    ]
+    packed = ContextPacker().pack(hits, budget=10_000)
+    assert [h["id"] for h in packed.hits] == ["a", "c"]
+    assert packed.stats.skipped_duplicate == 1
+
+
+def test_chunks_quoted_in_history_are_skipped():
+    hits = [_hit("a", QUADRATIC, 0.9), _hit("b", REDOX, 0.5)]
+    history = ["二次函数怎么画？", f"你可以这样理解：{QUADRATIC}"]
+    packed = ContextPacker().pack(hits, budget=10_000, history=history)
+    assert [h["id"] for h in packed.hits] == ["b"]
+    assert packed.stats.skipped_history == 1
+
+
+def test_budget_is_filled_without_exceeding_it():
+    hits = [_hit("a", QUADRATIC, 0.9), _hit("b", REDOX * 4, 0.8), _hit("c", SEQUENCE, 0.7)]
+    budget = line_tokens(QUADRATIC) + line_tokens(SEQUENCE) + 1
+    packed = ContextPacker().pack(hits, budget=budget)
+    # The long chunk does not fit, but the smaller one behind it still does
+    assert [h["id"] for h in packed.hits] == ["a", "c"]
+    assert packed.stats.tokens <= budget
+    assert packed.stats.skipped_budget == 1
+
+
+def test_mmr_prefers_diverse_chunk_over_partial_overlap():
+    hits = [
+        _hit("a", QUADRATIC + SEQUENCE, 0.9),
+        # Half the same text: not a duplicate, but adds less than a new topic
+        _hit("b", QUADRATIC + NEWTON, 0.88),
+        _hit("c", REDOX, 0.85),
+        _hit("d", "光合作用在叶绿体中进行，把二氧化碳和水转化为储存能量的有机物，并释放出氧气。", 0.1),
+    ]
+    packed = ContextPacker(mmr_lambda=0.5).pack(hits, budget=10_000)
+    assert [h["id"] for h in packed.hits][:2] == ["a", "c"]
+    pure_relevance = ContextPacker(mmr_lambda=1.0).pack(hits, budget=10_000)
+    assert [h["id"] for h in pure_relevance.hits][:2] == ["a", "b"]
+
+
+def test_rerank_score_takes_precedence_over_retrieval_score():
+    hits = [{**_hit("a", REDOX, 0.9), "rerank_score": 0.1}, {**_hit("b", NEWTON, 0.1), "rerank_score": 0.9}]
+    packed = ContextPacker(mmr_lambda=1.0).pack(hits, budget=line_tokens(NEWTON))
+    assert [h["id"] for h in packed.hits] == ["b"]
+
+
+def test_pipeline_pack_renders_packed_hits_and_related():
+    result = RetrievalResult(
+        hits=[_hit("a", QUADRATIC, 0.9), _hit("b", QUADRATIC[1:], 0.8), _hit("c", REDOX, 0.5)],
+        related=[{"name": "二次函数", "description": "y=ax²+bx+c"}],
+    )
+    text = RAGPipeline(embedding_service=object()).pack(result, budget=10_000)
+    assert text.count("[") == 2
+    assert "[2] (数学/第一章) 氧化还原" in text
+    assert "• 二次函数: y=ax²+bx+c" in text
+
+    assert RAGPipeline(embedding_service=object()).pack(RetrievalResult()) == ""
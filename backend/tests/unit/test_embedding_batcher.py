@@ -0,0 +1,59 @@
+"""Tests for the embedding micro-batcher."""
+
+import asyncio
+
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingSend:
+    def __init__(self, fail: bool = False) -> None:
+        self.batches: list[list[str]] = []
+        self.fail = fail
+
+    async def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(texts)
+        await asyncio.sleep(0.001)
+        if self.fail:
+            raise RuntimeError("embedding server down")
+        return [[float(len(t)), 0.0] for t in texts]
+
+
+class TestEmbeddingBatcher:
+    async def test_concurrent_calls_share_one_request(self):
+        send = RecordingSend()
+        batcher = EmbeddingBatcher(send, max_batch=32, max_wait=0.01)
+        vectors = await asyncio.gather(*[batcher.submit("字" * n) for n in range(1, 6)])
+        assert len(send.batches) == 1
+        assert [v[0] for v in vectors] == [1.0, 2.0, 3.0, 4.0, 5.0]
+        stats = batcher.stats()
+        assert stats["avg_batch_size"] == 5
+        assert stats["max_queue_wait_ms"] > 0
+
+    async def test_full_batch_dispatches_without_waiting(self):
+        send = RecordingSend()
+        batcher = EmbeddingBatcher(send, max_batch=2, max_wait=10)
+        results = await asyncio.wait_for(asyncio.gather(batcher.submit("a"), batcher.submit("bb")), timeout=1)
+        assert results == [[1.0, 0.0], [2.0, 0.0]]
+
+    async def test_overflow_split_into_batches(self):
+        send = RecordingSend()
+        batcher = EmbeddingBatcher(send, max_batch=3, max_wait=0.005)
+        await asyncio.gather(*[batcher.submit(str(i)) for i in range(7)])
+        assert [len(b) for b in send.batches] == [3, 3, 1]
+
+    async def test_duplicates_embedded_once(self):
+        send = RecordingSend()
+        batcher = EmbeddingBatcher(send, max_wait=0.005)
+        a, b = await asyncio.gather(batcher.submit("同一个问题"), batcher.submit("同一个问题"))
+        assert a == b
+        assert send.batches == [["同一个问题"]]
+        assert batcher.stats()["deduplicated"] == 1
+
+    async def test_failure_reaches_every_caller(self):
+        batcher = EmbeddingBatcher(RecordingSend(fail=True), max_wait=0.005)
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            await batcher.submit("c")
@@ -0,0 +1,117 @@
+"""Tests for the precomputed-embedding bundle format and bulk loading."""
+
+import numpy as np
+import pytest
+
+from app.services import corpus_version
+from app.services.embedding_bundle import BundleError, EmbeddingBundle, write_bundle
+from app.services.local_vector_index import LocalVectorIndex
+from scripts.corpus.export_embedding_bundle import bundle_from_chunks
+from scripts.corpus.import_knowledge import import_bundle
+
+
+def _meta(n: int) -> dict[str, list]:
+    return {
+        "id": [f"c{i}" for i in range(n)],
+        "content": [f"内容{i}" for i in range(n)],
+        "subject": ["math"] * n,
+        "chapter": ["ch"] * n,
+        "source": [""] * n,
+    }
+
+
+@pytest.fixture(autouse=True)
+def _no_redis(monkeypatch):
+    async def bump():
+        return 1
+
+    monkeypatch.setattr(corpus_version, "bump_corpus_version", bump)
+
+
+@pytest.fixture
+def bundle_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((7, 8)).astype(np.float32)
+    write_bundle(tmp_path / "bundle", vectors, _meta(7), model="bge-large-zh")
+    return tmp_path / "bundle", vectors
+
+
+class FakeStore:
+    def __init__(self):
+        self.rows: list[str] = []
+        self.flushes = 0
+
+    async def insert(self, ids, embeddings, contents, subjects, chapters, sources, *, upsert=False):
+        assert upsert
+        assert all(len(v) == 8 for v in embeddings)
+        self.rows.extend(ids)
+        return len(ids)
+
+    async def flush(self):
+        self.flushes += 1
+        return len(self.rows)
+
+
+def test_roundtrip_is_float16_mmap(bundle_dir):
+    path, vectors = bundle_dir
+    bundle = EmbeddingBundle(path)
+    assert (bundle.count, bundle.dim, bundle.model) == (7, 8, "bge-large-zh")
+    assert bundle.vectors.dtype == np.float16
+    assert isinstance(bundle.vectors, np.memmap)
+    np.testing.assert_allclose(bundle.vectors, vectors, atol=1e-2)
+    batches = list(bundle.batches(3))
+    assert [len(cols["id"]) for cols, _ in batches] == [3, 3, 1]
+    assert batches[2][0]["id"] == ["c6"] and batches[2][1].dtype == np.float32
+
+
+def test_checksum_and_model_are_enforced(bundle_dir):
+    path, _ = bundle_dir
+    with pytest.raises(BundleError):
+        EmbeddingBundle(path).check_compatible(model="text-embedding-3-small")
+    with pytest.raises(BundleError):
+        EmbeddingBundle(path).check_compatible(model="bge-large-zh", dim=1024)
+
+    meta = path / "meta.json"
+    meta.write_text(meta.read_text(encoding="utf-8").replace("内容1", "篡改"), encoding="utf-8")
+    with pytest.raises(BundleError, match="checksum"):
+        EmbeddingBundle(path)
+    assert EmbeddingBundle(path, verify=False).meta["content"][1] == "篡改"
+
+
+def test_incomplete_bundle_is_rejected(tmp_path):
+    with pytest.raises(BundleError):
+        EmbeddingBundle(tmp_path)
+
+
+async def test_import_into_milvus_without_embedding(bundle_dir):
+    path, _ = bundle_dir
+    store = FakeStore()
+    summary = await import_bundle(path, insert_batch_size=4, store=store)
+    assert summary["imported"] == 7 and summary["failed"] == 0
+    assert store.rows == [f"c{i}" for i in range(7)]
+    assert store.flushes == 1
+
+
+async def test_import_into_local_index(bundle_dir, tmp_path):
+    path, vectors = bundle_dir
+    summary = await import_bundle(path, target="local", local_index_dir=tmp_path / "index")
+    assert summary["imported"] == 7
+    index = LocalVectorIndex(tmp_path / "index")
+    hits = await index.search(vectors[3].tolist(), top_k=1)
+    assert hits[0]["id"] == "c3"
+
+
+async def test_bundle_from_chunks(tmp_path):
+    chunks = tmp_path / "chunks.jsonl"
+    chunks.write_text(
+        "\n".join(f'{{"id": "c{i}", "subject": "math", "chapter": "ch", "content": "内容{i}"}}' for i in range(5)),
+        encoding="utf-8",
+    )
+
+    class FakeEmbedder:
+        async def embed(self, texts, model):
+            return [[float(len(t)), 1.0] for t in texts]
+
+    manifest = await bundle_from_chunks(tmp_path / "bundle", chunks, batch_size=2, embedder=FakeEmbedder())
+    assert (manifest["count"], manifest["dim"]) == (5, 2)
+    assert EmbeddingBundle(tmp_path / "bundle").meta["id"] == [f"c{i}" for i in range(5)]
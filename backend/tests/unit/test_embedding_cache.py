@@ -0,0 +1,94 @@
+"""Tests for the two-tier embedding cache."""
+
+import json
+
+import httpx
+import numpy as np
+
+from app.core.http_pool import UpstreamPoolRegistry
+from app.services.embedding_cache import DiskEmbeddingStore, EmbeddingCache, embedding_key
+from app.services.embedding_service import EmbeddingService
+
+
+class MemoryStore:
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    async def get_many(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def set_many(self, items):
+        self.data.update(items)
+
+
+class TestEmbeddingKey:
+    def test_normalizes_width_and_whitespace(self):
+        assert embedding_key("bge", "  勾股定理\n是什么 ") == embedding_key("bge", "勾股定理 是什么")
+        assert embedding_key("bge", "ＡＢＣ") == embedding_key("bge", "ABC")
+
+    def test_model_is_part_of_key(self):
+        assert embedding_key("bge", "q") != embedding_key("m3e", "q")
+
+
+class TestEmbeddingCache:
+    async def test_memory_hit(self):
+        cache = EmbeddingCache(dtype="float32")
+        await cache.put_many("bge", ["q"], [[0.25, 0.5]])
+        assert await cache.get_many("bge", ["q", "other"]) == [[0.25, 0.5], None]
+        assert cache.snapshot()["hit_ratio"] == 0.5
+
+    async def test_byte_cap_evicts_lru(self):
+        cache = EmbeddingCache(max_bytes=16, dtype="float32")  # two 2-d float32 vectors
+        for text in ("a", "b", "c"):
+            await cache.put_many("bge", [text], [[1.0, 2.0]])
+        assert cache.bytes_held == 16
+        assert cache.stats.evictions == 1
+        assert (await cache.get_many("bge", ["a"])) == [None]
+
+    async def test_store_tier_is_binary_float16(self):
+        store = MemoryStore()
+        writer = EmbeddingCache(store=store)
+        await writer.put_many("bge", ["q"], [[0.1, 0.2, 0.3]])
+        (blob,) = store.data.values()
+        assert len(blob) == 6  # 3 × float16
+
+        reader = EmbeddingCache(store=store)  # cold memory, e.g. another worker
+        (vector,) = await reader.get_many("bge", ["q"])
+        assert np.allclose(vector, [0.1, 0.2, 0.3], atol=1e-3)
+        assert reader.stats.store_hits == 1
+
+    async def test_miss_and_hit_return_identical_vectors(self):
+        cache = EmbeddingCache()  # float16
+        (stored,) = await cache.put_many("bge", ["q"], [[0.1, 0.2, 0.3]])
+        assert stored != [0.1, 0.2, 0.3]
+        assert await cache.get_many("bge", ["q"]) == [stored]
+
+    async def test_disk_store_round_trip(self, tmp_path):
+        store = DiskEmbeddingStore(tmp_path / "emb.sqlite3", dtype="float32")
+        await EmbeddingCache(dtype="float32", store=store).put_many("bge", ["q"], [[1.5, -2.0]])
+        fresh = EmbeddingCache(dtype="float32", store=DiskEmbeddingStore(tmp_path / "emb.sqlite3", dtype="float32"))
+        assert await fresh.get_many("bge", ["q"]) == [[1.5, -2.0]]
+
+
+class TestEmbeddingServiceCaching:
+    async def test_only_misses_are_sent(self, monkeypatch):
+        sent: list[list[str]] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            texts = json.loads(request.content)["input"]
+            sent.append(texts)
+            data = [{"embedding": [float(len(t))], "index": i} for i, t in enumerate(texts)]
+            return httpx.Response(200, json={"data": data})
+
+        pools = UpstreamPoolRegistry(http2=False)
+        pools.register("http://embed:8081", transport=httpx.MockTransport(handler))
+        cache = EmbeddingCache(dtype="float32")
+        monkeypatch.setattr("app.services.embedding_service.get_upstream_pools", lambda: pools)
+        monkeypatch.setattr("app.services.embedding_service.get_embedding_cache", lambda: cache)
+
+        service = EmbeddingService(base_url="http://embed:8081")
+        assert await service.embed(["一", "二二"]) == [[1.0], [2.0]]
+        assert await service.embed(["二二", "三三三"]) == [[2.0], [3.0]]
+        assert sent == [["一", "二二"], ["三三三"]]
+        assert await service.embed_single("一") == [1.0]
+        assert len(sent) == 2
@@ -67,3 +67,44 @@ class TestCrisisKeywordCoverage:
 
     def test_tier3_not_empty(self) -> None:
         assert len(TIER_3_MEDIUM) >= 5
+
+
+class _FakeStreamLLM:
+    def __init__(self, chunks: list[str], fail: bool = False) -> None:
+        self._chunks = chunks
+        self._fail = fail
+
+    async def generate_stream(self, messages):
+        for chunk in self._chunks:
+            yield chunk
+        if self._fail:
+            raise RuntimeError("upstream closed")
+
+
+def _ctx(text: str):
+    from app.agents.base_agent import AgentContext
+
+    return AgentContext(
+        user_id="u1", conversation_id="c1", agent_type=AgentType.EMOTIONAL, user_input=text,
+    )
+
+
+class TestEmotionalAgentStream:
+    async def test_stream_appends_intervention_note(self) -> None:
+        agent = EmotionalAgent()
+        agent._llm = _FakeStreamLLM(["我听到", "你说很难过。"])
+        chunks = [c async for c in agent.process_stream(_ctx("我好难过，好伤心"))]
+        assert chunks[:2] == ["我听到", "你说很难过。"]
+        assert "放松技巧" in chunks[-1]
+
+    async def test_stream_crisis_skips_llm(self) -> None:
+        agent = EmotionalAgent()
+        agent._llm = _FakeStreamLLM(["should not stream"])
+        chunks = [c async for c in agent.process_stream(_ctx("我想自杀"))]
+        assert chunks and "should not stream" not in "".join(chunks)
+
+    async def test_stream_failure_before_first_chunk_falls_back(self) -> None:
+        agent = EmotionalAgent()
+        agent._llm = _FakeStreamLLM([], fail=True)
+        chunks = [c async for c in agent.process_stream(_ctx("今天好开心"))]
+        assert "心理咨询师" in "".join(chunks)
@@ -0,0 +1,127 @@
+"""Tests for the in-memory knowledge-graph snapshot."""
+
+import time
+
+from app.services.entity_linker import AhoCorasick, derive_aliases
+from app.services.graph_snapshot import GraphSnapshot, GraphSnapshotHolder
+
+POINTS = [
+    {"name": "勾股定理", "description": "直角三角形三边关系", "difficulty": 2, "importance": 5},
+    {"name": "直角三角形", "description": "有一个角为直角", "difficulty": 1, "importance": 4},
+    {"name": "平方根", "description": "x²=a 的解", "difficulty": 1, "importance": 3},
+    {"name": "余弦定理", "description": "一般三角形", "difficulty": 3, "importance": 4},
+    {"name": "向量", "description": "有方向的量", "difficulty": 3, "importance": 2},
+]
+CHAPTERS = [
+    {"subject": "数学", "chapter": "勾股定理", "name": "平方根"},
+    {"subject": "数学", "chapter": "勾股定理", "name": "勾股定理"},
+    {"subject": "数学", "chapter": "勾股定理", "name": "直角三角形"},
+]
+EDGES = [
+    {"src": "勾股定理", "rel": "PREREQUISITE", "dst": "直角三角形"},
+    {"src": "勾股定理", "rel": "PREREQUISITE", "dst": "平方根"},
+    {"src": "余弦定理", "rel": "RELATED_TO", "dst": "勾股定理"},
+    {"src": "余弦定理", "rel": "RELATED_TO", "dst": "向量"},
+]
+
+
+def snapshot(version: str = "0") -> GraphSnapshot:
+    return GraphSnapshot(POINTS, CHAPTERS, EDGES, version=version)
+
+
+class TestGraphSnapshot:
+    def test_related_hops_ignore_direction(self):
+        graph = snapshot()
+        assert {p["name"] for p in graph.related("勾股定理", depth=1)} == {"直角三角形", "平方根", "余弦定理"}
+        two_hops = [p["name"] for p in graph.related("勾股定理", depth=2)]
+        assert two_hops[-1] == "向量"  # nearest first
+        assert "勾股定理" not in two_hops
+        assert len(graph.related("勾股定理", depth=2, limit=2)) == 2
+
+    def test_related_shape_and_unknown(self):
+        graph = snapshot()
+        assert graph.related("平方根", depth=1) == [
+            {"name": "勾股定理", "description": "直角三角形三边关系", "difficulty": 2},
+        ]
+        assert graph.related("不存在") == []
+
+    def test_prerequisites_are_directed(self):
+        graph = snapshot()
+        assert {p["name"] for p in graph.prerequisites("勾股定理")} == {"直角三角形", "平方根"}
+        assert graph.prerequisites("直角三角形") == []
+
+    def test_chapter_points_by_importance(self):
+        names = [p["name"] for p in snapshot().chapter_points("数学", "勾股定理")]
+        assert names == ["勾股定理", "直角三角形", "平方根"]
+
+    def test_hop_query_is_microseconds(self):
+        graph = snapshot()
+        started = time.perf_counter()
+        for _ in range(1000):
+            graph.related("勾股定理", depth=2)
+        assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+class TestGraphSnapshotHolder:
+    async def test_rebuilds_only_when_version_moves(self):
+        version = {"v": "1"}
+        fetches = []
+
+        async def fetch():
+            fetches.append(1)
+            return {"points": POINTS, "chapters": CHAPTERS, "edges": EDGES}
+
+        async def current():
+            return version["v"]
+
+        holder = GraphSnapshotHolder(fetch, current)
+        first = await holder.get()
+        assert await holder.get() is first
+        version["v"] = "2"
+        second = await holder.get()
+        assert second is not first and second.version == "2"
+        assert len(fetches) == 2
+
+    async def test_neo4j_down_keeps_previous_and_backs_off(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            raise ConnectionError("neo4j unreachable")
+
+        async def current():
+            return "1"
+
+        holder = GraphSnapshotHolder(fetch, current)
+        assert await holder.get() is None
+        assert await holder.get() is None
+        assert len(calls) == 1
+
+
+class TestEntityLinking:
+    def test_aho_corasick_reports_overlapping_mentions(self):
+        matcher = AhoCorasick({"he": {0}, "she": {1}, "his": {2}, "hers": {3}})
+        found = {(m.start, m.end, m.node) for m in matcher.find_all("ushers")}
+        assert found == {(1, 4, 1), (2, 4, 0), (2, 6, 3)}
+
+    def test_longest_mention_wins(self):
+        matcher = AhoCorasick({"函数的单调性": {0}, "单调性": {1}, "奇偶性": {2}})
+        assert matcher.link("函数的单调性和奇偶性怎么判断") == [0, 2]
+        assert matcher.link("单调性") == [1]
+
+    def test_derived_aliases(self):
+        assert derive_aliases("函数的单调性") == {"函数的单调性", "单调性"}
+        assert derive_aliases("导数的应用——单调性与极值") == {"导数的应用——单调性与极值", "导数的应用", "单调性与极值"}
+
+    def test_snapshot_links_names_and_explicit_aliases(self):
+        points = [*POINTS, {"name": "毕达哥拉斯定理", "aliases": ["勾股弦"], "importance": 1}]
+        graph = GraphSnapshot(points, CHAPTERS, EDGES)
+        names = [graph.expand(graph.link(q), limit=1)[0]["name"] for q in ("请讲讲勾股定理", "勾股弦是什么")]
+        assert names == ["勾股定理", "毕达哥拉斯定理"]
+
+    def test_expand_puts_linked_points_first(self):
+        graph = snapshot()
+        expanded = [p["name"] for p in graph.expand(graph.link("余弦定理和平方根有什么关系"), depth=1, limit=5)]
+        assert expanded[:2] == ["余弦定理", "平方根"]
+        assert set(expanded[2:]) == {"勾股定理", "向量"}
+        assert graph.link("今天天气不错") == []
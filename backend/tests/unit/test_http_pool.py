@@ -0,0 +1,95 @@
+"""Tests for the shared upstream HTTP pool registry."""
+
+import httpx
+
+from app.core.http_pool import UpstreamPoolRegistry
+from app.core.security import create_access_token
+from app.services.llm_client import LLMClient
+
+
+def _ok_transport() -> httpx.MockTransport:
+    return httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+
+
+class TestUpstreamPoolRegistry:
+    def test_same_upstream_shares_client(self):
+        pools = UpstreamPoolRegistry()
+        assert pools.client("http://llm:8080") is pools.client("http://llm:8080/")
+
+    def test_distinct_upstreams_get_distinct_clients(self):
+        pools = UpstreamPoolRegistry()
+        assert pools.client("http://llm:8080") is not pools.client("http://rag:8081")
+
+    def test_register_uses_custom_limit(self):
+        pools = UpstreamPoolRegistry(max_connections=10, http2=False)
+        pools.register("http://llm:8080", max_connections=3)
+        assert pools.stats()["http://llm:8080"]["max_connections"] == 3
+
+    def test_reregister_keeps_open_pool(self):
+        pools = UpstreamPoolRegistry(http2=False)
+        first = pools.register("http://rag:8081", max_connections=3)
+        assert pools.register("http://rag:8081/") is first
+        assert pools.stats()["http://rag:8081"]["max_connections"] == 3
+
+    async def test_stats_track_requests(self):
+        pools = UpstreamPoolRegistry(http2=False)
+        client = pools.register("http://ocr:8866", transport=_ok_transport())
+        resp = await client.get("http://ocr:8866/health")
+        assert resp.status_code == 200
+        stats = pools.stats()["http://ocr:8866"]
+        assert stats["requests_total"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["peak_in_flight"] == 1
+
+    async def test_streamed_response_holds_slot_until_closed(self):
+        pools = UpstreamPoolRegistry(http2=False)
+        client = pools.register("http://llm:8080", transport=_ok_transport())
+        async with client.stream("GET", "http://llm:8080/v1/models") as resp:
+            assert pools.stats()["http://llm:8080"]["in_flight"] == 1
+            await resp.aread()
+        assert pools.stats()["http://llm:8080"]["in_flight"] == 0
+
+    async def test_saturation_counted(self):
+        pools = UpstreamPoolRegistry(http2=False)
+        client = pools.register("http://tts:8090", max_connections=1, transport=_ok_transport())
+        async with client.stream("GET", "http://tts:8090/a"):
+            async with client.stream("GET", "http://tts:8090/b"):
+                pass
+        assert pools.stats()["http://tts:8090"]["saturated_total"] == 1
+
+    async def test_closed_pool_reopens_on_borrow(self):
+        pools = UpstreamPoolRegistry(http2=False)
+        first = pools.client("http://asr:8867")
+        await pools.aclose()
+        assert pools.client("http://asr:8867") is not first
+
+
+class TestLLMClientUsesPool:
+    async def test_generate_through_shared_pool(self, monkeypatch):
+        pools = UpstreamPoolRegistry(http2=False)
+        pools.register(
+            "http://vllm:8000",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200,
+                    json={"choices": [{"message": {"content": "你好"}, "finish_reason": "stop"}]},
+                )
+            ),
+        )
+        monkeypatch.setattr("app.services.llm_client.get_upstream_pools", lambda: pools)
+
+        result = await LLMClient(base_url="http://vllm:8000").generate([{"role": "user", "content": "hi"}])
+        assert result["content"] == "你好"
+        assert pools.stats()["http://vllm:8000"]["requests_total"] == 1
+
+
+class TestRuntimeStatsEndpoint:
+    async def test_requires_admin(self, client, auth_headers):
+        assert (await client.get("/api/v1/stats")).status_code == 401
+        assert (await client.get("/api/v1/stats", headers=auth_headers)).status_code == 403
+
+    async def test_admin_sees_upstreams(self, client):
+        token = create_access_token({"sub": "admin-1", "role": "admin"})
+        response = await client.get("/api/v1/stats", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert "upstreams" in response.json()
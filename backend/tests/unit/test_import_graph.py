@@ -0,0 +1,137 @@
+"""Tests for the batched (UNWIND) Neo4j graph and exercise import."""
+
+import pytest
+from neo4j.exceptions import TransientError
+
+from app.services.neo4j_client import KnowledgeGraphClient
+from scripts.corpus.import_exercises import EXERCISE_QUERY, exercise_rows
+from scripts.corpus.import_graph import (
+    CHAPTER_QUERY,
+    EDGE_QUERIES,
+    KNOWLEDGE_POINT_QUERY,
+    SUBJECT_QUERY,
+    graph_rows,
+)
+
+
+class FakeResult:
+    def __init__(self, written):
+        self.written = written
+
+    async def single(self):
+        return {"written": self.written}
+
+
+class FakeTx:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def run(self, query, rows):
+        self.driver.attempts += 1
+        if self.driver.failures:
+            self.driver.failures -= 1
+            raise TransientError("deadlock detected")
+        self.rows = rows
+        return FakeResult(len(rows) - sum(1 for r in rows if r.get("missing")))
+
+    async def commit(self):
+        self.driver.committed.append(self.rows)
+
+    async def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def begin_transaction(self):
+        return FakeTx(self.driver)
+
+
+class FakeDriver:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = 0
+        self.committed: list[list[dict]] = []
+
+    def session(self):
+        return FakeSession(self)
+
+
+def _client(driver):
+    client = KnowledgeGraphClient.__new__(KnowledgeGraphClient)
+    client.driver = driver
+    return client
+
+
+async def test_write_batches_commits_one_transaction_per_batch():
+    driver = FakeDriver()
+    rows = [{"name": f"kp{i}", "missing": i == 3} for i in range(7)]
+    written = await _client(driver).write_batches("UNWIND $rows AS row ...", rows, batch_size=3)
+    assert [len(batch) for batch in driver.committed] == [3, 3, 1]
+    # Rows whose MATCH found nothing are not counted
+    assert written == 6
+
+
+async def test_write_batches_retries_transient_errors():
+    driver = FakeDriver(failures=2)
+    written = await _client(driver).write_batches("q", [{"name": "a"}], retries=3, backoff=0)
+    assert written == 1
+    assert driver.attempts == 3
+    assert len(driver.committed) == 1
+
+
+async def test_write_batches_gives_up_after_retries():
+    driver = FakeDriver(failures=5)
+    with pytest.raises(TransientError):
+        await _client(driver).write_batches("q", [{"name": "a"}], retries=1, backoff=0)
+    assert driver.attempts == 2
+    assert driver.committed == []
+
+
+def test_graph_rows_flatten_edges_per_type():
+    data = {
+        "subject": [{"name": "数学"}],
+        "chapter": [{"name": "函数", "subject": "数学"}],
+        "knowledge_point": [
+            {"name": "单调性", "chapter": "函数", "subject": "数学", "prerequisites": ["函数概念"], "related": []},
+            {"name": "函数概念", "chapter": "函数", "subject": "数学", "related": ["单调性", "奇偶性"]},
+        ],
+    }
+    rows = graph_rows(data)
+    assert rows["subjects"] == [{"name": "数学", "description": ""}]
+    assert rows["chapters"] == [{"name": "函数", "subject": "数学", "order": 0}]
+    assert rows["knowledge_points"][1]["aliases"] == []
+    assert rows["PREREQUISITE"] == [{"src": "单调性", "dst": "函数概念"}]
+    assert rows["RELATED_TO"] == [{"src": "函数概念", "dst": "单调性"}, {"src": "函数概念", "dst": "奇偶性"}]
+    assert set(EDGE_QUERIES) == {"PREREQUISITE", "RELATED_TO"}
+    assert all("UNWIND $rows" in q for q in EDGE_QUERIES.values())
+
+
+def test_exercise_rows_defaults():
+    (row,) = exercise_rows([{"id": "ex-1", "knowledge_point": "单调性", "content": "q", "answer": "a"}])
+    assert row == {
+        "kp_name": "单调性",
+        "id": "ex-1",
+        "content": "q",
+        "answer": "a",
+        "explanation": "",
+        "difficulty": 3,
+        "type": "solution",
+    }
+
+
+@pytest.mark.parametrize(
+    "query", [SUBJECT_QUERY, CHAPTER_QUERY, KNOWLEDGE_POINT_QUERY, EXERCISE_QUERY, *EDGE_QUERIES.values()],
+)
+def test_write_queries_count_matched_input_rows(query):
+    # ``written`` is compared with the number of rows sent; counting distinct nodes would
+    # report duplicate rows as unmatched
+    assert "DISTINCT" not in query
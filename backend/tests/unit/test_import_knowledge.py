@@ -0,0 +1,143 @@
+"""Tests for the pipelined, resumable knowledge-chunk import."""
+
+import json
+
+import pytest
+
+from app.services import corpus_version
+from app.services.lexical_index import LexicalIndex
+from scripts.corpus.import_knowledge import default_checkpoint, import_chunks, iter_chunks
+
+
+class FakeStore:
+    def __init__(self, fail_after: int | None = None):
+        self.rows: list[str] = []
+        self.inserts = 0
+        self.flushes = 0
+        self.fail_after = fail_after
+
+    async def insert(self, ids, embeddings, contents, subjects, chapters, sources, *, upsert=False):
+        self.upsert = upsert
+        if self.fail_after is not None and self.inserts >= self.fail_after:
+            raise ConnectionError("milvus down")
+        assert len(embeddings) == len(ids) == len(contents)
+        self.inserts += 1
+        self.rows.extend(ids)
+        return len(ids)
+
+    async def flush(self):
+        self.flushes += 1
+        return len(self.rows)
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        return [[float(len(t))] for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def _no_redis(monkeypatch):
+    async def bump():
+        return 1
+
+    monkeypatch.setattr(corpus_version, "bump_corpus_version", bump)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "knowledge_chunks.jsonl"
+    rows = [{"id": f"c{i}", "subject": "math", "chapter": "ch1", "content": f"内容{i}"} for i in range(25)]
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + "\n", encoding="utf-8")
+    return path
+
+
+def test_iter_chunks_assigns_stable_ids(tmp_path):
+    path = tmp_path / "chunks.jsonl"
+    path.write_text('{"subject": "math", "chapter": "c", "content": "x"}\nnot json\n', encoding="utf-8")
+    first = [c["id"] for c in iter_chunks(path)]
+    assert first == [c["id"] for c in iter_chunks(path)]
+    assert len(first) == 1
+
+
+async def test_bulk_inserts_with_single_flush(corpus):
+    store, embedder = FakeStore(), FakeEmbedder()
+    summary = await import_chunks(corpus, batch_size=4, insert_batch_size=10, workers=3, store=store, embedder=embedder)
+
+    assert summary["imported"] == 25 and summary["failed"] == 0
+    assert sorted(store.rows) == sorted(f"c{i}" for i in range(25))
+    assert embedder.calls == 7
+    # 25 rows in inserts of >= 10, then the remainder
+    assert store.inserts == 3
+    assert store.flushes == 1
+    assert "chunks_per_sec" in summary
+    assert not default_checkpoint(corpus).exists()
+
+
+async def test_resumes_after_failure_from_checkpoint(corpus):
+    broken = FakeStore(fail_after=1)
+    summary = await import_chunks(
+        corpus, batch_size=5, insert_batch_size=10, workers=1, store=broken, embedder=FakeEmbedder(),
+    )
+    assert summary["imported"] == 10
+    assert summary["failed"] == 15
+    assert default_checkpoint(corpus).exists()
+
+    store = FakeStore()
+    summary = await import_chunks(corpus, batch_size=5, insert_batch_size=10, store=store, embedder=FakeEmbedder())
+    assert summary["skipped"] == 10
+    assert summary["imported"] == 15
+    assert set(store.rows).isdisjoint(broken.rows)
+    assert not default_checkpoint(corpus).exists()
+
+
+async def test_restart_ignores_checkpoint(corpus):
+    default_checkpoint(corpus).write_text("c0\nc1\n", encoding="utf-8")
+    store = FakeStore()
+    summary = await import_chunks(corpus, restart=True, store=store, embedder=FakeEmbedder())
+    assert summary["skipped"] == 0
+    assert len(store.rows) == 25
+
+
+async def test_only_ids_imports_changed_chunks(corpus):
+    store = FakeStore()
+    summary = await import_chunks(corpus, only_ids={"c3", "c7"}, upsert=True, store=store, embedder=FakeEmbedder())
+    assert sorted(store.rows) == ["c3", "c7"]
+    assert store.upsert is True
+    assert summary["unchanged"] == 23
+
+
+async def test_resume_after_crash_backfills_lexical_index(corpus, tmp_path):
+    class CrashingStore(FakeStore):
+        async def flush(self):
+            raise SystemExit("killed")
+
+    lexical_dir = tmp_path / "lexical"
+    with pytest.raises(SystemExit):
+        await import_chunks(
+            corpus, batch_size=5, lexical_index_dir=lexical_dir, store=CrashingStore(), embedder=FakeEmbedder(),
+        )
+    assert not lexical_dir.exists()
+
+    summary = await import_chunks(corpus, lexical_index_dir=lexical_dir, store=FakeStore(), embedder=FakeEmbedder())
+    assert summary["skipped"] == 25
+    assert await LexicalIndex(lexical_dir).load() == 25
+
+
+async def test_sync_reimports_chunk_edited_after_crash(corpus):
+    broken = FakeStore(fail_after=1)
+    await import_chunks(corpus, batch_size=5, insert_batch_size=10, workers=1, store=broken, embedder=FakeEmbedder())
+    assert "c3" in broken.rows
+
+    rows = [json.loads(line) for line in corpus.read_text(encoding="utf-8").splitlines()]
+    rows[3]["content"] = "改过的内容"
+    corpus.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + "\n", encoding="utf-8")
+
+    store = FakeStore()
+    summary = await import_chunks(corpus, only_ids={"c3"}, upsert=True, store=store, embedder=FakeEmbedder())
+    # The checkpointed c3 has stale content, so it is embedded and upserted again
+    assert store.rows == ["c3"]
+    assert summary["imported"] == 1 and summary["skipped"] == 0
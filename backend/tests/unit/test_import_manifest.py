@@ -0,0 +1,171 @@
+"""Tests for the content-hash manifest and incremental corpus sync."""
+
+import json
+
+import pytest
+
+from scripts.corpus import import_all
+from scripts.corpus.import_graph import graph_key, graph_rows, removal_rows
+from scripts.corpus.import_manifest import MANIFEST_NAME, ImportManifest, content_hash
+
+
+def _write_jsonl(path, rows):
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + "\n", encoding="utf-8")
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": "二"}) == content_hash({"b": "二", "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_manifest_diff_and_roundtrip(tmp_path):
+    manifest = ImportManifest(tmp_path / MANIFEST_NAME)
+    manifest.update("chunks", {"a": "1", "b": "2", "c": "3"})
+
+    reloaded = ImportManifest(tmp_path / MANIFEST_NAME)
+    diff = reloaded.diff("chunks", {"a": "1", "b": "20", "d": "4"})
+    assert diff.changed == {"b", "d"}
+    assert diff.removed == {"c"}
+    assert diff.unchanged == 1
+    assert not reloaded.diff("chunks", {"a": "1", "b": "2", "c": "3"})
+    # A section never imported counts as all-new
+    assert reloaded.diff("graph", {"x": "1"}).changed == {"x"}
+
+
+def test_manifest_update_keeps_pending_keys_unrecorded(tmp_path):
+    manifest = ImportManifest(tmp_path / MANIFEST_NAME)
+    manifest.update("exercises", {"a": "1", "b": "2"})
+    manifest.update("exercises", {"a": "10", "b": "20", "c": "3"}, pending={"b", "c"})
+
+    # b keeps its old hash and c stays absent, so both are retried
+    reloaded = ImportManifest(tmp_path / MANIFEST_NAME)
+    assert reloaded.diff("exercises", {"a": "10", "b": "20", "c": "3"}).changed == {"b", "c"}
+
+
+def test_graph_keys_round_trip_to_removal_rows():
+    keys = {
+        graph_key("subject", {"name": "数学"}),
+        graph_key("chapter", {"subject": "数学", "name": "函数/导数"}),
+        graph_key("knowledge_point", {"name": "单调性"}),
+    }
+    rows = removal_rows(keys)
+    assert rows == {
+        "knowledge_point": [{"name": "单调性"}],
+        "chapter": [{"subject": "数学", "name": "函数/导数"}],
+        "subject": [{"name": "数学"}],
+    }
+
+
+def test_graph_rows_only_changed_points_and_their_edges():
+    data = {
+        "subject": [{"name": "数学"}],
+        "chapter": [{"name": "函数", "subject": "数学"}],
+        "knowledge_point": [
+            {"name": "A", "chapter": "函数", "subject": "数学", "prerequisites": ["B"]},
+            {"name": "B", "chapter": "函数", "subject": "数学", "related": ["C"]},
+            {"name": "C", "chapter": "函数", "subject": "数学", "related": ["A"]},
+        ],
+    }
+    rows = graph_rows(data, only={graph_key("knowledge_point", {"name": "B"})})
+    assert rows["subjects"] == [] and rows["chapters"] == []
+    assert [kp["name"] for kp in rows["knowledge_points"]] == ["B"]
+    # B's own edges plus edges from unchanged points into B
+    assert rows["PREREQUISITE"] == [{"src": "A", "dst": "B"}]
+    assert rows["RELATED_TO"] == [{"src": "B", "dst": "C"}]
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    _write_jsonl(
+        tmp_path / "knowledge_chunks.jsonl",
+        [{"id": f"c{i}", "subject": "math", "chapter": "ch", "content": f"内容{i}"} for i in range(3)],
+    )
+    _write_jsonl(tmp_path / "knowledge_graph.jsonl", [{"type": "subject", "name": "math"}])
+    return tmp_path
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls: dict[str, list] = {"chunks": [], "deleted": [], "graph": [], "exercises": []}
+    results: dict[str, dict] = {"graph": {}, "exercises": {}}
+
+    async def fake_import_chunks(path, **kwargs):
+        calls["chunks"].append(kwargs)
+        return {"imported": len(kwargs["only_ids"] or ()), "failed": 0}
+
+    async def fake_delete_chunks(ids):
+        calls["deleted"].append(ids)
+        return len(ids)
+
+    async def fake_import_graph(path, **kwargs):
+        calls["graph"].append(kwargs)
+        return dict(results["graph"])
+
+    async def fake_import_exercises(path, **kwargs):
+        calls["exercises"].append(kwargs)
+        return dict(results["exercises"])
+
+    monkeypatch.setattr(import_all, "import_chunks", fake_import_chunks)
+    monkeypatch.setattr(import_all, "delete_chunks", fake_delete_chunks)
+    monkeypatch.setattr(import_all, "import_graph", fake_import_graph)
+    monkeypatch.setattr(import_all, "import_exercises", fake_import_exercises)
+    calls["results"] = results
+    return calls
+
+
+async def test_sync_imports_only_changes_and_is_noop_when_unchanged(corpus_dir, calls):
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+    assert calls["chunks"][0]["only_ids"] == {"c0", "c1", "c2"}
+    assert len(calls["graph"]) == 1
+
+    # Unchanged corpus: nothing is imported
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+    assert len(calls["chunks"]) == 1 and len(calls["graph"]) == 1
+
+    _write_jsonl(
+        corpus_dir / "knowledge_chunks.jsonl",
+        [
+            {"id": "c0", "subject": "math", "chapter": "ch", "content": "内容0"},
+            {"id": "c1", "subject": "math", "chapter": "ch", "content": "改过的内容"},
+        ],
+    )
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+    assert calls["chunks"][1]["only_ids"] == {"c1"}
+    assert calls["chunks"][1]["upsert"] is True
+    assert calls["deleted"] == [["c2"]]
+    assert len(calls["graph"]) == 1
+
+
+async def test_sync_retries_unwritten_graph_and_exercise_records(corpus_dir, calls):
+    _write_jsonl(
+        corpus_dir / "exercises.jsonl",
+        [{"id": f"ex{i}", "knowledge_point": "A", "content": "题", "answer": "答"} for i in range(2)],
+    )
+    calls["results"]["graph"] = {"unmatched": 1}
+    calls["results"]["exercises"] = {"skipped_ids": ["ex1"]}
+    # Dropped graph rows fail the run so CI / cron notice
+    assert not await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+
+    calls["results"]["graph"] = {"unmatched": 0}
+    calls["results"]["exercises"] = {}
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+    assert len(calls["graph"]) == 2
+    assert calls["exercises"][1]["only"] == {"ex1"}
+
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+    assert len(calls["graph"]) == 2 and len(calls["exercises"]) == 2
+
+
+async def test_sync_deletes_records_of_a_removed_corpus_file(corpus_dir, calls):
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+
+    (corpus_dir / "knowledge_chunks.jsonl").unlink()
+    (corpus_dir / "knowledge_graph.jsonl").unlink()
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+    assert calls["deleted"] == [["c0", "c1", "c2"]]
+    assert len(calls["chunks"]) == 1
+    assert calls["graph"][1]["remove"] == {graph_key("subject", {"name": "math"})}
+
+    # The removals are recorded: the next sync has nothing left to do
+    assert await import_all.run_pipeline(corpus_dir, skip_validation=True, sync=True)
+    assert len(calls["deleted"]) == 1 and len(calls["graph"]) == 2
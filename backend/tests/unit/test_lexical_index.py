@@ -0,0 +1,154 @@
+"""Tests for the BM25 bigram index and reciprocal-rank fusion."""
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from app.services.lexical_index import LexicalIndex, char_bigrams, update_lexical_index, write_lexical_index
+from app.services.rag_pipeline import reciprocal_rank_fusion
+
+
+def meta(contents: list[str], subjects: list[str] | None = None) -> dict[str, list]:
+    n = len(contents)
+    return {
+        "id": [f"c{i}" for i in range(n)],
+        "content": contents,
+        "subject": subjects or ["化学"] * n,
+        "chapter": [""] * n,
+        "source": [""] * n,
+    }
+
+
+CORPUS = [
+    "氧化还原反应中，失去电子的物质被氧化。",
+    "等差数列的通项公式为 an = a1 + (n-1)d。",
+    "等比数列的前n项和公式。",
+    "化学反应速率与温度有关。",
+]
+
+
+class TestCharBigrams:
+    def test_bigrams_per_word_run(self):
+        assert char_bigrams("氧化还原") == ["氧化", "化还", "还原"]
+        assert char_bigrams("数列，a") == ["数列", "a"]
+
+    def test_normalizes_width_and_case(self):
+        assert char_bigrams("ＡＢ") == char_bigrams("ab")
+
+
+class TestLexicalIndex:
+    async def test_exact_term_ranks_first(self, tmp_path):
+        write_lexical_index(tmp_path, meta(CORPUS))
+        index = LexicalIndex(tmp_path)
+        assert await index.load() == 4
+
+        hits = await index.search("什么是氧化还原", top_k=2)
+        assert hits[0]["id"] == "c0"
+        assert set(hits[0]) == {"id", "score", "content", "subject", "chapter", "source"}
+
+        hits = await index.search("等差数列通项", top_k=3)
+        assert [h["id"] for h in hits[:2]] == ["c1", "c2"]
+
+    async def test_no_matching_terms(self, tmp_path):
+        write_lexical_index(tmp_path, meta(CORPUS))
+        assert await LexicalIndex(tmp_path).search("光合作用") == []
+
+    async def test_subject_filter(self, tmp_path):
+        write_lexical_index(tmp_path, meta(CORPUS, ["化学", "数学", "数学", "化学"]))
+        hits = await LexicalIndex(tmp_path).search("反应数列", top_k=5, subject_filter="数学")
+        assert {h["id"] for h in hits} == {"c1", "c2"}
+
+    async def test_update_upserts_by_id(self, tmp_path):
+        update_lexical_index(tmp_path, [{"id": "a", "content": "勾股定理", "subject": "数学", "chapter": ""}])
+        update_lexical_index(tmp_path, [{"id": "a", "content": "三角函数", "subject": "数学", "chapter": ""}])
+        index = LexicalIndex(tmp_path)
+        assert await index.load() == 1
+        assert await index.search("勾股") == []
+        assert (await index.search("三角"))[0]["id"] == "a"
+
+    async def test_update_removes_ids(self, tmp_path):
+        update_lexical_index(tmp_path, [{"id": "a", "content": "勾股定理"}, {"id": "b", "content": "三角函数"}])
+        update_lexical_index(tmp_path, [], removed=["a"])
+        index = LexicalIndex(tmp_path)
+        assert await index.load() == 1
+        assert await index.search("勾股") == []
+
+    async def test_update_publishes_new_generation_to_running_workers(self, tmp_path, monkeypatch):
+        from app.services import lexical_index
+
+        directory = tmp_path / "lexical"
+        update_lexical_index(directory, [{"id": "a", "content": "勾股定理"}])
+        monkeypatch.setattr(lexical_index.get_settings(), "lexical_index_dir", str(directory))
+        monkeypatch.setattr(lexical_index, "_index", None)
+        serving = lexical_index.get_lexical_index()
+        assert await serving.load() == 1
+
+        update_lexical_index(directory, [{"id": "b", "content": "三角函数"}])
+        # The open generation keeps serving intact data; the next lookup sees the import
+        assert [h["id"] for h in await serving.search("勾股")] == ["a"]
+        reloaded = lexical_index.get_lexical_index()
+        assert reloaded is not serving
+        assert (await reloaded.search("三角"))[0]["id"] == "b"
+
+    def test_vocabulary_and_metadata_are_memory_mapped(self, tmp_path):
+        write_lexical_index(tmp_path, meta(CORPUS))
+        index = LexicalIndex(tmp_path)
+        index._open()
+        assert isinstance(index._terms, np.memmap)
+        assert isinstance(index._meta["content"]._data, np.memmap)
+        assert [p.name for p in index.generation.glob("*.json")] == ["manifest.json"]
+
+    async def test_reads_generation_with_json_vocabulary(self, tmp_path):
+        # Layout written before the vocabulary and metadata became arrays
+        contents = ["勾股定理", "三角函数"]
+        vocab = {"三角": [0, 1], "函数": [1, 1], "勾股": [2, 1], "定理": [3, 1], "股定": [4, 1], "角函": [5, 1]}
+        np.save(tmp_path / "postings.npy", np.asarray([1, 1, 0, 0, 0, 1], dtype=np.int32))
+        np.save(tmp_path / "tf.npy", np.ones(6, dtype=np.uint16))
+        np.save(tmp_path / "doc_len.npy", np.asarray([3, 3], dtype=np.int32))
+        (tmp_path / "vocab.json").write_text(json.dumps(vocab), encoding="utf-8")
+        (tmp_path / "meta.json").write_text(json.dumps(meta(contents)), encoding="utf-8")
+        (tmp_path / "manifest.json").write_text(
+            json.dumps({"count": 2, "terms": 6, "avgdl": 3.0, "k1": 1.2, "b": 0.75}), encoding="utf-8",
+        )
+        assert [h["id"] for h in await LexicalIndex(tmp_path).search("勾股")] == ["c0"]
+
+        update_lexical_index(tmp_path, [{"id": "c2", "content": "等差数列"}])
+        index = LexicalIndex(tmp_path)
+        assert await index.load() == 3
+        assert (await index.search("三角函数"))[0]["id"] == "c1"
+
+    async def test_open_follows_link_when_pinned_generation_was_pruned(self, tmp_path):
+        directory = tmp_path / "lexical"
+        update_lexical_index(directory, [{"id": "a", "content": "勾股定理"}])
+        index = LexicalIndex(directory)  # resolved, not opened yet
+        update_lexical_index(directory, [{"id": "b", "content": "三角函数"}])
+        update_lexical_index(directory, [{"id": "c", "content": "等差数列"}])
+        assert not index.generation.exists()
+
+        assert await index.load() == 3
+        assert index.generation == directory.resolve()
+
+    def test_query_is_fast_on_large_corpus(self, tmp_path):
+        contents = [f"第{i}章 等差数列 与 函数 第{i % 97}节 练习 {i * 7919 % 10007}" for i in range(20000)]
+        write_lexical_index(tmp_path, meta(contents))
+        index = LexicalIndex(tmp_path)
+        index._open()
+        started = time.perf_counter()
+        for _ in range(10):
+            index._search("等差数列的函数练习", 10, None)
+        assert (time.perf_counter() - started) / 10 < 0.05
+
+
+class TestReciprocalRankFusion:
+    def test_agreement_wins_over_single_engine(self):
+        vector = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+        lexical = [{"id": "c"}, {"id": "d"}]
+        fused = reciprocal_rank_fusion([vector, lexical], k=60, top_k=2)
+        assert [h["id"] for h in fused] == ["c", "a"]
+        assert fused[0]["score"] == pytest.approx(1 / 63 + 1 / 61)
+
+    def test_single_ranking_keeps_order(self):
+        hits = [{"id": "x", "content": "1"}, {"id": "y", "content": "2"}]
+        assert [h["id"] for h in reciprocal_rank_fusion([hits, []], top_k=5)] == ["x", "y"]
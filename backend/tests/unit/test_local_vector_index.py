@@ -0,0 +1,183 @@
+"""Tests for the embedded snapshot vector index."""
+
+import numpy as np
+import pytest
+
+from app.services.local_vector_index import LocalVectorIndex, build_knn_graph, graph_entry_points, write_snapshot
+
+
+def corpus(n: int, dim: int = 16, seed: int = 0) -> tuple[np.ndarray, dict[str, list]]:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    meta = {
+        "id": [f"c{i}" for i in range(n)],
+        "content": [f"chunk {i}" for i in range(n)],
+        "subject": ["数学" if i % 2 == 0 else "物理" for i in range(n)],
+        "chapter": ["" for _ in range(n)],
+        "source": ["" for _ in range(n)],
+    }
+    return vectors, meta
+
+
+class TestFlatIndex:
+    async def test_exact_neighbour_and_hit_shape(self, tmp_path):
+        vectors, meta = corpus(200)
+        write_snapshot(tmp_path, vectors, meta)
+        index = LocalVectorIndex(tmp_path)
+        assert await index.load() == 200
+        assert index.kind == "flat"
+
+        hits = await index.search(vectors[17].tolist(), top_k=3)
+        assert hits[0]["id"] == "c17"
+        assert hits[0]["score"] == pytest.approx(1.0, abs=1e-5)
+        assert set(hits[0]) == {"id", "score", "content", "subject", "chapter", "source"}
+        assert hits[0]["score"] >= hits[1]["score"] >= hits[2]["score"]
+
+    async def test_subject_filter(self, tmp_path):
+        vectors, meta = corpus(100)
+        write_snapshot(tmp_path, vectors, meta)
+        index = LocalVectorIndex(tmp_path)
+
+        assert (await index.search(vectors[8].tolist(), top_k=2))[0]["id"] == "c8"
+
+        hits = await index.search(vectors[3].tolist(), top_k=5, subject_filter="数学")
+        assert all(h["subject"] == "数学" for h in hits)
+        assert "c3" not in [h["id"] for h in hits]  # c3 is 物理
+
+    def test_vectors_are_memory_mapped(self, tmp_path):
+        vectors, meta = corpus(10)
+        write_snapshot(tmp_path, vectors, meta)
+        assert isinstance(LocalVectorIndex(tmp_path)._open(), np.memmap)
+
+    async def test_empty_snapshot_and_oversized_k(self, tmp_path):
+        vectors, meta = corpus(0)
+        write_snapshot(tmp_path / "empty", vectors, meta)
+        assert await LocalVectorIndex(tmp_path / "empty").search([1.0] * 16, top_k=5) == []
+
+        vectors, meta = corpus(3)
+        write_snapshot(tmp_path / "small", vectors, meta)
+        assert len(await LocalVectorIndex(tmp_path / "small").search(vectors[0].tolist(), top_k=10)) == 3
+
+    def test_metadata_must_match(self, tmp_path):
+        vectors, meta = corpus(10)
+        meta["content"].pop()
+        with pytest.raises(ValueError):
+            write_snapshot(tmp_path, vectors, meta)
+
+
+class TestGraphIndex:
+    def test_knn_graph_has_no_self_edges(self):
+        vectors, _ = corpus(50)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        graph = build_knn_graph(vectors, neighbors=4)
+        assert graph.shape == (50, 8)
+        assert not (graph[:, :4] == np.arange(50)[:, None]).any()
+
+    def test_knn_graph_adds_reverse_edges(self):
+        vectors, _ = corpus(300, dim=64)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        graph = build_knn_graph(vectors, neighbors=4)
+        forward = graph[:, :4]
+        for row in range(300):
+            for back in set(graph[row, 4:].tolist()) - {row}:
+                assert row in forward[back]
+        # Rows that are nobody's nearest neighbour are still linked from their own neighbours
+        unreached = set(range(300)) - set(forward.ravel().tolist())
+        assert unreached and all((graph[forward[row]] == row).any() for row in unreached)
+
+    async def test_graph_search_recall(self, tmp_path):
+        vectors, meta = corpus(2000, dim=8)
+        write_snapshot(tmp_path, vectors, meta, graph_threshold=500, neighbors=12)
+        index = LocalVectorIndex(tmp_path, ef=64)
+        await index.load()
+        assert index.kind == "graph"
+
+        rng = np.random.default_rng(1)
+        queries = rng.standard_normal((20, 8)).astype(np.float32)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        results = [await index.search(query.tolist(), top_k=5) for query in queries]
+        recall = []
+        for query, hits in zip(queries, results, strict=True):
+            exact = {f"c{i}" for i in np.argsort(-(normalized @ query))[:5]}
+            recall.append(len(exact & {h["id"] for h in hits}) / 5)
+        assert np.mean(recall) >= 0.9
+
+
+    async def test_graph_search_recall_on_clustered_corpus(self, tmp_path):
+        # Well-separated clusters split the k-NN graph into components the walk cannot cross
+        rng = np.random.default_rng(3)
+        centers = rng.standard_normal((40, 32))
+        vectors = (centers[rng.integers(0, 40, 4000)] + 0.3 * rng.standard_normal((4000, 32))).astype(np.float32)
+        _, meta = corpus(4000)
+        write_snapshot(tmp_path, vectors, meta, graph_threshold=1000, neighbors=8)
+        index = LocalVectorIndex(tmp_path, ef=48)
+        await index.load()
+
+        queries = (centers[rng.integers(0, 40, 50)] + 0.3 * rng.standard_normal((50, 32))).astype(np.float32)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        results = [await index.search(query.tolist(), top_k=10) for query in queries]
+        recall = []
+        for query, hits in zip(queries, results, strict=True):
+            exact = {f"c{i}" for i in np.argsort(-(normalized @ query))[:10]}
+            recall.append(len(exact & {h["id"] for h in hits}) / 10)
+        assert np.mean(recall) >= 0.95
+
+    def test_entry_points_cover_every_component(self):
+        # Two disjoint 3-cycles and an isolated row
+        graph = np.array([[1], [2], [0], [4], [5], [3], [6]], dtype=np.int32)
+        assert graph_entry_points(graph, spread=1).tolist() == [0, 3, 6]
+
+
+class TestGenerations:
+    async def test_reimport_swaps_generation_under_open_index(self, tmp_path, monkeypatch):
+        from app.services import local_vector_index
+
+        directory = tmp_path / "index"
+        first, meta = corpus(20, seed=1)
+        write_snapshot(directory, first, meta)
+        monkeypatch.setattr(local_vector_index.get_settings(), "local_index_dir", str(directory))
+        monkeypatch.setattr(local_vector_index, "_index", None)
+        serving = local_vector_index.get_local_index()
+        await serving.load()
+
+        second, meta = corpus(30, seed=2)
+        write_snapshot(directory, second, meta)
+        assert directory.is_symlink()
+        # The mapped generation is untouched; the next lookup opens the new one
+        assert (await serving.search(first[3].tolist(), top_k=1))[0]["id"] == "c3"
+        reloaded = local_vector_index.get_local_index()
+        assert reloaded is not serving
+        assert await reloaded.load() == 30
+        assert local_vector_index.get_local_index() is reloaded
+
+        write_snapshot(directory, first, corpus(20)[1])
+        assert len(list((tmp_path / ".index.generations").iterdir())) == 2
+
+    async def test_open_follows_link_when_pinned_generation_was_pruned(self, tmp_path):
+        directory = tmp_path / "index"
+        write_snapshot(directory, *corpus(10))
+        index = LocalVectorIndex(directory)  # resolved, not opened yet
+        write_snapshot(directory, *corpus(20))
+        write_snapshot(directory, *corpus(30))
+        assert not index.generation.exists()
+        assert await index.load() == 30
+        assert index.generation == directory.resolve()
+
+
+class TestMilvusFailover:
+    async def test_rag_falls_back_to_local_index(self, tmp_path, monkeypatch):
+        from app.services.rag_pipeline import RAGPipeline
+
+        vectors, meta = corpus(20)
+        write_snapshot(tmp_path, vectors, meta)
+        index = LocalVectorIndex(tmp_path)
+
+        class DownStore:
+            async def search(self, *_args, **_kwargs):
+                raise ConnectionError("milvus unreachable")
+
+        monkeypatch.setattr("app.services.milvus_client.get_knowledge_store", lambda: DownStore())
+        monkeypatch.setattr("app.services.local_vector_index.get_local_index", lambda: index)
+
+        hits = await RAGPipeline()._vector_search(vectors[4].tolist(), top_k=1, subject_filter=None)
+        assert hits[0]["id"] == "c4"
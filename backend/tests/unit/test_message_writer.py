@@ -0,0 +1,90 @@
+"""Tests for the write-behind message buffer (group commit)."""
+
+import asyncio
+import uuid
+
+import pytest
+
+from app.models.conversation import ContentType, Message, MessageRole
+from app.services.message_writer import MessageWriteBuffer, message_row
+
+
+class FakeSession:
+    def __init__(self, log: list, fail: bool) -> None:
+        self.log = log
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin(self):
+        return self
+
+    async def execute(self, statement, params=None):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.log.append((statement.__visit_name__, params))
+
+
+class FakeSessionFactory:
+    def __init__(self, fail: bool = False) -> None:
+        self.log: list = []
+        self.sessions = 0
+        self.fail = fail
+
+    def __call__(self):
+        self.sessions += 1
+        return FakeSession(self.log, self.fail)
+
+
+def _message(conv_id: uuid.UUID, role: MessageRole, content: str) -> Message:
+    return Message(
+        id=uuid.uuid4(), conversation_id=conv_id, role=role, content_type=ContentType.TEXT,
+        content=content, is_flagged=False,
+    )
+
+
+class TestMessageWriteBuffer:
+    async def test_concurrent_turns_share_one_transaction(self):
+        factory = FakeSessionFactory()
+        writer = MessageWriteBuffer(factory, max_delay=0.01)
+        conv_a, conv_b = uuid.uuid4(), uuid.uuid4()
+
+        await asyncio.gather(
+            writer.submit(
+                conv_a, [_message(conv_a, MessageRole.USER, "问"), _message(conv_a, MessageRole.ASSISTANT, "答")],
+            ),
+            writer.submit(conv_b, [_message(conv_b, MessageRole.USER, "你好")]),
+            writer.submit(conv_a, [_message(conv_a, MessageRole.USER, "再问")]),
+        )
+        assert factory.sessions == 1
+        inserts = [params for name, params in factory.log if name == "insert"]
+        updates = [name for name, _ in factory.log if name == "update"]
+        assert len(inserts) == 1 and len(inserts[0]) == 4
+        assert len(updates) == 2  # one atomic counter update per conversation
+        assert writer.stats()["avg_turns_per_batch"] == 3
+        await writer.aclose()
+
+    async def test_failure_propagates_to_callers(self):
+        writer = MessageWriteBuffer(FakeSessionFactory(fail=True), max_delay=0)
+        conv = uuid.uuid4()
+        with pytest.raises(RuntimeError):
+            await writer.submit(conv, [_message(conv, MessageRole.USER, "q")])
+        assert writer.stats()["failures"] == 1
+        await writer.aclose()
+
+    async def test_closed_buffer_rejects_writes(self):
+        writer = MessageWriteBuffer(FakeSessionFactory(), max_delay=0)
+        await writer.aclose()
+        conv = uuid.uuid4()
+        with pytest.raises(RuntimeError):
+            await writer.submit(conv, [_message(conv, MessageRole.USER, "q")])
+
+    def test_row_carries_explicit_columns(self):
+        conv = uuid.uuid4()
+        row = message_row(_message(conv, MessageRole.USER, "q"))
+        assert row["conversation_id"] == conv
+        assert row["is_flagged"] is False
@@ -0,0 +1,59 @@
+"""Tests for the long-lived Milvus knowledge store (no Milvus server needed)."""
+
+import threading
+
+from app.services.milvus_client import MilvusKnowledgeStore
+
+
+class FakeEntity(dict):
+    pass
+
+
+class FakeHit:
+    def __init__(self, id: str, score: float, content: str) -> None:
+        self.id = id
+        self.score = score
+        self.entity = FakeEntity(content=content, subject="数学", chapter="勾股定理", source="")
+
+
+class FakeCollection:
+    num_entities = 2
+
+    def __init__(self) -> None:
+        self.loads = 0
+        self.search_calls: list[int] = []
+        self.threads: set[int] = set()
+
+    def load(self) -> None:
+        self.loads += 1
+
+    def search(self, *, data, limit, **_kwargs):
+        self.search_calls.append(len(data))
+        self.threads.add(threading.get_ident())
+        return [[FakeHit(f"q{i}-{k}", 1.0 - k / 10, f"chunk {i}/{k}") for k in range(limit)] for i in range(len(data))]
+
+
+def make_store() -> tuple[MilvusKnowledgeStore, FakeCollection]:
+    store = MilvusKnowledgeStore(max_workers=2)
+    collection = FakeCollection()
+    store._collection = collection
+    return store, collection
+
+
+class TestMilvusKnowledgeStore:
+    async def test_search_returns_hit_dicts(self):
+        store, collection = make_store()
+        hits = await store.search([0.1], top_k=2)
+        assert collection.search_calls == [1]
+        assert [h["id"] for h in hits] == ["q0-0", "q0-1"]
+        assert hits[0]["chapter"] == "勾股定理"
+        store.close()
+
+    async def test_loads_once_and_runs_off_loop(self):
+        store, collection = make_store()
+        assert await store.load() == 2
+        for _ in range(3):
+            await store.search([0.1], top_k=1)
+        assert collection.loads == 1
+        assert threading.get_ident() not in collection.threads
+        store.close()
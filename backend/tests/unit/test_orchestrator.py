@@ -84,3 +84,78 @@ class TestOrchestrator:
         )
         result = await orch.process(ctx)
         assert "没有可用的智能体" in result.aggregated_content
+
+
+class ChunkedAgent(EchoAgent):
+    async def process_stream(self, context: AgentContext):
+        for word in ["[", self._type.value, "] ", context.user_input]:
+            yield word
+
+
+class StalledAgent(EchoAgent):
+    async def process_stream(self, context: AgentContext):
+        import asyncio
+
+        await asyncio.sleep(3600)
+        yield "never"
+
+
+async def _collect(stream) -> str:
+    return "".join([chunk async for chunk in stream.chunks])
+
+
+class TestOrchestratorStream:
+    @pytest.mark.asyncio
+    async def test_default_stream_wraps_process(self, registry_with_agents):
+        orch = Orchestrator(registry_with_agents)
+        ctx = AgentContext(
+            user_id="user1",
+            conversation_id="conv1",
+            agent_type=AgentType.EMOTIONAL,
+            user_input="这道函数题怎么解？",
+        )
+        stream = orch.process_stream(ctx)
+        assert stream.agent_type == AgentType.ACADEMIC
+        assert await _collect(stream) == "[academic] 这道函数题怎么解？"
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_agent_chunks(self):
+        registry = AgentRegistry()
+        registry.register(ChunkedAgent(AgentType.EMOTIONAL))
+        orch = Orchestrator(registry)
+        ctx = AgentContext(
+            user_id="user1",
+            conversation_id="conv1",
+            agent_type=AgentType.EMOTIONAL,
+            user_input="我今天心情不好",
+        )
+        chunks = [c async for c in orch.process_stream(ctx).chunks]
+        assert len(chunks) == 4
+        assert "".join(chunks) == "[emotional] 我今天心情不好"
+
+    @pytest.mark.asyncio
+    async def test_stream_no_agent_available(self):
+        orch = Orchestrator(AgentRegistry())
+        ctx = AgentContext(
+            user_id="user1",
+            conversation_id="conv1",
+            agent_type=AgentType.ACADEMIC,
+            user_input="这道题怎么解？",
+        )
+        stream = orch.process_stream(ctx)
+        assert stream.agent_type is None
+        assert "没有可用的智能体" in await _collect(stream)
+
+    @pytest.mark.asyncio
+    async def test_stream_first_chunk_timeout(self, monkeypatch):
+        monkeypatch.setattr("app.hub.orchestrator.TASK_TIMEOUT_SECONDS", 0.01)
+        registry = AgentRegistry()
+        registry.register(StalledAgent(AgentType.ACADEMIC))
+        orch = Orchestrator(registry)
+        ctx = AgentContext(
+            user_id="user1",
+            conversation_id="conv1",
+            agent_type=AgentType.ACADEMIC,
+            user_input="这道题怎么解？",
+        )
+        assert "处理超时" in await _collect(orch.process_stream(ctx))
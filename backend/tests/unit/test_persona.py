@@ -1,11 +1,14 @@
 """Tests for persona interaction layer — manager, style controller, memory graph."""
 
 import types
+import uuid
 
+from app.core.database import commit_session
 from app.persona.memory_graph import MEMORY_TYPES
 from app.persona.persona_manager import (
     PERSONA_DIMENSIONS,
     PRESET_PERSONAS,
+    PersonaManager,
 )
 from app.persona.style_controller import (
     EMOTION_STYLE_MODIFIERS,
@@ -160,3 +163,36 @@ def _make_test_persona() -> types.SimpleNamespace:
         },
         preferred_agent_types=["academic", "classroom"],
     )
+
+
+class _PersonaSession:
+    def __init__(self, persona) -> None:
+        self.info: dict = {}
+        self._persona = persona
+
+    async def execute(self, stmt):
+        return types.SimpleNamespace(scalar_one_or_none=lambda: self._persona)
+
+    async def flush(self) -> None:
+        pass
+
+    async def commit(self) -> None:
+        pass
+
+
+class TestPersonaUpdateInvalidatesCache:
+    async def test_cached_persona_dropped_after_commit(self, monkeypatch) -> None:
+        dropped: list[str] = []
+
+        class FakeCache:
+            async def invalidate_persona(self, persona_id: str) -> None:
+                dropped.append(persona_id)
+
+        monkeypatch.setattr("app.persona.persona_manager.get_cache_service", FakeCache)
+        persona_id = uuid.uuid4()
+        db = _PersonaSession(types.SimpleNamespace(version=1, tone="warm"))
+        persona = await PersonaManager(db).update_persona(persona_id, tone="calm")
+        assert persona.version == 2 and dropped == []
+
+        await commit_session(db)
+        assert dropped == [str(persona_id)]
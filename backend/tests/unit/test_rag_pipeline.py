@@ -1,6 +1,10 @@
-"""Tests for RAG pipeline — document chunker (no external deps needed)."""
+"""Tests for RAG pipeline — document chunker and result cache (no external deps needed)."""
 
-from app.services.rag_pipeline import DocumentChunker
+import pytest
+
+from app.services import corpus_version, rag_pipeline
+from app.services.rag_pipeline import DocumentChunker, RAGPipeline, RetrievalResult, format_context
+from app.services.rerank_service import LocalReranker
 
 
 class TestDocumentChunker:
@@ -36,3 +40,105 @@ class TestDocumentChunker:
         text = "X" * 100
         chunks = self.chunker.chunk(text)
         assert len(chunks) == 1
+
+
+class FakeRAGCache:
+    def __init__(self) -> None:
+        self.version = "0"
+        self.store: dict[str, dict] = {}
+
+    async def get_corpus_version(self) -> str:
+        return self.version
+
+    async def bump_corpus_version(self) -> int:
+        self.version = str(int(self.version) + 1)
+        return int(self.version)
+
+    async def get_rag_result(self, key: str) -> dict | None:
+        return self.store.get(key)
+
+    async def set_rag_result(self, key: str, result: dict, ttl: int = 0) -> None:
+        self.store[key] = result
+
+
+class FakeEmbedding:
+    async def embed_single(self, text: str) -> list[float]:
+        return [1.0]
+
+
+class CountingPipeline(RAGPipeline):
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__(FakeEmbedding())
+        self.searches = 0
+        self.fail = fail
+
+    async def _vector_search(self, query_embedding, *, top_k, subject_filter):
+        self.searches += 1
+        if self.fail:
+            raise ConnectionError("milvus unreachable")
+        return [{"id": f"k{top_k}", "subject": subject_filter or "数学", "chapter": "勾股定理", "content": "a²+b²=c²"}]
+
+
+class TestRAGResultCache:
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        cache = FakeRAGCache()
+        monkeypatch.setattr(rag_pipeline, "get_cache_service", lambda: cache)
+        monkeypatch.setattr(corpus_version, "get_cache_service", lambda: cache)
+        monkeypatch.setattr(corpus_version, "_corpus_version", None)
+        return cache
+
+    async def test_hit_keyed_by_full_parameters(self, cache, monkeypatch):
+        class GraphDown:
+            async def get(self):
+                raise ConnectionError("neo4j unreachable")
+
+        monkeypatch.setattr("app.services.graph_snapshot.get_graph_snapshots", lambda: GraphDown())
+        rag = CountingPipeline()
+        first = await rag.retrieve("勾股定理", top_k=3)
+        assert await rag.retrieve("勾股定理", top_k=3) == first
+        assert rag.searches == 1
+
+        await rag.retrieve("勾股定理", top_k=4)
+        await rag.retrieve("勾股定理", top_k=3, subject_filter="物理")
+        await rag.retrieve("勾股定理", top_k=3, include_graph=True)  # graph fails → not cached
+        assert rag.searches == 4
+        assert len(cache.store) == 3
+
+    async def test_version_bump_invalidates(self, cache):
+        rag = CountingPipeline()
+        await rag.retrieve("勾股定理")
+        await corpus_version.bump_corpus_version()
+        await rag.retrieve("勾股定理")
+        assert rag.searches == 2
+
+    async def test_stores_structured_hits(self, cache):
+        result = await CountingPipeline().retrieve_hits("勾股定理", top_k=1)
+        (cached,) = cache.store.values()
+        assert RetrievalResult.from_dict(cached) == result
+        assert result.hits[0]["chapter"] == "勾股定理"
+        assert format_context(result).startswith("--- 相关知识 ---\n[1] (数学/勾股定理)")
+
+    async def test_degraded_result_not_cached(self, cache):
+        rag = CountingPipeline(fail=True)
+        assert await rag.retrieve("勾股定理") == ""
+        assert cache.store == {}
+
+    async def test_rerank_overfetches_candidates(self, cache, monkeypatch):
+        monkeypatch.setattr(rag_pipeline, "get_reranker", lambda: LocalReranker())
+        result = await CountingPipeline().retrieve_hits("勾股定理", top_k=3)
+        assert result.hits[0]["id"] == "k20"  # vector stage asked for N=20, not K=3
+
+    async def test_missing_graph_snapshot_degrades_quietly(self, cache, monkeypatch):
+        class NoSnapshot:
+            async def get(self):
+                return None
+
+        monkeypatch.setattr("app.services.graph_snapshot.get_graph_snapshots", lambda: NoSnapshot())
+        monkeypatch.setattr(rag_pipeline, "_graph_unavailable_logged_at", None)
+        result = await CountingPipeline().retrieve_hits("勾股定理", include_graph=True)
+        assert result.hits and result.related == []
+        assert not result.complete and cache.store == {}
+        first_logged = rag_pipeline._graph_unavailable_logged_at
+        await CountingPipeline().retrieve_hits("勾股定理", include_graph=True)
+        assert rag_pipeline._graph_unavailable_logged_at == first_logged  # once per retry window
@@ -0,0 +1,79 @@
+"""Tests for the rerank stage (budget, fallback, stats)."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.http_pool import UpstreamPoolRegistry
+from app.services import rerank_service
+from app.services.rerank_service import LocalReranker, RerankService, RerankStats, rerank_hits
+
+CANDIDATES = [
+    {"id": "a", "content": "三角函数的诱导公式"},
+    {"id": "b", "content": "等差数列求和"},
+    {"id": "c", "content": "等差数列的通项公式与求和公式"},
+]
+
+
+class SlowReranker:
+    async def score(self, query, documents):
+        await asyncio.sleep(1)
+        return [1.0] * len(documents)
+
+
+class BrokenReranker:
+    async def score(self, query, documents):
+        raise httpx.ConnectError("refused")
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(rerank_service, "_stats", RerankStats())
+
+
+class TestRerankHits:
+    async def test_local_reranker_promotes_best_match(self):
+        hits, reranked = await rerank_hits(LocalReranker(), "等差数列通项公式", CANDIDATES, top_k=2, budget=1.0)
+        assert reranked is True
+        assert [h["id"] for h in hits] == ["c", "b"]
+        assert "rerank_score" in hits[0]
+
+        stats = rerank_service.rerank_stats()
+        assert stats["reranked"] == 1
+        assert stats["recall_at_k"] == 0.5  # only "b" was already in retrieval top-2
+        assert stats["max_deepest_rank"] == 3
+
+    async def test_budget_exceeded_keeps_retrieval_order(self):
+        hits, reranked = await rerank_hits(SlowReranker(), "q", CANDIDATES, top_k=2, budget=0.01)
+        assert reranked is False
+        assert [h["id"] for h in hits] == ["a", "b"]
+        assert rerank_service.rerank_stats()["budget_exceeded"] == 1
+
+    async def test_failure_keeps_retrieval_order(self):
+        hits, reranked = await rerank_hits(BrokenReranker(), "q", CANDIDATES, top_k=1, budget=1.0)
+        assert (reranked, [h["id"] for h in hits]) == (False, ["a"])
+        assert rerank_service.rerank_stats()["failures"] == 1
+
+    async def test_zero_top_k_returns_nothing(self):
+        assert await rerank_hits(LocalReranker(), "q", CANDIDATES, top_k=0, budget=1.0) == ([], True)
+
+
+class TestRerankService:
+    async def test_one_batched_call(self, monkeypatch):
+        requests: list[dict] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            requests.append(body)
+            results = [{"index": i, "relevance_score": float(len(d))} for i, d in enumerate(body["documents"])]
+            return httpx.Response(200, json={"results": list(reversed(results))})
+
+        pools = UpstreamPoolRegistry(http2=False)
+        pools.register("http://rerank:8082", transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(rerank_service, "get_upstream_pools", lambda: pools)
+
+        scores = await RerankService("http://rerank:8082", model="bge-reranker-base").score("q", ["一", "一二三"])
+        assert scores == [1.0, 3.0]
+        assert requests == [{"model": "bge-reranker-base", "query": "q", "documents": ["一", "一二三"]}]
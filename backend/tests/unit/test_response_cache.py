@@ -0,0 +1,138 @@
+"""Tests for the LLM response cache (exact + near-duplicate tiers)."""
+
+import httpx
+
+from app.core.http_pool import UpstreamPoolRegistry
+from app.services.llm_client import LLMClient
+from app.services.response_cache import CacheScope, ResponseCache, normalize_text, persona_fingerprint
+
+
+class FakeEmbedding:
+    """Maps known strings to fixed vectors so similarity is deterministic."""
+
+    def __init__(self, table: dict[str, list[float]]) -> None:
+        self.table = table
+        self.calls = 0
+
+    async def embed_single(self, text: str) -> list[float]:
+        self.calls += 1
+        return self.table.get(text, [0.0, 0.0, 1.0])
+
+
+def _messages(question: str) -> list[dict[str, str]]:
+    return [{"role": "system", "content": "你是学伴"}, {"role": "user", "content": question}]
+
+
+_RESULT = {"content": "答案", "usage": {}, "finish_reason": "stop"}
+
+
+class TestNormalization:
+    def test_fullwidth_and_whitespace(self):
+        assert normalize_text("  ＡＢＣ   求解\n x ") == "abc 求解 x"
+
+    def test_persona_fingerprint_prefers_version(self):
+        assert persona_fingerprint({"id": "p1", "version": 3, "name": "小澜"}) == "p1:3"
+        assert persona_fingerprint(None) is None
+
+
+class TestExactTier:
+    async def test_hit_after_store(self):
+        cache = ResponseCache(semantic_threshold=None)
+        scope = CacheScope("academic")
+        probe = await cache.lookup(_messages("求 x 的值"), scope)
+        assert probe is not None and probe.result is None
+        cache.store(probe, _RESULT)
+
+        hit = await cache.lookup(_messages("求  x 的值 "), scope)
+        assert hit.result == _RESULT
+        assert cache.stats.exact_hits == 1
+        assert cache.stats.misses == 1
+
+    async def test_persona_version_separates_entries(self):
+        cache = ResponseCache(semantic_threshold=None)
+        probe = await cache.lookup(_messages("q"), CacheScope("academic", persona_version="p:1"))
+        cache.store(probe, _RESULT)
+        other = await cache.lookup(_messages("q"), CacheScope("academic", persona_version="p:2"))
+        assert other.result is None
+
+    async def test_ttl_expiry(self):
+        cache = ResponseCache(ttl_seconds=0, semantic_threshold=None)
+        probe = await cache.lookup(_messages("q"), CacheScope("academic"))
+        cache.store(probe, _RESULT)
+        again = await cache.lookup(_messages("q"), CacheScope("academic"))
+        assert again.result is None
+
+    async def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2, semantic_threshold=None)
+        for q in ("a", "b", "c"):
+            cache.store(await cache.lookup(_messages(q), CacheScope("academic")), _RESULT)
+        assert cache.snapshot()["entries"] == 2
+        assert cache.stats.evictions == 1
+        assert (await cache.lookup(_messages("a"), CacheScope("academic"))).result is None
+
+
+class TestEnablement:
+    async def test_emotional_never_cached(self):
+        cache = ResponseCache(enabled_namespaces={"academic", "emotional"})
+        assert await cache.lookup(_messages("我好难过"), CacheScope("emotional")) is None
+        assert cache.stats.bypassed == 1
+
+    async def test_namespace_must_be_enabled(self):
+        cache = ResponseCache(enabled_namespaces={"academic"})
+        assert await cache.lookup(_messages("q"), CacheScope("career")) is None
+        assert await cache.lookup(_messages("q"), CacheScope("academic.sub")) is not None
+
+    async def test_globally_disabled(self):
+        cache = ResponseCache(enabled=False)
+        assert await cache.lookup(_messages("q"), CacheScope("academic")) is None
+
+
+class TestSemanticTier:
+    async def test_near_duplicate_hit(self):
+        embed = FakeEmbedding({"等差数列求和": [1.0, 0.0, 0.0], "等差数列怎么求和": [0.99, 0.05, 0.0]})
+        cache = ResponseCache(semantic_threshold=0.95, embedding_service=embed)
+        probe = await cache.lookup(_messages("等差数列求和"), CacheScope("academic", query="等差数列求和"))
+        cache.store(probe, _RESULT)
+
+        hit = await cache.lookup(_messages("等差数列怎么求和"), CacheScope("academic", query="等差数列怎么求和"))
+        assert hit.result == _RESULT
+        assert cache.stats.semantic_hits == 1
+
+    async def test_dissimilar_query_misses(self):
+        embed = FakeEmbedding({"等差数列求和": [1.0, 0.0, 0.0], "牛顿第二定律": [0.0, 1.0, 0.0]})
+        cache = ResponseCache(semantic_threshold=0.95, embedding_service=embed)
+        cache.store(await cache.lookup(_messages("等差数列求和"), CacheScope("academic", query="等差数列求和")), _RESULT)
+        miss = await cache.lookup(_messages("牛顿第二定律"), CacheScope("academic", query="牛顿第二定律"))
+        assert miss.result is None
+
+    async def test_different_history_never_matches(self):
+        embed = FakeEmbedding({"q": [1.0, 0.0, 0.0]})
+        cache = ResponseCache(semantic_threshold=0.5, embedding_service=embed)
+        cache.store(await cache.lookup(_messages("q"), CacheScope("academic", query="q")), _RESULT)
+        with_history = [_messages("q")[0], {"role": "assistant", "content": "之前的回答"}, {"role": "user", "content": "q!"}]
+        miss = await cache.lookup(with_history, CacheScope("academic", query="q"))
+        assert miss.result is None
+
+
+class TestLLMClientCaching:
+    async def test_second_call_served_from_cache(self, monkeypatch):
+        calls = {"n": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls["n"] += 1
+            return httpx.Response(200, json={"choices": [{"message": {"content": "解"}, "finish_reason": "stop"}]})
+
+        pools = UpstreamPoolRegistry(http2=False)
+        pools.register("http://vllm:8000", transport=httpx.MockTransport(handler))
+        cache = ResponseCache(semantic_threshold=None)
+        monkeypatch.setattr("app.services.llm_client.get_upstream_pools", lambda: pools)
+        monkeypatch.setattr("app.services.llm_client.get_response_cache", lambda: cache)
+
+        client = LLMClient(base_url="http://vllm:8000")
+        for _ in range(2):
+            result = await client.generate(_messages("q"), cache=CacheScope("academic"))
+            assert result["content"] == "解"
+        assert calls["n"] == 1
+
+        await client.generate(_messages("q"))  # no scope → always upstream
+        assert calls["n"] == 2
@@ -0,0 +1,186 @@
+"""Tests for single-flight coalescing of identical upstream requests."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.single_flight import SingleFlight, get_single_flight, request_key
+
+
+class FakeRedisCache:
+    """In-memory stand-in for the CacheService methods single-flight uses."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def set_nx(self, namespace: str, key: str, value: str, ttl: int = 60) -> bool:
+        full = f"{namespace}:{key}"
+        if full in self.store:
+            return False
+        self.store[full] = value
+        return True
+
+    async def set(self, namespace: str, key: str, value, ttl: int = 60) -> None:
+        self.store[f"{namespace}:{key}"] = value
+
+    async def get(self, namespace: str, key: str):
+        raw = self.store.get(f"{namespace}:{key}")
+        return None if raw is None else json.loads(raw)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self.store.pop(f"{namespace}:{key}", None)
+
+    async def delete_if_equal(self, namespace: str, key: str, value: str) -> bool:
+        if self.store.get(f"{namespace}:{key}") != value:
+            return False
+        del self.store[f"{namespace}:{key}"]
+        return True
+
+    async def exists(self, namespace: str, key: str) -> bool:
+        return f"{namespace}:{key}" in self.store
+
+
+class TestRequestKey:
+    def test_stable_across_dict_order(self):
+        assert request_key({"a": 1, "b": 2}) == request_key({"b": 2, "a": 1})
+
+    def test_differs_on_params(self):
+        assert request_key("q", 5) != request_key("q", 10)
+
+
+class TestSingleFlightLocal:
+    async def test_concurrent_calls_collapse(self):
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return {"content": "答案"}
+
+        results = await asyncio.gather(*[flight.do("k", upstream) for _ in range(10)])
+        assert calls == 1
+        assert all(r == {"content": "答案"} for r in results)
+        assert flight.stats()["collapsed"] == 9
+        assert flight.stats()["in_flight"] == 0
+
+    async def test_sequential_calls_not_collapsed(self):
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("k", upstream) == 1
+        assert await flight.do("k", upstream) == 2
+
+    async def test_distinct_keys_run_separately(self):
+        flight = SingleFlight("test")
+
+        async def upstream(v):
+            await asyncio.sleep(0.01)
+            return v
+
+        a, b = await asyncio.gather(flight.do("a", lambda: upstream("a")), flight.do("b", lambda: upstream("b")))
+        assert (a, b) == ("a", "b")
+        assert flight.collapsed == 0
+
+    async def test_error_shared_with_followers(self):
+        flight = SingleFlight("test")
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("vLLM down")
+
+        results = await asyncio.gather(*[flight.do("k", upstream) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_cancelled_follower_does_not_cancel_leader(self):
+        flight = SingleFlight("test")
+
+        async def upstream():
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        leader = asyncio.ensure_future(flight.do("k", upstream))
+        follower = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0.005)
+        follower.cancel()
+        assert await leader == "ok"
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+
+
+class TestSingleFlightDistributed:
+    async def test_remote_follower_reads_leader_result(self):
+        redis = FakeRedisCache()
+        worker_a = SingleFlight("llm", cache=redis, poll_interval=0.005)
+        worker_b = SingleFlight("llm", cache=redis, poll_interval=0.005)
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.03)
+            return {"content": "共享"}
+
+        a, b = await asyncio.gather(worker_a.do("k", upstream), worker_b.do("k", upstream))
+        assert a == b == {"content": "共享"}
+        assert calls == 1
+        assert worker_a.remote_collapsed + worker_b.remote_collapsed == 1
+
+    async def test_lock_released_after_leader(self):
+        redis = FakeRedisCache()
+        flight = SingleFlight("llm", cache=redis)
+
+        async def upstream():
+            return "x"
+
+        await flight.do("k", upstream)
+        assert not await redis.exists("sf_lock", "llm:k")
+
+    async def test_failed_unlock_keeps_leader_result(self):
+        class FlakyDelete(FakeRedisCache):
+            async def delete_if_equal(self, namespace: str, key: str, value: str) -> bool:
+                raise ConnectionError("redis down")
+
+        flight = SingleFlight("llm", cache=FlakyDelete())
+
+        async def upstream():
+            return {"content": "ok"}
+
+        assert await flight.do("k", upstream) == {"content": "ok"}
+
+    async def test_overrunning_leader_keeps_successors_lock(self):
+        redis = FakeRedisCache()
+        flight = SingleFlight("llm", cache=redis)
+
+        async def upstream():
+            # Our lock lapsed mid-call and another worker's leader took it over
+            redis.store["sf_lock:llm:k"] = "successor-token"
+            return "x"
+
+        await flight.do("k", upstream)
+        assert redis.store["sf_lock:llm:k"] == "successor-token"
+
+    async def test_redis_failure_while_following_runs_locally(self):
+        class FlakyGet(FakeRedisCache):
+            async def get(self, namespace: str, key: str):
+                raise ConnectionError("redis down")
+
+        redis = FlakyGet()
+        redis.store["sf_lock:llm:k"] = "remote-leader"
+        flight = SingleFlight("llm", cache=redis, poll_interval=0.001)
+
+        async def upstream():
+            return {"content": "local"}
+
+        assert await flight.do("k", upstream) == {"content": "local"}
+
+    def test_lock_outlasts_call_timeout(self, monkeypatch):
+        monkeypatch.setattr("app.services.single_flight._groups", {})
+        assert get_single_flight("llm", timeout=60.0).lock_ttl > 60
@@ -0,0 +1,72 @@
+"""Tests for the staged pre-LLM executor used by ChatService."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.staged_executor import Stage, StagedExecutor
+
+
+async def _sleep_then(value, seconds: float):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def _boom():
+    raise RuntimeError("upstream down")
+
+
+class TestStagedExecutor:
+    async def test_stages_run_concurrently(self):
+        executor = StagedExecutor(deadline_seconds=5)
+        start = time.perf_counter()
+        results = await executor.run(
+            Stage("history", _sleep_then(["h"], 0.1)),
+            Stage("rag", _sleep_then("ctx", 0.1), optional=True, default=""),
+        )
+        elapsed = time.perf_counter() - start
+        assert results == {"history": ["h"], "rag": "ctx"}
+        assert elapsed < 0.18  # max(stage), not sum(stage)
+
+    async def test_timings_recorded(self):
+        executor = StagedExecutor(deadline_seconds=5)
+        with executor.timed("safety"):
+            pass
+        await executor.run(Stage("history", _sleep_then([], 0.01)))
+        assert set(executor.timings) == {"safety", "history"}
+        assert executor.timings["history"] >= 10
+
+    async def test_optional_stage_cut_at_deadline(self):
+        executor = StagedExecutor(deadline_seconds=0.05)
+        results = await executor.run(
+            Stage("history", _sleep_then(["h"], 0.01)),
+            Stage("rag", _sleep_then("late", 1), optional=True, default=""),
+        )
+        assert results["rag"] == ""
+        assert executor.timed_out == ["rag"]
+
+    async def test_optional_stage_failure_uses_default(self):
+        executor = StagedExecutor(deadline_seconds=5)
+        results = await executor.run(Stage("rag", _boom(), optional=True, default=""))
+        assert results["rag"] == ""
+
+    async def test_required_stage_outlives_deadline(self):
+        executor = StagedExecutor(deadline_seconds=0.01)
+        results = await executor.run(Stage("history", _sleep_then(["h"], 0.05)))
+        assert results["history"] == ["h"]
+
+    async def test_required_stage_timeout_fails_the_run(self):
+        executor = StagedExecutor(deadline_seconds=5)
+        start = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            await executor.run(Stage("history", _sleep_then(["h"], 1), timeout=0.02))
+        assert time.perf_counter() - start < 0.5
+
+    async def test_required_stage_failure_propagates(self):
+        executor = StagedExecutor(deadline_seconds=5)
+        with pytest.raises(RuntimeError):
+            await executor.run(
+                Stage("history", _boom()),
+                Stage("rag", _sleep_then("ctx", 0.01), optional=True, default=""),
+            )
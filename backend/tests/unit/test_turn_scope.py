@@ -0,0 +1,117 @@
+"""Tests for per-turn memoization and the shared service container."""
+
+import asyncio
+
+import pytest
+
+from app.agents.base_agent import AgentContext
+from app.core.container import ServiceContainer
+from app.hub.intent_classifier import IntentClassifier
+from app.hub.orchestrator import Orchestrator
+from app.hub.turn_scope import TurnScope
+from app.models.conversation import AgentType
+from app.services.content_safety import ContentSafetyFilter
+
+
+class CountingClassifier(IntentClassifier):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    def classify(self, text: str):
+        self.calls += 1
+        return super().classify(text)
+
+
+class SlowEmbedding:
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.fail = fail
+
+    async def embed_single(self, text: str) -> list[float]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("embedding down")
+        return [1.0, 0.0]
+
+
+def _scope(classifier=None, embedding=None, persona_loader=None) -> TurnScope:
+    return TurnScope(
+        "这道函数题怎么解？",
+        intent_classifier=classifier or CountingClassifier(),
+        safety_filter=ContentSafetyFilter(),
+        embedding_service=embedding or SlowEmbedding(),
+        persona_loader=persona_loader,
+    )
+
+
+class TestTurnScope:
+    def test_intent_and_safety_memoized(self):
+        classifier = CountingClassifier()
+        turn = _scope(classifier)
+        assert turn.intent() is turn.intent()
+        assert turn.safety() is turn.safety()
+        assert classifier.calls == 1
+        assert turn.hits == 2
+
+    async def test_concurrent_embeddings_share_one_call(self):
+        embedding = SlowEmbedding()
+        turn = _scope(embedding=embedding)
+        a, b = await asyncio.gather(turn.embedding(), turn.embedding())
+        assert a == b == [1.0, 0.0]
+        assert embedding.calls == 1
+
+    async def test_failed_embedding_not_memoized(self):
+        embedding = SlowEmbedding(fail=True)
+        turn = _scope(embedding=embedding)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await turn.embedding()
+        assert embedding.calls == 2
+
+    async def test_persona_loaded_once(self):
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            return {"id": "p1", "version": 1}
+
+        turn = _scope(persona_loader=loader)
+        assert await turn.persona() == await turn.persona()
+        assert loads == 1
+        assert await _scope().persona() is None
+
+    async def test_failed_persona_load_not_memoized(self):
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            if loads == 1:
+                raise ConnectionError("db blip")
+            return {"id": "p1", "version": 1}
+
+        turn = _scope(persona_loader=loader)
+        with pytest.raises(ConnectionError):
+            await turn.persona()
+        assert await turn.persona() == {"id": "p1", "version": 1}
+        assert loads == 2
+
+
+class TestOrchestratorReusesTurnIntent:
+    async def test_no_second_classification(self):
+        classifier = CountingClassifier()
+        services = ServiceContainer(intent_classifier=classifier)
+        turn = services.turn_scope("这道函数题怎么解？")
+        turn.intent()
+
+        ctx = AgentContext(
+            user_id="u1", conversation_id="c1", agent_type=AgentType.ACADEMIC,
+            user_input=turn.text, turn=turn,
+        )
+        intent, target_type, _ = Orchestrator(services.registry, classifier)._route(ctx)
+        assert classifier.calls == 1
+        assert target_type == AgentType.ACADEMIC
+        assert intent is turn.intent()
@@ -0,0 +1,105 @@
+"""Tests for streaming, sharded corpus validation."""
+
+import json
+
+import pytest
+
+from scripts.corpus.validate_corpus import CorpusValidator, shard_ranges
+
+LONG = "这是一段足够长的知识点内容，用来通过长度检查。"
+
+
+def _write(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _row(**fields) -> str:
+    return json.dumps(fields, ensure_ascii=False)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    _write(
+        tmp_path / "knowledge_chunks.jsonl",
+        [
+            _row(id="c1", subject="数学", chapter="函数", content=LONG, title="单调性"),
+            "",
+            "{not json",
+            _row(id="c1", subject="数学", chapter="函数", content=LONG),
+            _row(id="c2", chapter="函数", content="短"),
+        ],
+    )
+    _write(
+        tmp_path / "knowledge_graph.jsonl",
+        [
+            _row(type="subject", name="数学"),
+            _row(type="chapter", name="函数", subject="数学"),
+            _row(type="knowledge_point", name="单调性", chapter="函数", subject="数学", prerequisites=["函数概念"]),
+            _row(type="knowledge_point", name="奇偶性", chapter="数列", subject="数学", aliases=[""]),
+            _row(type="edge", name="x"),
+        ],
+    )
+    _write(
+        tmp_path / "exercises.jsonl",
+        [
+            _row(id="e1", knowledge_point="单调性", content="q", answer="a", type="choice"),
+            _row(id="e1", knowledge_point="对数", content="q", answer="a", type="essay"),
+        ],
+    )
+    return tmp_path
+
+
+def test_findings_have_file_line_locations(corpus):
+    validator = CorpusValidator(corpus, workers=1)
+    assert not validator.validate_all()
+    assert validator.errors[0].startswith("knowledge_chunks.jsonl:3: Invalid JSON — ")
+    assert validator.errors[1:3] == [
+        "knowledge_chunks.jsonl:4: Duplicate id 'c1'",
+        "knowledge_chunks.jsonl:5: Missing field 'subject'",
+    ]
+    assert "knowledge_graph.jsonl:4: KP '奇偶性' aliases must be a list of non-empty strings" in validator.errors
+    assert "knowledge_graph.jsonl:5: Unknown type 'edge'" in validator.errors
+    assert "exercises.jsonl:2: Duplicate id 'e1'" in validator.errors
+    assert "knowledge_graph.jsonl:3: KP '单调性' has prerequisite '函数概念' not in graph" in validator.warnings
+    assert "knowledge_graph.jsonl:4: KnowledgePoint '奇偶性' references unknown chapter '数列'" in validator.warnings
+    assert "knowledge_graph.jsonl:4: KP '奇偶性' has no matching knowledge chunk (by title)" in validator.warnings
+    assert "exercises.jsonl:2: knowledge_point '对数' not found in graph" in validator.warnings
+    assert "1 knowledge points without exercises: 奇偶性" in validator.warnings
+    assert validator.stats["knowledge_chunks"] == 3
+    assert validator.stats["graph_knowledge_points"] == 2
+
+
+def test_sharded_parallel_run_matches_serial(corpus):
+    lines = [_row(id=f"c{i}", subject="数学", chapter="函数", content=LONG if i % 7 else "短") for i in range(300)]
+    lines[120] = lines[10]  # duplicate id that crosses a shard boundary
+    _write(corpus / "knowledge_chunks.jsonl", lines)
+    assert len(shard_ranges(corpus / "knowledge_chunks.jsonl", 2048)) > 4
+
+    serial = CorpusValidator(corpus, workers=1)
+    serial.validate_all()
+    parallel = CorpusValidator(corpus, workers=3, shard_bytes=2048)
+    parallel.validate_all()
+    assert parallel.errors == serial.errors
+    assert parallel.warnings == serial.warnings
+    assert "knowledge_chunks.jsonl:121: Duplicate id 'c10'" in parallel.errors
+    assert "knowledge_chunks.jsonl:1: Content too short (1 chars)" in parallel.warnings
+
+
+def test_shard_ranges_cover_file_on_line_boundaries(tmp_path):
+    path = tmp_path / "f.jsonl"
+    _write(path, [f'{{"n": {i}}}' for i in range(100)])
+    data = path.read_bytes()
+    ranges = shard_ranges(path, 64)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(data[start - 1 : start] == b"\n" for start, _ in ranges[1:])
+
+
+def test_missing_files_are_errors(tmp_path):
+    validator = CorpusValidator(tmp_path, workers=1)
+    assert not validator.validate_all()
+    assert validator.errors == [
+        "Missing file: knowledge_chunks.jsonl",
+        "Missing file: knowledge_graph.jsonl",
+        "Missing file: exercises.jsonl",
+    ]